@@ -1,9 +1,13 @@
 import os
 import time
+import asyncio
 import base64
 import json
+from contextlib import asynccontextmanager
 from pathlib import Path
 
+from core import boot
+
 # Load environment variables from .env file for local development
 try:
     from dotenv import load_dotenv
@@ -12,13 +16,18 @@ try:
 except ImportError:
     print("⚠️  python-dotenv not installed, using system environment variables")
 
-from fastapi import FastAPI, HTTPException
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+with boot.phase("import fastapi + core"):
+    from fastapi import Depends, FastAPI, HTTPException
+    from fastapi.middleware.cors import CORSMiddleware
+    from starlette.concurrency import run_in_threadpool
 
-from core.config import settings
-from core.middleware import install_middleware
-from core.errors import install_handlers
+    from core import executors
+    from core.config import settings
+    from core.middleware import install_middleware
+    from fastapi.datastructures import Default
+    from core.responses import FastJSONResponse
+    from core.errors import install_handlers
+    from core.security import require_admin, require_metrics_access
 
 def _parse_origins_env():
     """
@@ -74,21 +83,61 @@ def _resolve_allow_origin_regex():
         return env_val
     return settings.ALLOW_ORIGIN_REGEX
 
+async def _startup_checks():
+    """
+    DB connectivity checks (which also warm the pools) and schema migrations,
+    run concurrently per database. Schema changes run once per boot
+    (serialised across replicas by an advisory lock) instead of on the
+    request path.
+    """
+    from core.db import check_database, database_names
+    steps = [
+        run_in_threadpool(boot.timed, f"db check: {name}", check_database, name)
+        for name in database_names()
+    ]
+    if settings.MIGRATIONS_ON_STARTUP:
+        from core.migrations import MIGRATIONS, run_migrations
+        steps += [
+            run_in_threadpool(boot.timed, f"migrations: {db}", run_migrations, [db])
+            for db in MIGRATIONS
+        ]
+    for result in await asyncio.gather(*steps, return_exceptions=True):
+        if isinstance(result, Exception):
+            print(f"❌ Startup database step failed: {result}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with boot.phase("lifespan: db checks + migrations"):
+        await _startup_checks()
+    boot.mark_ready()
+    boot.print_report()
+    boot.write_report(settings.BOOT_REPORT_PATH)
+    from core import replicas, scheduler
+    replicas.start()
+    scheduler.start()
+    yield
+    await scheduler.stop()
+    from core.db import close_all_pools
+    from core.db_async import close_async_pools
+    from core import jobs, notify
+    jobs.shutdown()
+    executors.shutdown()
+    notify.stop_listener()
+    await close_async_pools()
+    close_all_pools()
+
 BOOT_T0 = time.time()
 app = FastAPI(
     title='VK API',
     version='1.0.0',
     docs_url='/api/docs',
     openapi_url='/api/openapi.json',
+    lifespan=lifespan,
+    # Default(...) keeps FastAPI's direct-to-JSON path for response_model routes
+    default_response_class=Default(FastJSONResponse),
 )
 
-# --- Database Initialization -------------------------------------------------
-try:
-    from core.db import initialize_database
-    initialize_database()
-except Exception as e:
-    print(f"❌ Database initialization failed: {e}")
-    print("⚠️  Application will continue but may not function properly")
+# Database checks run in the lifespan hook (see _startup_checks), not at import.
 
 # --- CORS --------------------------------------------------------------------
 allow_origins = _resolve_allow_origins()
@@ -117,6 +166,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=['*'],
     allow_headers=['*'],
+    expose_headers=['X-DB-Queries', 'X-DB-Connections'],
 )
 
 # --- Middleware & error handlers ---------------------------------------------
@@ -128,6 +178,13 @@ install_handlers(app)     # AppError → JSON
 def health():
     return {'status': 'ok', 'uptime': round(time.time() - BOOT_T0, 2)}
 
+@app.get('/api/metrics', include_in_schema=False, dependencies=[Depends(require_metrics_access)])
+async def prometheus_metrics():
+    """Request, DB pool, outbound call and thread pool metrics in Prometheus text format"""
+    from fastapi.responses import Response
+    from core import metrics
+    return Response(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 @app.get('/api/cors-test')
 def cors_test():
     """Simple CORS test endpoint"""
@@ -137,7 +194,7 @@ def cors_test():
         'status': 'success'
     }
 
-@app.get('/api/debug/inventory')
+@app.get('/api/debug/inventory', dependencies=[Depends(require_admin)])
 def debug_inventory():
     """Debug endpoint for inventory adjustments"""
     try:
@@ -148,18 +205,9 @@ def debug_inventory():
             'inventory_db_host': '✅' if os.getenv('INVENTORY_LOGS_HOST') else '❌',
         }
         
-        # Test database connection
-        db_status = 'unknown'
-        try:
-            from core.db import get_inventory_log_connection
-            conn = get_inventory_log_connection()
-            cursor = conn.cursor()
-            cursor.execute("SELECT 1")
-            cursor.fetchone()
-            conn.close()
-            db_status = '✅ connected'
-        except Exception as e:
-            db_status = f'❌ {str(e)}'
+        # Database routing as currently decided (no connection attempt here)
+        from core import dbregistry
+        db_status = dbregistry.status()['inventory']
         
         # Test Zoho token
         zoho_status = 'unknown'
@@ -181,8 +229,61 @@ def debug_inventory():
     except Exception as e:
         return {'status': 'error', 'message': str(e)}
 
+@app.get('/api/debug/boot', dependencies=[Depends(require_admin)])
+def debug_boot():
+    """Boot-phase timings for this process (see core.boot)"""
+    return boot.report()
+
+@app.get('/api/debug/db-pools', dependencies=[Depends(require_admin)])
+def debug_db_pools():
+    """Connection pool sizing stats (checkout wait, in-use, overflow) per database"""
+    from core.db import pool_stats
+    from core.db_async import async_pool_stats
+    return {'pools': {**pool_stats(), **async_pool_stats()}, 'timestamp': time.time()}
+
+@app.get('/api/debug/scheduler', dependencies=[Depends(require_admin)])
+def debug_scheduler():
+    """Periodic tasks: leader status, next/last runs, durations and overlaps"""
+    from core import scheduler
+    return scheduler.status()
+
+@app.get('/api/debug/singleflight', dependencies=[Depends(require_admin)])
+def debug_singleflight():
+    """Request-coalescing hit rates per single-flight group"""
+    from core import singleflight
+    return {'groups': singleflight.stats(), 'timestamp': time.time()}
+
+@app.get('/api/debug/replicas', dependencies=[Depends(require_admin)])
+def debug_replicas():
+    """Read-replica lag, health and read-your-writes stickiness per database"""
+    from core import replicas
+    return {**replicas.status(), 'timestamp': time.time()}
+
+@app.get('/api/debug/outbound', dependencies=[Depends(require_admin)])
+def debug_outbound():
+    """Circuit state, in-flight calls and rejections per outbound dependency (Zoho, SGI)"""
+    from core import outbound
+    return {'dependencies': outbound.status(), 'timestamp': time.time()}
+
+@app.get('/api/debug/executors', dependencies=[Depends(require_admin)])
+def debug_executors():
+    """Busy / queued / rejected work per named executor, and anyio's default pool"""
+    return {'executors': executors.stats(), 'timestamp': time.time()}
+
+@app.get('/api/debug/slow-queries', dependencies=[Depends(require_admin)])
+def debug_slow_queries():
+    """Most recent statements over SLOW_QUERY_MS in this process (params redacted, sampled plans with literals stripped)"""
+    from core import querylog
+    return {
+        'threshold_ms': settings.SLOW_QUERY_MS,
+        'explain_sample': settings.SLOW_QUERY_EXPLAIN_SAMPLE,
+        'queries': querylog.recent(),
+        'timestamp': time.time(),
+    }
+
 # --- Fingerprint capture (lazy import) ---------------------------------------
 @app.get('/scan-fingerprint')
+@executors.offload('hardware')
 def scan():
     try:
         from enrollment.fingerprint_reader import read_fingerprint_template  # lazy import
@@ -203,13 +304,22 @@ def scan():
 API = '/api/v1'
 
 try:
-    from core.auth import router as auth_router
-    app.include_router(auth_router, prefix=f'{API}/auth', tags=['auth'])
-    app.include_router(auth_router, prefix='/auth', tags=['auth-legacy'])
+    with boot.phase('router: core.auth'):
+        from core.auth import router as auth_router
+        app.include_router(auth_router, prefix=f'{API}/auth', tags=['auth'])
+        app.include_router(auth_router, prefix='/auth', tags=['auth-legacy'])
     print('[boot] SUCCESS: mounted auth router')
 except Exception as e:
     print('[boot] auth router failed:', e)
 
+try:
+    with boot.phase('router: core.jobs'):
+        from core.jobs import router as jobs_router
+        app.include_router(jobs_router, prefix=f'{API}/jobs', tags=['jobs'])
+    print('[boot] SUCCESS: mounted jobs router')
+except Exception as e:
+    print('[boot] jobs router failed:', e)
+
 # Only mount modules that are complete and working
 working_modules = [
     ('modules.users.api', 'router', f'{API}/users', ['users']),
@@ -225,38 +335,67 @@ working_modules = [
 for mod, attr, prefix, tags in working_modules:
     try:
         print(f'[boot] Attempting to mount {mod} at {prefix}...')
-        module = __import__(mod, fromlist=[attr])
-        router = getattr(module, attr)
-        app.include_router(router, prefix=prefix, tags=tags)
+        with boot.phase(f'router: {mod}'):
+            module = __import__(mod, fromlist=[attr])
+            router = getattr(module, attr)
+            app.include_router(router, prefix=prefix, tags=tags)
         print(f'[boot] SUCCESS: mounted {mod} at {prefix}')
     except Exception as e:
         print(f'[boot] ERROR: {mod} failed to mount at {prefix}:', e)
 
 FRONTEND_DIR = Path(__file__).resolve().parent.parent / 'frontend'
-JS_DIR     = FRONTEND_DIR / 'js'
-CSS_DIR    = FRONTEND_DIR / 'css'
-HTML_DIR   = FRONTEND_DIR / 'html'
-ASSETS_DIR = FRONTEND_DIR / 'assets'
+
+def _static_root() -> Path:
+    """Serve the fingerprinted build (python -m core.static build) when there is one."""
+    build_dir = Path(settings.STATIC_BUILD_DIR) if settings.STATIC_BUILD_DIR else FRONTEND_DIR / 'dist'
+    return build_dir if (build_dir / 'manifest.json').is_file() else FRONTEND_DIR
+
+with boot.phase('static manifest'):
+    from core.static import MemoryFileCache, StaticAssets, load_manifest
+    STATIC_ROOT = _static_root()
+    _immutable = set(load_manifest(STATIC_ROOT).values())
+    _static_cache = MemoryFileCache(
+        max_file_size=settings.STATIC_MEMORY_CACHE_MAX_FILE_SIZE,
+        max_bytes=settings.STATIC_MEMORY_CACHE_MAX_BYTES,
+    )
+    print(f'[boot] static root: {STATIC_ROOT} ({len(_immutable)} fingerprinted assets)')
+
+JS_DIR     = STATIC_ROOT / 'js'
+CSS_DIR    = STATIC_ROOT / 'css'
+HTML_DIR   = STATIC_ROOT / 'html'
+ASSETS_DIR = STATIC_ROOT / 'assets'
+
+def _static_app(path: Path, *, html: bool = False) -> StaticAssets:
+    return StaticAssets(
+        directory=str(path), html=html, site_root=str(STATIC_ROOT),
+        immutable=_immutable, memory_cache=_static_cache,
+    )
 
 def _mount_if_exists(prefix: str, path: Path, *, html: bool = False, name: str = ''):
     if path.is_dir():
-        app.mount(prefix, StaticFiles(directory=str(path), html=html), name=name or prefix.strip('/'))
+        app.mount(prefix, _static_app(path, html=html), name=name or prefix.strip('/'))
         print(f'[boot] mounted {prefix} -> {path}')
     else:
         print(f'[boot] SKIP mount {prefix} (not found): {path}')
 
 # 1) Explicit asset mounts
-_mount_if_exists('/js',     JS_DIR,     html=False, name='js')
-_mount_if_exists('/css',    CSS_DIR,    html=False, name='css')
-_mount_if_exists('/html',   HTML_DIR,   html=False, name='html')
-_mount_if_exists('/assets', ASSETS_DIR, html=False, name='assets')
+with boot.phase('static mounts'):
+    _mount_if_exists('/js',     JS_DIR,     html=False, name='js')
+    _mount_if_exists('/css',    CSS_DIR,    html=False, name='css')
+    _mount_if_exists('/html',   HTML_DIR,   html=False, name='html')
+    _mount_if_exists('/assets', ASSETS_DIR, html=False, name='assets')
+
+@app.get('/api/debug/static', include_in_schema=False, dependencies=[Depends(require_admin)])
+def debug_static():
+    """Static root, fingerprinted asset count and in-memory file cache stats"""
+    return {'root': str(STATIC_ROOT), 'fingerprinted': len(_immutable), 'memory_cache': _static_cache.stats()}
 
 # 2) SPA fallback at root
-if FRONTEND_DIR.is_dir():
-    app.mount('/', StaticFiles(directory=str(FRONTEND_DIR), html=True), name='frontend')
-    print(f'[boot] mounted / -> {FRONTEND_DIR}')
+if STATIC_ROOT.is_dir():
+    app.mount('/', _static_app(STATIC_ROOT, html=True), name='frontend')
+    print(f'[boot] mounted / -> {STATIC_ROOT}')
 else:
-    print('[boot] frontend dir not found:', FRONTEND_DIR)
+    print('[boot] frontend dir not found:', STATIC_ROOT)
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,113 @@
+"""
+Sync vs async DB path under report load.
+
+Simulates what happens in production when a few slow report requests overlap
+with kiosk clock-ins: `--reports` slow report queries (pg_sleep of
+`--report-ms`) are in flight at once, while a kiosk probe (SELECT 1 on the
+sync path, like /attendance/clock) is issued every `--probe-interval`.
+
+  sync   reports run like a `def` route: psycopg2 on an anyio worker thread
+  async  reports run like an `async def` route: psycopg 3 on the event loop
+
+Reported: report throughput and kiosk probe latency (p50/p95/max).
+
+    cd backend && python -m benchmarks.async_db --reports 120 --report-ms 300
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+from core.db import _connect_kwargs, close_all_pools, get_pool
+from core.db_async import async_enabled, close_async_pools, fetch_all
+
+
+def _sync_query(database: str, query: str, params) -> None:
+    conn = get_pool(database).getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            cur.fetchall()
+    finally:
+        conn.close()
+
+
+async def _report(mode: str, database: str, seconds: float) -> None:
+    query, params = "SELECT pg_sleep(%s)", (seconds,)
+    if mode == "sync":
+        await run_in_threadpool(_sync_query, database, query, params)
+    else:
+        await fetch_all(database, query, params)
+
+
+async def _probe(database: str) -> float:
+    t0 = time.perf_counter()
+    await run_in_threadpool(_sync_query, database, "SELECT 1", ())
+    return time.perf_counter() - t0
+
+
+def _pct(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+async def run(mode: str, database: str, reports: int, report_ms: int, probe_interval: float) -> Dict[str, float]:
+    # warm both paths so connection setup isn't measured
+    await _probe(database)
+    await _report(mode, database, 0)
+
+    started = time.perf_counter()
+    report_tasks = [asyncio.create_task(_report(mode, database, report_ms / 1000)) for _ in range(reports)]
+    probes: List[float] = []
+    while not all(t.done() for t in report_tasks):
+        probes.append(await _probe(database))
+        await asyncio.sleep(probe_interval)
+    await asyncio.gather(*report_tasks)
+    elapsed = time.perf_counter() - started
+    return {
+        "reports_per_s": reports / elapsed,
+        "elapsed_s": elapsed,
+        "probes": len(probes),
+        "probe_p50_ms": statistics.median(probes) * 1000,
+        "probe_p95_ms": _pct(probes, 95) * 1000,
+        "probe_max_ms": max(probes) * 1000,
+    }
+
+
+async def main_async(args) -> None:
+    _connect_kwargs(args.database)  # fail fast if not configured
+    modes = ["sync", "async"] if args.mode == "both" else [args.mode]
+    if "async" in modes and not async_enabled():
+        print("psycopg 3 not installed or ASYNC_DB_ENABLED=false: the async mode would fall back to threads")
+    print(f"{args.reports} concurrent reports x {args.report_ms} ms on '{args.database}', kiosk probe every {args.probe_interval * 1000:.0f} ms")
+    print(f"{'mode':<6} {'reports/s':>10} {'elapsed s':>10} {'probes':>7} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8}")
+    for mode in modes:
+        r = await run(mode, args.database, args.reports, args.report_ms, args.probe_interval)
+        print(f"{mode:<6} {r['reports_per_s']:>10.1f} {r['elapsed_s']:>10.2f} {r['probes']:>7} "
+              f"{r['probe_p50_ms']:>8.1f} {r['probe_p95_ms']:>8.1f} {r['probe_max_ms']:>8.1f}")
+    await close_async_pools()
+    close_all_pools()
+
+
+def main() -> None:
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--database", default="attendance")
+    parser.add_argument("--mode", choices=["sync", "async", "both"], default="both")
+    parser.add_argument("--reports", type=int, default=120)
+    parser.add_argument("--report-ms", type=int, default=300)
+    parser.add_argument("--probe-interval", type=float, default=0.05)
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+"""
+Per-row cost of JSON list responses, before and after the fast response path.
+
+  before  route builds `[Model(**row) for row in rows]`, also declares
+          response_model=List[Model] (so every row is validated twice), and
+          the app's response class renders with the stdlib json encoder
+  after   route returns the repo rows; response_model validates them once in
+          a batched TypeAdapter call and pydantic-core writes the JSON
+          (app default = Default(FastJSONResponse), core.responses)
+
+Also compares plain dict routes (no response_model): stdlib vs orjson render.
+Rows mimic the real payloads of /enrollment/employees,
+/inventory/management/items and /inventory/management/metadata. No database
+needed; requests go through the full FastAPI stack in-process.
+
+    cd backend && python -m benchmarks.json_response --rows 10000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List
+
+from fastapi import FastAPI
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+
+from common.dto import EmployeeOut, InventoryItemOut, InventoryMetadataRecord
+from core.responses import FastJSONResponse, orjson
+
+
+def _employees(n: int) -> List[Dict[str, Any]]:
+    return [
+        {"id": i, "name": f"Employee {i}", "employee_code": f"E{i:05d}", "location": "UK",
+         "status": "active", "card_uid": f"{i:08X}", "has_fingerprint": i % 3 == 0}
+        for i in range(n)
+    ]
+
+
+def _items(n: int) -> List[Dict[str, Any]]:
+    return [
+        {"item_id": str(4_000_000 + i), "product_name": f"Product {i}", "sku": f"SKU-{i}",
+         "stock_on_hand": i % 250, "custom_fields": {"shelf_total": i % 40, "reserve_stock": i % 7}}
+        for i in range(n)
+    ]
+
+
+def _metadata(n: int) -> List[Dict[str, Any]]:
+    now = datetime(2025, 1, 1, 12, 0, 0)
+    return [
+        {"item_id": str(4_000_000 + i), "location": "A1", "date": "2025-01-01", "uk_6m_data": "12",
+         "shelf_lt1": "S1", "shelf_lt1_qty": i % 9, "shelf_gt1": "S2", "shelf_gt1_qty": i % 5,
+         "top_floor_expiry": "2026-01", "top_floor_total": i % 11, "status": "Active",
+         "uk_fr_preorder": None, "fr_6m_data": "3", "created_at": now}
+        for i in range(n)
+    ]
+
+
+DATASETS: Dict[str, tuple] = {
+    "employees": (EmployeeOut, _employees),
+    "items": (InventoryItemOut, _items),
+    "metadata": (InventoryMetadataRecord, _metadata),
+}
+
+
+class _StdlibJSONResponse(JSONResponse):
+    """The app's response class before this change (stdlib json, set explicitly)."""
+
+
+def _build_app(mode: str, rows: Dict[str, List[Dict[str, Any]]]) -> FastAPI:
+    if mode == "before":
+        app = FastAPI(default_response_class=_StdlibJSONResponse)
+    else:
+        app = FastAPI(default_response_class=Default(FastJSONResponse))
+
+    for name, (model, _) in DATASETS.items():
+        data = rows[name]
+        if mode == "before":
+            def endpoint(model=model, data=data):
+                return [model(**row) for row in data]
+        else:
+            def endpoint(data=data):
+                return data
+        app.add_api_route(f"/{name}", endpoint, methods=["GET"], response_model=List[model])
+        app.add_api_route(f"/{name}/plain", lambda data=data: data, methods=["GET"])
+    app.add_api_route("/empty", lambda: [], methods=["GET"])
+    return app
+
+
+def _median_seconds(fn: Callable[[], Any], repeat: int) -> float:
+    fn()  # warm up (schema/adapters are built lazily)
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples)
+
+
+def run(n: int, repeat: int) -> Dict[str, Dict[str, float]]:
+    rows = {name: make(n) for name, (_, make) in DATASETS.items()}
+    results: Dict[str, Dict[str, float]] = {}
+    for mode in ("before", "after"):
+        client = TestClient(_build_app(mode, rows))
+        overhead = _median_seconds(lambda: client.get("/empty"), repeat)
+        for name in DATASETS:
+            for suffix in ("", "/plain"):
+                resp_check = client.get(f"/{name}{suffix}")
+                assert resp_check.status_code == 200 and len(resp_check.json()) == n
+                t = _median_seconds(lambda: client.get(f"/{name}{suffix}"), repeat)
+                key = f"{name}{' (no response_model)' if suffix else ''}"
+                results.setdefault(key, {})[mode] = max(0.0, t - overhead) / n * 1e6  # µs per row
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"rows per response: {args.rows}, median of {args.repeat}, orjson: {'yes' if orjson else 'no'}")
+    print(f"{'endpoint':<34} {'before µs/row':>14} {'after µs/row':>13} {'speed-up':>9}")
+    for key, r in run(args.rows, args.repeat).items():
+        speedup = r["before"] / r["after"] if r["after"] else float("inf")
+        print(f"{key:<34} {r['before']:>14.2f} {r['after']:>13.2f} {speedup:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,537 @@
+"""
+Load test with the production traffic mix, against a running backend.
+
+Scenarios run concurrently for --duration seconds:
+  kiosk      shift change: every --burst-every s, --burst-size clock-ins at once
+             (POST /attendance/clock, and /clock-by-fingerprint for --fingerprint-share of them)
+  dashboard  --dashboards users opening the attendance overview (overview.js's five
+             parallel GETs), then --think s of reading
+  scanning   --scanners handhelds posting /inventory/adjustments/log every --scan-every s
+  uploads    a --upload-rows row CSV to /sales-imports/upload every --upload-every s
+             (--upload-mode jobs uses /upload/jobs and waits for the job to finish)
+  zoho_sync  (not in the default mix) every --sync-every s, sync the pending adjustments
+             the scanners logged to Zoho via /inventory/adjustments/sync/jobs and wait
+             for it; reports adjustments synced per second
+
+Setup, against a throwaway local Postgres (never a shared database - seed
+writes employees, users and stock rows):
+
+    docker run -d -p 5432:5432 -e POSTGRES_PASSWORD=postgres postgres:16
+    export {ATTENDANCE,INVENTORY_LOGS,PRODUCTS}_DB_HOST=127.0.0.1 ..._DB_PASSWORD=postgres
+    cd backend
+    python -m benchmarks.load seed
+    python scripts/start_server.py --prod --port 8000 &
+    python -m benchmarks.load run --duration 60 --out load-report.json
+
+The SGI fingerprint stand-in (benchmarks.standins) is started on
+127.0.0.1:8080 and the Zoho one on 127.0.0.1:8090 unless --no-standins;
+start the backend with ZOHO_ACCOUNTS_BASE / ZOHO_INVENTORY_BASE pointing at
+the latter (see benchmarks.standins) or Zoho calls go to the real API.
+--zoho-rate-limit-rate / --zoho-error-rate inject 429s and 5xx, and the
+report includes the stand-in's counts. The JSON report has request count,
+errors, throughput and p50/p95/p99/max latency per scenario and per endpoint;
+the same --seed gives the same request sequence.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import io
+import json
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+LOCATIONS = ["Warehouse", "Office", "Dispatch"]
+FIELDS = ["shelf_lt1_qty", "shelf_gt1_qty", "top_floor_total"]
+EMPLOYEE_PREFIX = "Load Test"
+ORDER_PREFIX = "LT-"
+
+
+def _template(seed: int, i: int) -> bytes:
+    """Deterministic fake fingerprint template for seeded employee i."""
+    return random.Random(seed * 100003 + i).randbytes(384)
+
+
+def _item_id(i: int) -> str:
+    return f"7725780{i:09d}"  # 16-digit Zoho-style item id, as the scanners send
+
+
+def _pct(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+# --- Seeding -------------------------------------------------------------------------
+# Tables the app expects but that predate core.migrations (production already has them)
+_DEV_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS employees (
+        id SERIAL PRIMARY KEY,
+        name TEXT NOT NULL,
+        employee_code TEXT,
+        location TEXT,
+        status TEXT DEFAULT 'active',
+        card_uid TEXT,
+        fingerprint_template BYTEA
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS attendance_logs (
+        id SERIAL PRIMARY KEY,
+        employee_id INTEGER NOT NULL REFERENCES employees(id) ON DELETE CASCADE,
+        log_time TIMESTAMP NOT NULL DEFAULT now(),
+        direction TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_attendance_logs_employee_time ON attendance_logs (employee_id, log_time)",
+    """
+    CREATE TABLE IF NOT EXISTS login_users (
+        username TEXT PRIMARY KEY,
+        password_hash TEXT NOT NULL,
+        role TEXT,
+        allowed_tabs TEXT
+    )
+    """,
+]
+
+
+def seed(args) -> None:
+    from core.db import close_all_pools, get_inventory_log_connection, get_products_connection, get_psycopg_connection
+    from core.migrations import run_migrations
+    from core.security import hash_password
+
+    rng = random.Random(args.seed)
+    conn = get_psycopg_connection()
+    try:
+        with conn.cursor() as cur:
+            for statement in _DEV_SCHEMA:
+                cur.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+    print("migrations:", run_migrations())
+
+    conn = get_psycopg_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(
+                "DELETE FROM attendance_logs WHERE employee_id IN (SELECT id FROM employees WHERE name LIKE %s)",
+                (f"{EMPLOYEE_PREFIX} %",),
+            )
+            cur.execute("DELETE FROM employees WHERE name LIKE %s", (f"{EMPLOYEE_PREFIX} %",))
+            ids = []
+            for i in range(args.employees):
+                tpl = _template(args.seed, i) if i < args.fingerprints else None
+                cur.execute(
+                    """
+                    INSERT INTO employees (name, employee_code, location, status, fingerprint_template)
+                    VALUES (%s, %s, %s, 'active', %s) RETURNING id
+                    """,
+                    (f"{EMPLOYEE_PREFIX} {i:03d}", f"LT{i:03d}", LOCATIONS[i % len(LOCATIONS)], tpl),
+                )
+                ids.append(cur.fetchone()[0])
+            # two weeks of history so the overview reports have something to chew on
+            rows = []
+            for back in range(1, args.history_days + 1):
+                day = datetime.combine(date.today() - timedelta(days=back), datetime.min.time())
+                if day.weekday() >= 5:
+                    continue
+                for emp in ids:
+                    start = day + timedelta(hours=8, minutes=rng.randint(-20, 30))
+                    rows.append((emp, start, "in"))
+                    rows.append((emp, start + timedelta(hours=8, minutes=rng.randint(0, 90)), "out"))
+            cur.executemany("INSERT INTO attendance_logs (employee_id, log_time, direction) VALUES (%s, %s, %s)", rows)
+            cur.execute(
+                """
+                INSERT INTO login_users (username, password_hash, role, allowed_tabs)
+                VALUES (%s, %s, 'admin', 'enrollment,inventory,attendance,labels,sales-imports,usermanagement')
+                ON CONFLICT (username) DO UPDATE SET password_hash = EXCLUDED.password_hash, role = 'admin'
+                """,
+                (args.username, hash_password(args.password)),
+            )
+        conn.commit()
+        print(f"attendance: {len(ids)} employees ({min(args.fingerprints, len(ids))} with fingerprints), "
+              f"{len(rows)} history logs, user '{args.username}'")
+    finally:
+        conn.close()
+
+    conn = get_inventory_log_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM inventory_metadata WHERE item_id LIKE %s", ("7725780%",))
+            cur.executemany(
+                """
+                INSERT INTO inventory_metadata (item_id, location, shelf_lt1_qty, shelf_gt1_qty, top_floor_total, status)
+                VALUES (%s, %s, %s, %s, %s, 'Active')
+                """,
+                [(_item_id(i), LOCATIONS[i % len(LOCATIONS)], rng.randint(0, 50), rng.randint(0, 50), rng.randint(0, 200))
+                 for i in range(args.items)],
+            )
+        conn.commit()
+        print(f"inventory: {args.items} items")
+    finally:
+        conn.close()
+
+    conn = get_products_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM uk_sales_data WHERE order_number LIKE %s", (f"{ORDER_PREFIX}%",))
+        conn.commit()
+    finally:
+        conn.close()
+    close_all_pools()
+
+
+# --- Recording -----------------------------------------------------------------------
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, Dict[str, List[float]]] = defaultdict(lambda: defaultdict(list))
+        self.errors: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+        self.error_examples: Dict[str, str] = {}
+
+    async def request(self, scenario: str, label: str, client, method: str, url: str, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resp = await client.request(method, url, **kwargs)
+            ok = resp.status_code < 400
+            if not ok:
+                self.error_examples.setdefault(label, f"{resp.status_code} {resp.text[:200]}")
+        except Exception as e:
+            resp, ok = None, False
+            self.error_examples.setdefault(label, f"{type(e).__name__}: {e}")
+        self.record(scenario, label, time.perf_counter() - t0, ok)
+        return resp
+
+    def record(self, scenario: str, label: str, seconds: float, ok: bool = True) -> None:
+        self.samples[scenario][label].append(seconds)
+        if not ok:
+            self.errors[scenario][label] += 1
+
+    @staticmethod
+    def _summary(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+        if not latencies:
+            return {"requests": 0, "errors": errors}
+        return {
+            "requests": len(latencies),
+            "errors": errors,
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            "latency_ms": {
+                "p50": round(_pct(latencies, 50) * 1000, 1),
+                "p95": round(_pct(latencies, 95) * 1000, 1),
+                "p99": round(_pct(latencies, 99) * 1000, 1),
+                "max": round(max(latencies) * 1000, 1),
+                "mean": round(sum(latencies) / len(latencies) * 1000, 1),
+            },
+        }
+
+    def report(self, elapsed: float) -> Dict[str, Any]:
+        out = {}
+        for scenario, by_label in self.samples.items():
+            # page-level timings (dashboard fan-out, upload jobs) aren't extra requests
+            requests = [v for label, vs in by_label.items() if not label.startswith("page:") for v in vs]
+            errors = sum(n for label, n in self.errors[scenario].items() if not label.startswith("page:"))
+            out[scenario] = {
+                **self._summary(requests, errors, elapsed),
+                "endpoints": {
+                    label: self._summary(vs, self.errors[scenario].get(label, 0), elapsed)
+                    for label, vs in sorted(by_label.items())
+                },
+            }
+        return out
+
+
+# --- Scenarios -----------------------------------------------------------------------
+class Run:
+    def __init__(self, args, client, rec: Recorder, employees: List[Dict[str, Any]]):
+        self.args = args
+        self.client = client
+        self.rec = rec
+        self.employees = employees
+        self.fingerprinted = [e for e in employees if e["index"] < args.fingerprints]
+        self.rng = random.Random(args.seed)
+        self.deadline = time.monotonic() + args.duration
+        self.sync_jobs: List[Dict[str, Any]] = []
+
+    def running(self) -> bool:
+        return time.monotonic() < self.deadline
+
+    async def _sleep(self, seconds: float) -> None:
+        await asyncio.sleep(max(0.0, min(seconds, self.deadline - time.monotonic())))
+
+    async def _clock(self) -> None:
+        if self.fingerprinted and self.rng.random() < self.args.fingerprint_share:
+            emp = self.rng.choice(self.fingerprinted)
+            tpl = base64.b64encode(_template(self.args.seed, emp["index"])).decode("ascii")
+            await self.rec.request("kiosk", "POST /attendance/clock-by-fingerprint", self.client, "POST",
+                                   "/api/v1/attendance/clock-by-fingerprint", json={"template_b64": tpl})
+        else:
+            emp = self.rng.choice(self.employees)
+            await self.rec.request("kiosk", "POST /attendance/clock", self.client, "POST",
+                                   "/api/v1/attendance/clock", json={"employee_id": emp["id"]})
+
+    async def kiosk(self) -> None:
+        while self.running():
+            # people arrive over a few seconds rather than in the same millisecond
+            async def arrive():
+                await asyncio.sleep(self.rng.uniform(0, self.args.burst_spread))
+                await self._clock()
+            await asyncio.gather(*(arrive() for _ in range(self.args.burst_size)))
+            await self._sleep(self.args.burst_every)
+
+    async def _dashboard_user(self) -> None:
+        await self._sleep(self.rng.uniform(0, self.args.think))  # don't all open it at t=0
+        today = date.today()
+        params = {"from_date": (today - timedelta(days=7)).isoformat(), "to_date": today.isoformat()}
+        gets = [
+            ("GET /attendance/daily-stats", "/api/v1/attendance/daily-stats", {}),
+            ("GET /attendance/weekly-chart", "/api/v1/attendance/weekly-chart", params),
+            ("GET /attendance/work-hours", "/api/v1/attendance/work-hours", params),
+            ("GET /attendance/summary", "/api/v1/attendance/summary", params),
+            ("GET /attendance/employees/status", "/api/v1/attendance/employees/status", {}),
+        ]
+        while self.running():
+            t0 = time.perf_counter()
+            await asyncio.gather(*(
+                self.rec.request("dashboard", label, self.client, "GET", url, params=p) for label, url, p in gets
+            ))
+            self.rec.record("dashboard", "page: overview (5 parallel GETs)", time.perf_counter() - t0)
+            await self._sleep(self.args.think)
+
+    async def dashboard(self) -> None:
+        await asyncio.gather(*(self._dashboard_user() for _ in range(self.args.dashboards)))
+
+    async def _scanner(self, n: int) -> None:
+        rng = random.Random(self.args.seed + 1000 + n)
+        while self.running():
+            body = {
+                "barcode": _item_id(rng.randrange(self.args.items)),
+                "quantity": rng.choice([-2, -1, -1, 1, 1, 3]),
+                "reason": "load test",
+                "field": rng.choice(FIELDS),
+            }
+            await self.rec.request("scanning", "POST /inventory/adjustments/log", self.client, "POST",
+                                   "/api/v1/inventory/adjustments/log", json=body)
+            await self._sleep(rng.uniform(0.5, 1.5) * self.args.scan_every)
+
+    async def scanning(self) -> None:
+        await asyncio.gather(*(self._scanner(n) for n in range(self.args.scanners)))
+
+    def _csv(self, n: int) -> bytes:
+        buf = io.StringIO()
+        buf.write("order_number,created_at,sku,name,qty,price,status\n")
+        now = datetime.now()
+        for i in range(self.args.upload_rows):
+            created = (now - timedelta(minutes=i)).strftime("%Y-%m-%d %H:%M:%S")
+            buf.write(f"{ORDER_PREFIX}{n}-{i},{created},SKU{i % 500:04d},Load test item {i % 500},"
+                      f"{1 + i % 3},{(i % 40) + 0.99:.2f},completed\n")
+        return buf.getvalue().encode("utf-8")
+
+    async def _wait_job(self, scenario: str, resp) -> Optional[Dict[str, Any]]:
+        """Poll a 202'd job until it finishes; returns the final job (None if polling failed)."""
+        url = resp.json()["status_url"]
+        while True:
+            await asyncio.sleep(0.5)
+            job = await self.rec.request(scenario, "GET /jobs/{id}", self.client, "GET", url)
+            if job is None:
+                return None
+            if job.json().get("status") not in ("queued", "running"):
+                return job.json()
+
+    async def uploads(self) -> None:
+        n = 0
+        while self.running():
+            files = {"file": (f"loadtest-{n}.csv", self._csv(n), "text/csv")}
+            if self.args.upload_mode == "jobs":
+                t0 = time.perf_counter()
+                resp = await self.rec.request("uploads", "POST /sales-imports/upload/jobs", self.client, "POST",
+                                              "/api/v1/sales-imports/upload/jobs", files=files)
+                if resp is not None and resp.status_code == 202:
+                    await self._wait_job("uploads", resp)
+                    self.rec.record("uploads", "page: upload job to completion", time.perf_counter() - t0)
+            else:
+                await self.rec.request("uploads", "POST /sales-imports/upload", self.client, "POST",
+                                       "/api/v1/sales-imports/upload", files=files)
+            n += 1
+            await self._sleep(self.args.upload_every)
+
+
+    async def zoho_sync(self) -> None:
+        await self._sleep(self.args.sync_every)  # let the scanners queue something first
+        while self.running():
+            t0 = time.perf_counter()
+            resp = await self.rec.request("zoho_sync", "POST /inventory/adjustments/sync/jobs", self.client, "POST",
+                                          "/api/v1/inventory/adjustments/sync/jobs")
+            if resp is not None and resp.status_code == 202:
+                job = await self._wait_job("zoho_sync", resp)
+                elapsed = time.perf_counter() - t0
+                self.rec.record("zoho_sync", "page: sync job to completion", elapsed)
+                result = (job or {}).get("result") or {}
+                synced = result.get("success_count", 0)
+                self.sync_jobs.append({
+                    "status": (job or {}).get("status"),
+                    "seconds": round(elapsed, 2),
+                    "synced": synced,
+                    "failed": result.get("error_count", 0),
+                    "synced_per_s": round(synced / elapsed, 2) if elapsed else 0.0,
+                })
+            await self._sleep(self.args.sync_every)
+
+
+async def _login(client, username: str, password: str) -> str:
+    resp = await client.post("/api/v1/auth/login", json={"username": username, "password": password})
+    if resp.status_code != 200:
+        raise SystemExit(f"login as '{username}' failed ({resp.status_code}); did you run `python -m benchmarks.load seed`?")
+    return resp.json()["access_token"]
+
+
+def _git_rev() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        return None
+
+
+async def run_async(args) -> Dict[str, Any]:
+    import httpx
+
+    standins = []
+    if not args.no_standins:
+        from benchmarks.standins import serve_in_thread, sgi_app, zoho_app
+        standins.append(serve_in_thread(sgi_app(args.sgi_latency_ms), "127.0.0.1", args.sgi_port))
+        zoho = zoho_app(
+            [_item_id(i) for i in range(args.items)], latency_ms=args.zoho_latency_ms,
+            rate_limit_rate=args.zoho_rate_limit_rate, error_rate=args.zoho_error_rate,
+            per_minute=args.zoho_per_minute, seed=args.seed,
+        )
+        standins.append(serve_in_thread(zoho, "127.0.0.1", args.zoho_port))
+
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        token = await _login(client, args.username, args.password)
+        client.headers["Authorization"] = f"Bearer {token}"
+        resp = await client.get("/api/v1/attendance/employees")
+        resp.raise_for_status()
+        employees = [
+            {"id": e["id"], "index": int(e["name"].rsplit(" ", 1)[1])}
+            for e in resp.json() if e["name"].startswith(f"{EMPLOYEE_PREFIX} ")
+        ]
+        if not employees:
+            raise SystemExit("no seeded employees found; run `python -m benchmarks.load seed` first")
+
+        rec = Recorder()
+        run = Run(args, client, rec, employees)
+        scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+        print(f"running {', '.join(scenarios)} against {args.base_url} for {args.duration}s ...")
+        started = time.perf_counter()
+        await asyncio.gather(*(getattr(run, s)() for s in scenarios))
+        elapsed = time.perf_counter() - started
+
+    standin_stats = {}
+    if not args.no_standins:
+        async with httpx.AsyncClient(timeout=5) as c:
+            standin_stats["zoho"] = (await c.get(f"http://127.0.0.1:{args.zoho_port}/_standin/stats")).json()
+    for server in standins:
+        server.should_exit = True
+
+    return {
+        "meta": {
+            "base_url": args.base_url,
+            "started_at": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": round(elapsed, 2),
+            "git_rev": _git_rev(),
+            "python": platform.python_version(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("password", "func")},
+        },
+        "scenarios": rec.report(elapsed),
+        "error_examples": rec.error_examples,
+        "sync_jobs": run.sync_jobs,
+        "standins": standin_stats,
+    }
+
+
+def _print(report: Dict[str, Any]) -> None:
+    print(f"{'scenario / endpoint':<48} {'req':>6} {'err':>5} {'rps':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for scenario, s in report["scenarios"].items():
+        for label, e in [(scenario, s)] + [(f"  {k}", v) for k, v in s["endpoints"].items()]:
+            lat = e.get("latency_ms", {})
+            print(f"{label:<48} {e['requests']:>6} {e['errors']:>5} {e.get('throughput_rps', 0):>7.1f} "
+                  f"{lat.get('p50', 0):>8.1f} {lat.get('p95', 0):>8.1f} {lat.get('p99', 0):>8.1f} {lat.get('max', 0):>8.1f}")
+    for job in report["sync_jobs"]:
+        print(f"sync job: {job['synced']} synced, {job['failed']} failed in {job['seconds']}s ({job['synced_per_s']}/s)")
+    for name, counts in report["standins"].items():
+        print(f"{name} stand-in: {json.dumps(counts, sort_keys=True)}")
+    for label, example in report["error_examples"].items():
+        print(f"first error for {label}: {example}")
+
+
+def main() -> None:
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    # options seed and run share (given after the subcommand: `load.py run --seed 7`)
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--seed", type=int, default=365, help="random seed (seed and run must match)")
+    common.add_argument("--username", default="loadtest")
+    common.add_argument("--password", default="loadtest")
+    common.add_argument("--fingerprints", type=int, default=20, help="seeded employees with a fingerprint template")
+    common.add_argument("--items", type=int, default=500, help="seeded inventory items")
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("seed", parents=[common], help="create the load-test data in the configured (local!) databases")
+    p.add_argument("--employees", type=int, default=60)
+    p.add_argument("--history-days", type=int, default=14)
+    p.set_defaults(func=seed)
+
+    p = sub.add_parser("run", parents=[common], help="run the scenarios and write the report")
+    p.add_argument("--base-url", default="http://127.0.0.1:8000")
+    p.add_argument("--scenarios", default="kiosk,dashboard,scanning,uploads")
+    p.add_argument("--duration", type=float, default=60.0)
+    p.add_argument("--out", default=None, help="write the JSON report here")
+    p.add_argument("--timeout", type=float, default=60.0)
+    p.add_argument("--max-connections", type=int, default=200)
+    p.add_argument("--burst-size", type=int, default=25)
+    p.add_argument("--burst-every", type=float, default=15.0)
+    p.add_argument("--burst-spread", type=float, default=3.0, help="seconds over which a burst arrives")
+    p.add_argument("--fingerprint-share", type=float, default=0.3)
+    p.add_argument("--dashboards", type=int, default=5)
+    p.add_argument("--think", type=float, default=10.0)
+    p.add_argument("--scanners", type=int, default=8)
+    p.add_argument("--scan-every", type=float, default=2.0)
+    p.add_argument("--upload-every", type=float, default=20.0)
+    p.add_argument("--upload-rows", type=int, default=2000)
+    p.add_argument("--upload-mode", choices=["sync", "jobs"], default="sync")
+    p.add_argument("--sync-every", type=float, default=30.0)
+    p.add_argument("--no-standins", action="store_true", help="don't start the local SGI and Zoho stand-ins")
+    p.add_argument("--sgi-port", type=int, default=8080)
+    p.add_argument("--sgi-latency-ms", type=float, default=40.0)
+    p.add_argument("--zoho-port", type=int, default=8090)
+    p.add_argument("--zoho-latency-ms", type=float, default=150.0)
+    p.add_argument("--zoho-rate-limit-rate", type=float, default=0.0, help="share of Zoho calls answered 429")
+    p.add_argument("--zoho-error-rate", type=float, default=0.0, help="share of Zoho calls answered 500/503")
+    p.add_argument("--zoho-per-minute", type=int, default=0, help="Zoho calls a minute before 429s (0 = no quota)")
+    p.set_defaults(func=None)
+    args = parser.parse_args()
+
+    if args.func is seed:
+        seed(args)
+        return
+    report = asyncio.run(run_async(args))
+    _print(report)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Local stand-ins for the external services the backend calls, for load tests.
+
+  sgi   SecuGen SGIMatchScore. The backend tries http://127.0.0.1:8080 among
+        its endpoints, so serve this there. Identical templates score 199,
+        anything else 20, after `latency_ms` (the real matcher takes tens of ms
+        per comparison and is called once per enrolled employee).
+
+    cd backend && python -m benchmarks.standins sgi --port 8080 --latency-ms 40
+
+  zoho  Zoho accounts + Inventory: POST /oauth/v2/token, and under /inventory/v1
+        organizations, items (paged), items/{id} (GET/PUT) and
+        inventoryadjustments (POST, which moves stock_on_hand). Items are the
+        ids benchmarks.load seeds. Every call waits `latency_ms`, then fails
+        with 429 for `rate_limit_rate` of calls (or past `per_minute` calls in
+        the current minute, like Zoho's per-org quota) and with 500/503 for
+        `error_rate` of them. GET /_standin/stats returns the counts.
+
+    cd backend && python -m benchmarks.standins zoho --port 8090 --latency-ms 150 --rate-limit-rate 0.05
+    export ZOHO_ACCOUNTS_BASE=http://127.0.0.1:8090
+    export ZOHO_INVENTORY_BASE=http://127.0.0.1:8090/inventory/v1
+    export ZC_CLIENT_ID=x ZC_CLIENT_SECRET=x ZC_REFRESH_TOKEN=x ZC_ORG_ID=standin
+
+benchmarks.load starts these in-process unless told not to.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+def sgi_app(latency_ms: float = 40.0, jitter_ms: float = 10.0) -> FastAPI:
+    app = FastAPI(title="SGI stand-in")
+
+    @app.post("/SGIMatchScore")
+    async def match_score(request: Request):
+        body = await request.json()
+        await asyncio.sleep(max(0.0, latency_ms + random.uniform(-jitter_ms, jitter_ms)) / 1000)
+        same = body.get("Template1") == body.get("Template2")
+        return {"ErrorCode": 0, "Score": 199 if same else 20}
+
+    return app
+
+
+def zoho_app(
+    item_ids: Iterable[str],
+    latency_ms: float = 150.0,
+    jitter_ms: float = 50.0,
+    rate_limit_rate: float = 0.0,
+    error_rate: float = 0.0,
+    per_minute: int = 0,
+    seed: Optional[int] = None,
+) -> FastAPI:
+    app = FastAPI(title="Zoho stand-in")
+    rng = random.Random(seed)
+    stats: Counter = Counter()
+    window = {"minute": 0, "calls": 0}
+    items = {
+        item_id: {
+            "item_id": item_id,
+            "name": f"Load Test Item {n}",
+            "sku": f"LT-SKU-{n:05d}",
+            "stock_on_hand": 100,
+            "available_stock": 100,
+            "custom_fields": [
+                {"label": "Shelf Total", "value": "100"},
+                {"label": "Reserve Stock", "value": "0"},
+            ],
+        }
+        for n, item_id in enumerate(item_ids)
+    }
+    adjustments = []
+
+    @app.middleware("http")
+    async def faults(request: Request, call_next):
+        if request.url.path.startswith("/_standin"):
+            return await call_next(request)
+        stats["requests"] += 1
+        await asyncio.sleep(max(0.0, latency_ms + rng.uniform(-jitter_ms, jitter_ms)) / 1000)
+        minute = int(time.time() // 60)
+        if window["minute"] != minute:
+            window["minute"], window["calls"] = minute, 0
+        window["calls"] += 1
+        if rng.random() < rate_limit_rate or (per_minute and window["calls"] > per_minute):
+            stats["429"] += 1
+            return JSONResponse(
+                {"code": 44, "message": "You have made too many requests continuously."},
+                status_code=429, headers={"Retry-After": str(60 - int(time.time()) % 60)},
+            )
+        if rng.random() < error_rate:
+            status = rng.choice([500, 503])
+            stats[str(status)] += 1
+            return JSONResponse({"code": -1, "message": "Internal error (injected)"}, status_code=status)
+        if not request.url.path.startswith("/oauth") and not request.headers.get("authorization", "").startswith("Zoho-oauthtoken "):
+            stats["401"] += 1
+            return JSONResponse({"code": 57, "message": "You are not authorized to perform this operation"}, status_code=401)
+        stats["ok"] += 1
+        return await call_next(request)
+
+    @app.post("/oauth/v2/token")
+    async def token():
+        stats["tokens"] += 1
+        return {"access_token": f"standin-{stats['tokens']}", "expires_in": 3600, "token_type": "Bearer"}
+
+    @app.get("/inventory/v1/organizations")
+    async def organizations():
+        return {"code": 0, "message": "success", "organizations": [{"organization_id": "standin", "name": "Stand-in"}]}
+
+    @app.get("/inventory/v1/items")
+    async def list_items(page: int = 1, per_page: int = 200):
+        ordered = list(items.values())
+        chunk = ordered[(page - 1) * per_page: page * per_page]
+        return {
+            "code": 0,
+            "message": "success",
+            "items": chunk,
+            "page_context": {"page": page, "per_page": per_page, "has_more_page": page * per_page < len(ordered)},
+        }
+
+    def _missing():
+        return JSONResponse({"code": 1002, "message": "Item does not exist."}, status_code=404)
+
+    @app.get("/inventory/v1/items/{item_id}")
+    async def get_item(item_id: str):
+        if item_id not in items:
+            return _missing()
+        return {"code": 0, "message": "success", "item": items[item_id]}
+
+    @app.put("/inventory/v1/items/{item_id}")
+    async def update_item(item_id: str, request: Request):
+        if item_id not in items:
+            return _missing()
+        body = await request.json()
+        fields = {f["label"]: f for f in items[item_id]["custom_fields"]}
+        for field in body.get("custom_fields", []):
+            fields.setdefault(field["label"], {"label": field["label"]})["value"] = field.get("value")
+        items[item_id]["custom_fields"] = list(fields.values())
+        return {"code": 0, "message": "The item details have been updated.", "item": items[item_id]}
+
+    @app.post("/inventory/v1/inventoryadjustments")
+    async def adjust(request: Request):
+        body = await request.json()
+        lines = body.get("line_items") or []
+        if not lines:
+            return JSONResponse({"code": 4, "message": "line_items is required"}, status_code=400)
+        unknown = [line.get("item_id") for line in lines if line.get("item_id") not in items]
+        if unknown:
+            return JSONResponse({"code": 1002, "message": f"Item does not exist: {unknown[0]}"}, status_code=400)
+        for line in lines:
+            item = items[line["item_id"]]
+            item["stock_on_hand"] += line.get("quantity_adjusted", 0)
+            item["available_stock"] = item["stock_on_hand"]
+        adjustments.append(body)
+        return JSONResponse(
+            {"code": 0, "message": "Inventory Adjustment has been added.",
+             "inventoryadjustment": {"inventoryadjustment_id": str(len(adjustments)), **body}},
+            status_code=201,
+        )
+
+    @app.get("/_standin/stats")
+    async def standin_stats():
+        return {**stats, "adjustments": len(adjustments)}
+
+    return app
+
+
+def serve_in_thread(app: FastAPI, host: str, port: int):
+    """Run `app` with uvicorn on a daemon thread; returns the server (set .should_exit to stop)."""
+    import uvicorn
+
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", access_log=False))
+    threading.Thread(target=server.run, name=f"standin:{port}", daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"stand-in on {host}:{port} didn't start (port in use?)")
+        time.sleep(0.05)
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("service", choices=["sgi", "zoho"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="default 8080 (sgi) / 8090 (zoho)")
+    parser.add_argument("--latency-ms", type=float, default=None, help="default 40 (sgi) / 150 (zoho)")
+    parser.add_argument("--items", type=int, default=500, help="zoho: items (as seeded by benchmarks.load)")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="zoho: share of calls answered 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="zoho: share of calls answered 500/503")
+    parser.add_argument("--per-minute", type=int, default=0, help="zoho: 429 past this many calls a minute (0 = no quota)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.service == "sgi":
+        app, port = sgi_app(40.0 if args.latency_ms is None else args.latency_ms), args.port or 8080
+    else:
+        from benchmarks.load import _item_id
+        app = zoho_app(
+            [_item_id(i) for i in range(args.items)],
+            latency_ms=150.0 if args.latency_ms is None else args.latency_ms,
+            rate_limit_rate=args.rate_limit_rate, error_rate=args.error_rate,
+            per_minute=args.per_minute, seed=args.seed,
+        )
+        port = args.port or 8090
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,13 +3,18 @@ from contextlib import contextmanager
 from typing import Generator, Optional, Dict
 
 from fastapi import Depends, HTTPException, UploadFile
+from core import dbregistry
 from core.db import (
     get_psycopg_connection,
-    get_inventory_log_connection,
     get_sqlalchemy_engine,
 )
+from core.replicas import read_connection
 from core.security import get_current_user as _get_current_user
+from core.security import require_admin  # re-export
+from core.uow import UnitOfWork
 from core.pagination import get_page_params, PageParams  # re-export
+from core.etag import etag_for  # re-export
+from core.compression import NoCompression  # re-export
 
 # If you adopted the inline Zoho client (recommended)
 try:
@@ -21,19 +26,21 @@ except Exception:
     _get_zoho_token = None
     _zoho_auth_header = None
 # Auth
-def get_current_user():
-    """Auth dependency used by protected routes."""
-    return _get_current_user()
+# Auth dependency used by protected routes. Re-exported as-is (not wrapped) so
+# FastAPI sees the Authorization header parameter and caches it per request.
+get_current_user = _get_current_user
 # Database connections
 @contextmanager
-def pg_conn():
+def pg_conn(uow: Optional[UnitOfWork] = None):
     """
     Context manager for your main psycopg2 DB (used by attendance/enrollment).
+    The connection is borrowed from the attendance pool and returned on exit,
+    or, when a unit of work is given, is the request's shared connection.
     Usage:
         with pg_conn() as conn:
             with conn.cursor() as cur: ...
     """
-    conn = get_psycopg_connection()
+    conn = uow.connection("attendance") if uow else get_psycopg_connection()
     try:
         yield conn
     finally:
@@ -41,17 +48,56 @@ def pg_conn():
 
 
 @contextmanager
-def inventory_conn():
+def pg_read_conn(uow: Optional[UnitOfWork] = None):
     """
-    Context manager for the inventory_logs DB (metadata + logs).
+    pg_conn() for read-only queries: served by the attendance read replica when
+    one is configured and the caller hasn't just written (see core.replicas).
+    Inside a unit of work it is the request's connection, like pg_conn().
     """
-    conn = get_inventory_log_connection()
+    conn = uow.connection("attendance") if uow else read_connection("attendance")
     try:
         yield conn
     finally:
         conn.close()
 
 
+@contextmanager
+def inventory_conn(uow: Optional[UnitOfWork] = None):
+    """
+    Context manager for the inventory_logs DB (metadata + logs), pooled like pg_conn().
+    """
+    conn = uow.connection("inventory") if uow else dbregistry.connection("inventory")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+# Unit of work
+def get_uow() -> Generator[UnitOfWork, None, None]:
+    """
+    Request-scoped unit of work: one connection per database, one transaction,
+    committed when the route returns and rolled back if it raises.
+    Pass it into the service/repos: `_svc(uow)`.
+    """
+    uow = UnitOfWork()
+    try:
+        yield uow
+    except Exception:
+        uow.rollback()
+        raise
+    else:
+        uow.commit()
+    finally:
+        uow.close()
+
+
+# scope="function" runs the commit before the response is sent, so a failed
+# commit surfaces as a 500 instead of a 200 for work that was never saved.
+# Routes: uow=UnitOfWorkDep
+UnitOfWorkDep = Depends(get_uow, scope="function")
+
+
 def labels_engine():
     """
     SQLAlchemy Engine for labels DB (if/when needed).
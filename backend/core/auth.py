@@ -3,6 +3,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from core.security import verify_password, create_access_token, get_current_user, parse_allowed_tabs
 from core.db import get_psycopg_connection
+from core import executors
 
 router = APIRouter()
 
@@ -11,6 +12,7 @@ class LoginIn(BaseModel):
     password: str
 
 @router.post("/login")
+@executors.offload("cpu")  # bcrypt
 def login(body: LoginIn):
     conn = get_psycopg_connection()
     try:
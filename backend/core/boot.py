@@ -0,0 +1,145 @@
+"""
+Boot-phase timing and import-time report.
+
+app.py wraps each startup step (settings, router imports, static mounts,
+lifespan DB checks/migrations) in `boot.phase(...)`. The lifespan prints the
+report once startup is done, writes it to BOOT_REPORT_PATH if set, and serves
+it at /api/debug/boot, so slow restarts can be traced to a phase.
+
+For import-level detail (which module pulled in pandas, sqlalchemy, ...):
+
+    python -m core.boot                  # top 25 imports under `import app`
+    python -m core.boot --max-ms 1500    # exit 1 if importing app takes longer
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+# Process start as far as we can tell (this module is imported first by app.py)
+T0 = time.perf_counter()
+
+_phases: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_ready_at: Optional[float] = None
+
+
+def _record(name: str, started: float, ok: bool = True) -> None:
+    with _lock:
+        _phases.append({
+            "phase": name,
+            "start_ms": round((started - T0) * 1000, 1),
+            "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+            "ok": ok,
+        })
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a startup step. Safe to use from several threads at once."""
+    started = time.perf_counter()
+    ok = True
+    try:
+        yield
+    except BaseException:
+        ok = False
+        raise
+    finally:
+        _record(name, started, ok)
+
+
+def timed(name: str, fn, *args, **kwargs):
+    """Call fn(*args, **kwargs) inside `phase(name)` (handy for run_in_threadpool)."""
+    with phase(name):
+        return fn(*args, **kwargs)
+
+
+def mark_ready() -> None:
+    global _ready_at
+    _ready_at = time.perf_counter()
+
+
+def report() -> Dict[str, Any]:
+    with _lock:
+        phases = sorted(_phases, key=lambda p: p["start_ms"])
+    return {
+        "ready_ms": round((_ready_at - T0) * 1000, 1) if _ready_at else None,
+        "phases": phases,
+        "python": sys.version.split()[0],
+        "pid": os.getpid(),
+    }
+
+
+def print_report() -> None:
+    data = report()
+    print(f"[boot] ready in {data['ready_ms']} ms")
+    for p in data["phases"]:
+        flag = "" if p["ok"] else "  (failed)"
+        print(f"[boot]   {p['start_ms']:>8.1f} +{p['duration_ms']:>8.1f} ms  {p['phase']}{flag}")
+
+
+def write_report(path: Optional[str]) -> None:
+    if not path:
+        return
+    try:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report(), f, indent=2)
+    except OSError as e:
+        print(f"[boot] could not write boot report to {path}: {e}")
+
+
+# --- python -X importtime ------------------------------------------------------------
+def import_times(target: str = "app") -> List[Tuple[str, int, int]]:
+    """(module, self_us, cumulative_us) for every module imported by `import target`."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [os.getcwd(), env.get("PYTHONPATH")]))
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True, env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"import {target} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, module = line[len("import time:"):].split("|")
+        rows.append((module.strip(), int(self_us), int(cum_us)))
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Import-time report for the API")
+    parser.add_argument("--target", default="app", help="module to import (default: app)")
+    parser.add_argument("--top", type=int, default=25, help="rows to show")
+    parser.add_argument("--json", help="also write the full report to this file")
+    parser.add_argument("--max-ms", type=float, help="fail if importing target takes longer")
+    args = parser.parse_args(argv)
+
+    rows = import_times(args.target)
+    total_ms = next((cum for mod, _, cum in rows if mod == args.target), 0) / 1000
+    print(f"import {args.target}: {total_ms:.0f} ms ({len(rows)} modules)")
+    print(f"{'cumulative ms':>14} {'self ms':>9}  module")
+    for mod, self_us, cum_us in sorted(rows, key=lambda r: r[2], reverse=True)[:args.top]:
+        print(f"{cum_us / 1000:>14.1f} {self_us / 1000:>9.1f}  {mod}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"target": args.target, "total_ms": total_ms,
+                       "modules": [{"module": m, "self_us": s, "cumulative_us": c} for m, s, c in rows]},
+                      f, indent=2)
+    if args.max_ms is not None and total_ms > args.max_ms:
+        print(f"FAIL: import {args.target} took {total_ms:.0f} ms (limit {args.max_ms:.0f} ms)")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,141 @@
+"""
+Circuit breaker for a dependency that can go away (a database, an external API).
+
+    closed     calls go through; `failure_threshold` failures in a row open it,
+               and so does a share of at least `failure_rate` failures among the
+               last `window` calls (once `min_calls` have been seen)
+    open       calls are refused (the caller uses a fallback or fails fast)
+               until `reset_timeout` seconds have passed
+    half_open  one caller gets a trial call; its success closes the breaker,
+               its failure opens it again for another `reset_timeout`
+
+    breaker = CircuitBreaker("inventory_db", failure_threshold=2, reset_timeout=30)
+    if breaker.allow():
+        try:
+            result = call()
+        except ConnectionError as e:
+            breaker.record_failure(e)
+            ...
+        else:
+            breaker.record_success()
+
+Every breaker's state is exported as rm365_circuit_state (0 closed,
+1 half-open, 2 open) and its transitions as rm365_circuit_transitions_total.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from core import metrics
+
+logger = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUE = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitBreaker:
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 3,
+        reset_timeout: float = 30.0,
+        failure_rate: Optional[float] = None,
+        window: int = 20,
+        min_calls: int = 10,
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failure_rate = failure_rate
+        self.min_calls = max(1, min_calls)
+        self._outcomes: Deque[bool] = deque(maxlen=max(window, self.min_calls))  # True = failed
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_at: Optional[float] = None  # when the half-open trial was handed out
+        self.last_error: Optional[str] = None
+        metrics.CIRCUIT_STATE.set(0, breaker=name)
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def _set(self, state: str) -> None:
+        if state == self._state:
+            return
+        logger.warning(f"circuit '{self.name}' {self._state} -> {state}" + (f" ({self.last_error})" if state == OPEN else ""))
+        self._state = state
+        metrics.CIRCUIT_STATE.set(_STATE_VALUE[state], breaker=self.name)
+        metrics.CIRCUIT_TRANSITIONS.inc(breaker=self.name, state=state)
+
+    def allow(self) -> bool:
+        """Whether a call may go out now. In half_open, True for the one caller holding the trial."""
+        with self._lock:
+            now = time.monotonic()
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if now - self._opened_at < self.reset_timeout:
+                    return False
+                self._set(HALF_OPEN)
+                self._trial_at = now
+                return True
+            # half_open: the trial is taken; hand out another if it never reported back
+            if self._trial_at is not None and now - self._trial_at < self.reset_timeout:
+                return False
+            self._trial_at = now
+            return True
+
+    def _rate(self) -> Optional[float]:
+        if len(self._outcomes) < self.min_calls:
+            return None
+        return sum(self._outcomes) / len(self._outcomes)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._trial_at = None
+            if self._state == CLOSED:
+                self._outcomes.append(False)
+            else:
+                self._outcomes.clear()  # recovered: judge it on calls from now on
+            self._set(CLOSED)
+
+    def record_failure(self, error: Any = None) -> None:
+        with self._lock:
+            if error is not None:
+                self.last_error = str(error) or type(error).__name__
+            if self._state == OPEN:  # a call that started before it opened
+                return
+            self._failures += 1
+            self._outcomes.append(True)
+            rate = self._rate() if self.failure_rate is not None else None
+            if (
+                self._state == HALF_OPEN
+                or self._failures >= self.failure_threshold
+                or (rate is not None and rate >= self.failure_rate)
+            ):
+                self._opened_at = time.monotonic()
+                self._trial_at = None
+                self._set(OPEN)
+
+    def retry_in(self) -> float:
+        """Seconds until an open breaker lets a trial call through (0 if not open)."""
+        if self._state != OPEN:
+            return 0.0
+        return max(0.0, self.reset_timeout - (time.monotonic() - self._opened_at))
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "state": self._state,
+            "consecutive_failures": self._failures,
+            "failure_rate": None if self._rate() is None else round(self._rate(), 3),
+            "retry_in": round(self.retry_in(), 1),
+            "last_error": self.last_error,
+        }
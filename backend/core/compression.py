@@ -0,0 +1,259 @@
+"""
+Negotiated response compression (zstd / brotli / gzip).
+
+A pure ASGI middleware, so it also works for streamed responses: the body
+is compressed chunk by chunk and each chunk is flushed, instead of being
+buffered whole. Responses smaller than COMPRESSION_MIN_SIZE, or that
+already carry a Content-Encoding, or whose media type is already
+compressed (images, zip, pdf, ...) go out untouched.
+
+The encoding is picked from Accept-Encoding (q-values honoured), preferring
+zstd, then br, then gzip. brotli and zstandard are optional dependencies;
+without them only gzip is offered.
+
+Routes that return their own compressed downloads can opt out:
+
+    @router.get("/export", dependencies=[NoCompression])
+"""
+from __future__ import annotations
+
+import zlib
+from typing import Dict, List, Optional
+
+from fastapi import Depends, Request
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from core import metrics
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional dependency
+    zstandard = None
+
+# scope key set by the NoCompression dependency
+_OPT_OUT = "rm365.no_compression"
+
+# Chunks this large are compressed on a worker thread so a multi-megabyte
+# table doesn't stall the event loop.
+_THREAD_THRESHOLD = 256 * 1024
+
+_SKIP_TYPES = (
+    "image/", "video/", "audio/", "font/woff",
+    "application/zip", "application/gzip", "application/x-gzip",
+    "application/pdf", "application/zstd", "application/x-7z-compressed",
+    "application/vnd.openxmlformats",
+)
+
+
+def available_encodings() -> List[str]:
+    """Encodings this process can produce, in order of preference."""
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def negotiate(accept_encoding: str, offered: List[str]) -> Optional[str]:
+    """Pick the preferred offered encoding the client accepts (q > 0), or None."""
+    if not accept_encoding:
+        return None
+    q: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        token = token.strip().lower()
+        if not token:
+            continue
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        q[token] = weight
+    best, best_q = None, 0.0
+    for encoding in offered:
+        weight = q.get(encoding, q.get("*", 0.0))
+        if weight > best_q:
+            best, best_q = encoding, weight
+    return best
+
+
+class _Compressor:
+    """Incremental compressor; compress() returns bytes that can be flushed to the client."""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int, zstd_level: int):
+        self.encoding = encoding
+        if encoding == "gzip":
+            self._obj = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+        elif encoding == "br":
+            self._obj = brotli.Compressor(quality=brotli_quality)
+        elif encoding == "zstd":
+            self._obj = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+        else:
+            raise ValueError(f"unsupported encoding {encoding}")
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "gzip":
+            out = self._obj.compress(data)
+            return out + self._obj.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+        if self.encoding == "br":
+            out = self._obj.process(data)
+            return out + (self._obj.finish() if final else self._obj.flush())
+        out = self._obj.compress(data)
+        flag = zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK
+        return out + self._obj.flush(flag)
+
+
+class CompressionMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        min_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        zstd_level: int = 3,
+        encodings: Optional[List[str]] = None,
+    ):
+        self.app = app
+        self.min_size = min_size
+        self.levels = (gzip_level, brotli_quality, zstd_level)
+        offered = available_encodings()
+        self.encodings = [e for e in offered if e in encodings] if encodings else offered
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope.get("method") == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(self, scope, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, mw: CompressionMiddleware, scope: Scope, encoding: str, send: Send):
+        self.mw = mw
+        self.scope = scope
+        self.encoding = encoding
+        self._send = send
+        self.start: Optional[Message] = None
+        self.buffer: List[bytes] = []
+        self.buffered = 0
+        self.passthrough = False
+        self.compressor: Optional[_Compressor] = None
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    def _should_compress(self, message: Message) -> bool:
+        if self.scope.get(_OPT_OUT):
+            return False
+        status = message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        headers = Headers(raw=message["headers"])
+        if "content-encoding" in headers:
+            return False
+        media_type = headers.get("content-type", "").lower()
+        if any(media_type.startswith(t) for t in _SKIP_TYPES):
+            return False
+        length = headers.get("content-length")
+        if length is not None and length.isdigit() and int(length) < self.mw.min_size:
+            return False
+        return True
+
+    async def send(self, message: Message) -> None:
+        kind = message["type"]
+        if kind == "http.response.start":
+            self.start = message
+            self.passthrough = not self._should_compress(message)
+            if self.passthrough:
+                await self._send(message)
+            return
+        if kind != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.compressor is not None:
+            await self._emit(body, final=not more)
+            return
+
+        self.buffer.append(body)
+        self.buffered += len(body)
+        if self.buffered < self.mw.min_size:
+            if more:
+                return  # keep waiting until we know whether it's worth it
+            await self._flush_uncompressed()
+            return
+
+        # worth compressing: rewrite headers, then send what we have so far
+        gzip_level, brotli_quality, zstd_level = self.mw.levels
+        self.compressor = _Compressor(self.encoding, gzip_level, brotli_quality, zstd_level)
+        data, self.buffer = b"".join(self.buffer), []
+        headers = MutableHeaders(raw=self.start["headers"])
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if "etag" in headers and not headers["etag"].startswith("W/"):
+            # a strong ETag no longer matches the transformed bytes
+            headers["ETag"] = "W/" + headers["etag"]
+        if more:
+            del headers["Content-Length"]
+            await self._send(self.start)
+            await self._emit(data, final=False)
+        else:
+            compressed = await self._compress(data, final=True)
+            headers["Content-Length"] = str(len(compressed))
+            await self._send(self.start)
+            await self._send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+    async def _flush_uncompressed(self) -> None:
+        await self._send(self.start)
+        await self._send({"type": "http.response.body", "body": b"".join(self.buffer), "more_body": False})
+        self.buffer = []
+
+    async def _compress(self, data: bytes, final: bool) -> bytes:
+        if len(data) >= _THREAD_THRESHOLD:
+            out = await run_in_threadpool(self.compressor.compress, data, final)
+        else:
+            out = self.compressor.compress(data, final)
+        self.bytes_in += len(data)
+        self.bytes_out += len(out)
+        if final:
+            _record(self.encoding, self.bytes_in, self.bytes_out)
+        return out
+
+    async def _emit(self, data: bytes, final: bool) -> None:
+        out = await self._compress(data, final)
+        if out or final:
+            await self._send({"type": "http.response.body", "body": out, "more_body": not final})
+
+
+def _record(encoding: str, bytes_in: int, bytes_out: int) -> None:
+    metrics.COMPRESSION_RESPONSES.inc(encoding=encoding)
+    metrics.COMPRESSION_BYTES_IN.inc(bytes_in, encoding=encoding)
+    metrics.COMPRESSION_BYTES_OUT.inc(bytes_out, encoding=encoding)
+    metrics.COMPRESSION_BYTES_SAVED.inc(max(0, bytes_in - bytes_out), encoding=encoding)
+
+
+def _opt_out(request: Request) -> None:
+    request.scope[_OPT_OUT] = True
+
+
+# Route dependency: `dependencies=[NoCompression]`
+NoCompression = Depends(_opt_out)
+
@@ -1,6 +1,6 @@
 from pydantic_settings import BaseSettings
 from pydantic import AnyUrl
-from typing import List, Optional
+from typing import Dict, List, Optional
 from pathlib import Path
 
 """
@@ -19,6 +19,11 @@ class Settings(BaseSettings):
     AUTH_SECRET_KEY: str = ""  # Set this via environment variable
     AUTH_ALGORITHM: str = "HS256"
     AUTH_ACCESS_TTL_DAYS: int = 7
+    AUTH_USER_CACHE_TTL: float = 30.0          # max seconds a cached role/tabs lookup is served (0 disables)
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 1024
+
+    # Cross-worker signals (Postgres LISTEN/NOTIFY, see core.notify)
+    NOTIFY_ENABLED: bool = True
 
     # DB: attendance
     ATTENDANCE_DB_HOST: str | None = None
@@ -37,6 +42,121 @@ class Settings(BaseSettings):
     INVENTORY_LOGS_USER: str | None = None
     INVENTORY_LOGS_PASSWORD: str | None = None
 
+    # Read replicas (core.replicas): report/listing reads go to the replica when set,
+    # writes always go to the primary. libpq DSNs, e.g. postgresql://user:pw@host:5432/db
+    ATTENDANCE_DB_REPLICA_DSN: str | None = None
+    INVENTORY_LOGS_REPLICA_DSN: str | None = None
+    PRODUCTS_DB_REPLICA_DSN: str | None = None
+    REPLICA_MAX_LAG: float = 10.0               # seconds behind the primary before reads fall back to it
+    REPLICA_LAG_CHECK_INTERVAL: float = 5.0
+    REPLICA_STICKY_SECONDS: float = 15.0        # reads stay on the primary this long after a session writes
+
+    # DB connection pools (one per database; see core.db.ConnectionPool)
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    DB_POOL_MAX_OVERFLOW: int = 5
+    DB_POOL_TIMEOUT: float = 10.0               # max seconds to wait for a free connection
+    DB_POOL_IDLE_TIMEOUT: float = 300.0         # close idle connections above min size after this
+    DB_POOL_MAX_LIFETIME: float = 1800.0        # recycle connections older than this
+    DB_POOL_HEALTH_CHECK_INTERVAL: float = 30.0 # ping on checkout if idle longer than this
+    DB_CONNECT_TIMEOUT: int = 10
+
+    # Database fallback (core.dbregistry): the inventory DB falls back to the main DB while
+    # unreachable; a circuit breaker opens after this many failed connects in a row and a
+    # background probe retries it every DB_BREAKER_RESET seconds
+    DB_BREAKER_FAILURES: int = 2
+    DB_BREAKER_RESET: float = 30.0
+
+    # Async (psycopg 3) pools for read-heavy async routes; see core.db_async
+    ASYNC_DB_ENABLED: bool = True
+    ASYNC_DB_POOL_MAX_SIZE: int = 10
+
+    # Server-Timing response header (db / external / render breakdown; see core.timing)
+    SERVER_TIMING_ENABLED: bool = True
+
+    # Named thread pools per kind of blocking work (core.executors); sync routes that don't
+    # declare one run on anyio's default pool. Workers 0 = one per CPU; past the queue, 503
+    EXECUTOR_WORKERS: Dict[str, int] = {"hardware": 2, "external": 8, "cpu": 0, "db": 16}
+    EXECUTOR_QUEUE: Dict[str, int] = {"hardware": 4, "external": 32, "cpu": 64, "db": 256}
+
+    # Request deadlines (core.deadline): time budget per request, spent by DB statements
+    # (statement_timeout), outbound calls and retries; GET/HEAD work is cancelled on disconnect
+    REQUEST_DEADLINE: float = 30.0              # seconds; 0 = no deadline
+    REQUEST_DEADLINES: Dict[str, float] = {     # path prefix -> seconds (longest prefix wins)
+        "/api/v1/attendance/clock-by-fingerprint": 20.0,
+        "/api/v1/sales-imports/upload": 300.0,
+        "/api/v1/inventory/adjustments/sync": 300.0,
+        "/api/v1/inventory/management": 120.0,
+        "/api/v1/labels": 120.0,
+    }
+
+    # Outbound dependency guards (core.outbound): per target (zoho, zoho_accounts, sgi) a circuit
+    # breaker that fails calls fast while the service is down, and a cap on in-flight calls
+    OUTBOUND_BREAKER_FAILURES: int = 5          # consecutive failures that open the circuit
+    OUTBOUND_BREAKER_FAILURE_RATE: float = 0.5  # ... or this share of the last WINDOW calls
+    OUTBOUND_BREAKER_WINDOW: int = 20
+    OUTBOUND_BREAKER_MIN_CALLS: int = 10
+    OUTBOUND_BREAKER_RESET: float = 30.0        # seconds open before a trial call
+    OUTBOUND_MAX_CONCURRENT: Dict[str, int] = {"zoho": 8, "zoho_accounts": 2, "sgi": 6}
+    OUTBOUND_MAX_CONCURRENT_DEFAULT: int = 8
+    OUTBOUND_BULKHEAD_WAIT: float = 1.0         # seconds to wait for a free slot before failing fast
+
+    # Prometheus scrape endpoint (/api/metrics): scrapers send "Authorization: Bearer <token>";
+    # without a token configured only admins can read it
+    METRICS_TOKEN: str | None = None
+
+    # Slow-query log and per-request query counts (core.querylog)
+    SLOW_QUERY_MS: float = 500.0                # log statements slower than this (0 = off)
+    SLOW_QUERY_EXPLAIN_SAMPLE: float = 0.0      # share of slow SELECTs re-run under EXPLAIN (ANALYZE, BUFFERS)
+    QUERY_COUNT_HEADER: bool = True             # X-DB-Queries / X-DB-Connections response headers
+
+    # Response compression (core.compression); brotli/zstd only if those packages are installed
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 1024            # bytes; smaller bodies are sent as-is
+    COMPRESSION_ENCODINGS: List[str] = ["zstd", "br", "gzip"]
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4         # 0-11; above ~5 costs too much CPU per request
+    COMPRESSION_ZSTD_LEVEL: int = 3
+
+    # Static frontend (core.static): build output served when present, else ../frontend
+    STATIC_BUILD_DIR: str | None = None         # default: frontend/dist
+    STATIC_MEMORY_CACHE_MAX_FILE_SIZE: int = 64 * 1024   # files up to this size are served from memory
+    STATIC_MEMORY_CACHE_MAX_BYTES: int = 8 * 1024 * 1024
+
+    # Production launcher (scripts/start_server.py --prod, gunicorn.conf.py; see core.workers).
+    # Every worker has its own DB pools, so total connections scale with the worker count.
+    WEB_CONCURRENCY: int = 0                    # worker processes; 0 = size from CPU quota and memory limit
+    WEB_MAX_WORKERS: int = 4                    # cap for the automatic size
+    WEB_WORKER_MEMORY_MB: int = 256             # expected resident size of one worker
+    WEB_PRELOAD: bool = True                    # import the app once in the master, then fork
+    WEB_MAX_REQUESTS: int = 5000                # recycle a worker after this many requests (0 = never)
+    WEB_MAX_REQUESTS_JITTER: int = 500          # so workers don't all recycle at once
+    WEB_GRACEFUL_TIMEOUT: int = 30              # seconds a recycled/stopping worker gets to finish requests
+    WEB_TIMEOUT: int = 120                      # kill a worker that stops answering the master for this long
+
+    # Background jobs (core.jobs)
+    JOBS_MAX_WORKERS: int = 2                   # jobs running at once per worker process
+    JOBS_MAX_QUEUED: int = 20                   # queued + running per process before submits get 503
+    JOBS_STALE_AFTER: int = 600                 # seconds without a heartbeat before a running job is marked failed
+    JOBS_QUEUED_TIMEOUT: int = 21600            # seconds a job may wait to start before it is marked failed
+    JOBS_RETENTION_HOURS: int = 72              # finished jobs (and their results) are kept this long
+
+    # Periodic tasks (core.scheduler); one leader process across all replicas runs them.
+    # Schedules are cron specs or "@every 5m"; an empty string disables that task.
+    SCHEDULER_ENABLED: bool = True
+    SCHEDULER_TIMEZONE: str = "Europe/London"
+    SCHEDULER_LEADER_CHECK: float = 15.0        # seconds between leader-lock checks
+    SCHEDULER_SHUTDOWN_GRACE: float = 10.0      # seconds to let running tasks finish on shutdown
+    SCHEDULE_JOBS_SWEEP: str = "*/5 * * * *"
+    SCHEDULE_ZOHO_CONNECTION_CHECK: str = "*/2 * * * *"
+    SCHEDULE_ADJUSTMENTS_SYNC: str = "*/15 * * * *"
+
+    # Boot-phase report (core.boot): printed at startup, also written here if set
+    BOOT_REPORT_PATH: str | None = None
+
+    # Schema migrations (core.migrations) applied once at startup
+    MIGRATIONS_ON_STARTUP: bool = True
+
     # Zoho credentials (token manager uses these)
     ZC_CLIENT_ID: str | None = None
     ZC_CLIENT_SECRET: str | None = None
@@ -46,7 +166,9 @@ class Settings(BaseSettings):
     ZC_APP_LINK: str | None = None
     ZC_LOG_FORM: str | None = None
     ZC_ORG_ID: str | None = None
-    ZOHO_ACCOUNTS_BASE: str | None = None
+    # Zoho hosts (EU data centre); point both at benchmarks.standins to load-test against a local stand-in
+    ZOHO_ACCOUNTS_BASE: str = "https://accounts.zoho.eu"
+    ZOHO_INVENTORY_BASE: str = "https://www.zohoapis.eu/inventory/v1"
     
     # Additional CORS setting
     ALLOW_ORIGIN_REGEX: str | None = None
@@ -1,95 +1,542 @@
 import os
+import time
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Optional
+
 import psycopg2
-from sqlalchemy import create_engine
+import psycopg2.extensions
 from contextlib import contextmanager
 from pathlib import Path
 
-def get_psycopg_connection():
-    """Get a raw psycopg2 connection for attendance/enrollment modules"""
-    # Use individual environment variables as set in Railway
-    host = os.getenv("ATTENDANCE_DB_HOST")
-    port = os.getenv("ATTENDANCE_DB_PORT", "5432")
-    database = os.getenv("ATTENDANCE_DB_NAME", "railway")
-    user = os.getenv("ATTENDANCE_DB_USER", "postgres")
-    password = os.getenv("ATTENDANCE_DB_PASSWORD")
-    
+from core import querylog, timing
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    """Raised when no connection could be checked out within the pool timeout."""
+
+
+class _PoolEntry:
+    __slots__ = ("conn", "created_at", "last_used")
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Thin proxy around a borrowed psycopg2 connection.
+    Everything is delegated to the real connection except close(),
+    which hands the connection back to its pool instead of closing the socket.
+    Existing code that does `conn = get_psycopg_connection(); ...; conn.close()`
+    therefore keeps working unchanged.
+    """
+    __slots__ = ("_pool", "_entry", "_released")
+
+    def __init__(self, pool: "ConnectionPool", entry: _PoolEntry):
+        self._pool = pool
+        self._entry = entry
+        self._released = False
+
+    @property
+    def raw(self):
+        return self._entry.conn
+
+    @property
+    def closed(self):
+        return 1 if self._released else self._entry.conn.closed
+
+    def close(self) -> None:
+        if not self._released:
+            self._released = True
+            self._pool._return(self._entry)
+
+    def cursor(self, *args, **kwargs):
+        if self._released:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        cur = self._entry.conn.cursor(*args, **kwargs)
+        # Timing, per-request counts and the slow-query log (core.querylog)
+        return querylog.QueryCursor(cur, self._pool.name)
+
+    def __getattr__(self, name):
+        if self._released:
+            raise psycopg2.InterfaceError("connection already returned to the pool")
+        return getattr(self._entry.conn, name)
+
+    # `with conn:` keeps psycopg2 semantics (commit/rollback, not close)
+    def __enter__(self):
+        self._entry.conn.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._entry.conn.__exit__(exc_type, exc, tb)
+
+    def __del__(self):
+        # Safety net for code paths that forget to close(); never raise from GC.
+        try:
+            if not self._released:
+                self.close()
+        except Exception:
+            pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool.
+
+    - keeps up to `max_size` connections open, plus `max_overflow` temporary ones
+      that are closed again when returned while nobody is waiting
+    - closes idle connections after `idle_timeout` (never going below `min_size`)
+    - recycles connections older than `max_lifetime`
+    - pings connections that sat idle longer than `health_check_interval` on checkout
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connect_kwargs: Dict[str, Any],
+        *,
+        min_size: int = 1,
+        max_size: int = 10,
+        max_overflow: int = 5,
+        timeout: float = 10.0,
+        idle_timeout: float = 300.0,
+        max_lifetime: float = 1800.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.name = name
+        self._connect_kwargs = connect_kwargs
+        self.min_size = min_size
+        self.max_size = max_size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_interval = health_check_interval
+
+        self._idle: deque[_PoolEntry] = deque()
+        self._cond = threading.Condition()
+        self._size = 0        # open connections (idle + in use)
+        self._in_use = 0
+        self._waiting = 0
+        self._closed = False
+
+        # counters
+        self._checkouts = 0
+        self._created = 0
+        self._discarded = 0
+        self._timeouts = 0
+        self._overflow_checkouts = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    # -- internals -------------------------------------------------------------
+    def _connect(self) -> _PoolEntry:
+        conn = psycopg2.connect(**self._connect_kwargs)
+        return _PoolEntry(conn)
+
+    def _expired(self, entry: _PoolEntry, now: float) -> bool:
+        if entry.conn.closed:
+            return True
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            return True
+        return False
+
+    def _discard(self, entry: _PoolEntry) -> None:
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+
+    def _healthy(self, entry: _PoolEntry, now: float) -> bool:
+        if entry.conn.closed:
+            return False
+        if now - entry.last_used < self.health_check_interval:
+            return True
+        try:
+            with entry.conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            entry.conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def _evict_idle_locked(self, now: float) -> list:
+        """Pop idle connections past idle_timeout/max_lifetime; caller closes them."""
+        victims = []
+        keep = deque()
+        while self._idle:
+            entry = self._idle.popleft()
+            too_idle = self.idle_timeout and now - entry.last_used > self.idle_timeout
+            if self._expired(entry, now) or (too_idle and self._size - len(victims) > self.min_size):
+                victims.append(entry)
+            else:
+                keep.append(entry)
+        self._idle = keep
+        self._size -= len(victims)
+        return victims
+
+    # -- public API ------------------------------------------------------------
+    def getconn(self) -> PooledConnection:
+        t0 = time.monotonic()
+        deadline = t0 + self.timeout
+        while True:
+            entry = None
+            create = False
+            with self._cond:
+                if self._closed:
+                    raise psycopg2.InterfaceError(f"pool '{self.name}' is closed")
+                victims = self._evict_idle_locked(time.monotonic())
+                while True:
+                    if self._idle:
+                        entry = self._idle.pop()  # LIFO keeps hot connections hot
+                        break
+                    if self._size < self.max_size + self.max_overflow:
+                        self._size += 1
+                        create = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._timeouts += 1
+                        raise PoolTimeout(
+                            f"Timed out after {self.timeout:.1f}s waiting for a '{self.name}' connection "
+                            f"({self._in_use} in use, max {self.max_size}+{self.max_overflow})"
+                        )
+                    self._waiting += 1
+                    try:
+                        self._cond.wait(remaining)
+                    finally:
+                        self._waiting -= 1
+                self._in_use += 1
+            for v in victims:
+                self._discard(v)
+
+            if create:
+                try:
+                    entry = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._in_use -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._created += 1
+            elif not self._healthy(entry, time.monotonic()):
+                self._discard(entry)
+                with self._cond:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._discarded += 1
+                    self._cond.notify()
+                continue
+
+            waited = time.monotonic() - t0
+            with self._cond:
+                self._checkouts += 1
+                self._wait_total += waited
+                self._wait_max = max(self._wait_max, waited)
+                if self._size > self.max_size:
+                    self._overflow_checkouts += 1
+            querylog.connection_checked_out()
+            return PooledConnection(self, entry)
+
+    def _return(self, entry: _PoolEntry) -> None:
+        conn = entry.conn
+        discard = bool(conn.closed)
+        if not discard:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            except Exception:
+                discard = True
+
+        now = time.monotonic()
+        entry.last_used = now
+        with self._cond:
+            self._in_use -= 1
+            overflowing = self._size > self.max_size and not self._waiting
+            if self._closed or discard or overflowing or self._expired(entry, now):
+                self._size -= 1
+                if discard:
+                    self._discarded += 1
+                close_it = True
+            else:
+                self._idle.append(entry)
+                close_it = False
+            self._cond.notify()
+        if close_it:
+            self._discard(entry)
+
+    def warm(self) -> None:
+        """Open connections up to min_size so the first requests don't pay the connect."""
+        borrowed = []
+        try:
+            while len(borrowed) < self.min_size:
+                borrowed.append(self.getconn())
+        finally:
+            for c in borrowed:
+                c.close()
+
+    def closeall(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            return {
+                "name": self.name,
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "max_overflow": self.max_overflow,
+                "open": self._size,
+                "idle": len(self._idle),
+                "in_use": self._in_use,
+                "overflow": max(0, self._size - self.max_size),
+                "waiting": self._waiting,
+                "checkouts": self._checkouts,
+                "overflow_checkouts": self._overflow_checkouts,
+                "created": self._created,
+                "discarded": self._discarded,
+                "timeouts": self._timeouts,
+                "wait_seconds_total": round(self._wait_total, 6),
+                "wait_seconds_max": round(self._wait_max, 6),
+            }
+
+
+# --- Pool registry ------------------------------------------------------------
+# logical name -> (env prefix for host/port/user/password, env var for db name, error message)
+_DATABASES = {
+    "attendance": (
+        "ATTENDANCE_DB_HOST", "ATTENDANCE_DB_PORT", "ATTENDANCE_DB_NAME",
+        "ATTENDANCE_DB_USER", "ATTENDANCE_DB_PASSWORD",
+        "Missing required database environment variables: ATTENDANCE_DB_HOST and ATTENDANCE_DB_PASSWORD",
+    ),
+    "inventory": (
+        "INVENTORY_LOGS_HOST", "INVENTORY_LOGS_PORT", "INVENTORY_LOGS_NAME",
+        "INVENTORY_LOGS_USER", "INVENTORY_LOGS_PASSWORD",
+        "Missing required inventory database environment variables",
+    ),
+    "products": (
+        "PRODUCTS_DB_HOST", "PRODUCTS_DB_PORT", "PRODUCTS_DB_NAME",
+        "PRODUCTS_DB_USER", "PRODUCTS_DB_PASSWORD",
+        "Missing required products database environment variables",
+    ),
+}
+
+# logical name -> Settings field with an optional read-replica DSN (see core.replicas)
+_REPLICA_DSNS = {
+    "attendance": "ATTENDANCE_DB_REPLICA_DSN",
+    "inventory": "INVENTORY_LOGS_REPLICA_DSN",
+    "products": "PRODUCTS_DB_REPLICA_DSN",
+}
+REPLICA_SUFFIX = "_replica"
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+_labels_engine = None
+
+
+def replica_dsn(name: str) -> Optional[str]:
+    """Read-replica DSN configured for logical database `name`, if any."""
+    var = _REPLICA_DSNS.get(name)
+    return (getattr(settings, var, None) or None) if var else None
+
+
+def _connect_kwargs(name: str) -> Dict[str, Any]:
+    if name.endswith(REPLICA_SUFFIX):
+        dsn = replica_dsn(name[: -len(REPLICA_SUFFIX)])
+        if not dsn:
+            raise ValueError(f"No read replica configured for '{name[: -len(REPLICA_SUFFIX)]}'")
+        return {"dsn": dsn, "connect_timeout": settings.DB_CONNECT_TIMEOUT}
+    host_var, port_var, name_var, user_var, password_var, missing_msg = _DATABASES[name]
+    host = os.getenv(host_var)
+    password = os.getenv(password_var)
     if not all([host, password]):
-        raise ValueError("Missing required database environment variables: ATTENDANCE_DB_HOST and ATTENDANCE_DB_PASSWORD")
-    
-    return psycopg2.connect(
-        host=host,
-        port=port,
-        database=database,
-        user=user,
-        password=password
-    )
+        raise ValueError(missing_msg)
+    return {
+        "host": host,
+        "port": os.getenv(port_var, "5432"),
+        "database": os.getenv(name_var, "railway"),
+        "user": os.getenv(user_var, "postgres"),
+        "password": password,
+        "connect_timeout": settings.DB_CONNECT_TIMEOUT,
+    }
+
+
+def get_pool(name: str) -> ConnectionPool:
+    """Return (lazily creating) the connection pool for a logical database."""
+    pool = _pools.get(name)
+    if pool is not None:
+        return pool
+    kwargs = _connect_kwargs(name)  # raises ValueError if not configured
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None:
+            pool = ConnectionPool(
+                name,
+                kwargs,
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.DB_POOL_MAX_SIZE,
+                max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+                timeout=settings.DB_POOL_TIMEOUT,
+                idle_timeout=settings.DB_POOL_IDLE_TIMEOUT,
+                max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+                health_check_interval=settings.DB_POOL_HEALTH_CHECK_INTERVAL,
+            )
+            _pools[name] = pool
+            logger.info(f"Created '{name}' connection pool (max {pool.max_size}+{pool.max_overflow})")
+    return pool
+
+
+def open_dedicated_connection(name: str):
+    """Open an unpooled connection for long-lived sessions (LISTEN, session-level locks)."""
+    return psycopg2.connect(**_connect_kwargs(name))
+
+
+def pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Checkout wait, in-use and overflow counters for every pool created so far."""
+    out = {name: pool.stats() for name, pool in list(_pools.items())}
+    if _labels_engine is not None:
+        p = _labels_engine.pool
+        out["labels"] = {
+            "name": "labels",
+            "max_size": p.size() if hasattr(p, "size") else None,
+            "in_use": p.checkedout() if hasattr(p, "checkedout") else None,
+            "overflow": max(0, p.overflow()) if hasattr(p, "overflow") else None,
+            "status": p.status(),
+        }
+    return out
+
+
+def close_all_pools() -> None:
+    global _labels_engine
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.closeall()
+    if _labels_engine is not None:
+        _labels_engine.dispose()
+        _labels_engine = None
+
+
+def reset_after_fork() -> None:
+    """
+    Forget pools inherited from a preloading parent process without closing
+    them: their sockets belong to the parent. New pools are created lazily.
+    """
+    global _labels_engine, _pools_lock
+    _pools.clear()
+    _pools_lock = threading.Lock()  # may have been held by another thread at fork time
+    if _labels_engine is not None:
+        _labels_engine.dispose(close=False)
+        _labels_engine = None
+
+
+def get_psycopg_connection():
+    """Borrow a pooled psycopg2 connection for attendance/enrollment modules (close() returns it)"""
+    return get_pool("attendance").getconn()
 
 def get_inventory_log_connection():
-    """Get connection for inventory logs"""
-    host = os.getenv("INVENTORY_LOGS_HOST")
-    port = os.getenv("INVENTORY_LOGS_PORT", "5432")
-    database = os.getenv("INVENTORY_LOGS_NAME", "railway")
-    user = os.getenv("INVENTORY_LOGS_USER", "postgres")
-    password = os.getenv("INVENTORY_LOGS_PASSWORD")
-    
-    if not all([host, password]):
-        raise ValueError("Missing required inventory database environment variables")
-    
-    return psycopg2.connect(
-        host=host,
-        port=port,
-        database=database,
-        user=user,
-        password=password
-    )
+    """Borrow a pooled connection for inventory logs"""
+    return get_pool("inventory").getconn()
 
 def get_products_connection():
-    """Get connection for products/sales database"""
-    host = os.getenv("PRODUCTS_DB_HOST")
-    port = os.getenv("PRODUCTS_DB_PORT", "5432")
-    database = os.getenv("PRODUCTS_DB_NAME", "railway")
-    user = os.getenv("PRODUCTS_DB_USER", "postgres")
-    password = os.getenv("PRODUCTS_DB_PASSWORD")
-    
-    if not all([host, password]):
-        raise ValueError("Missing required products database environment variables")
-    
-    return psycopg2.connect(
-        host=host,
-        port=port,
-        database=database,
-        user=user,
-        password=password
-    )
+    """Borrow a pooled connection for products/sales database"""
+    return get_pool("products").getconn()
 
 def get_sqlalchemy_engine():
-    """Get SQLAlchemy engine for labels module"""
+    """Get the (process-wide, pooled) SQLAlchemy engine for labels module"""
+    global _labels_engine
+    if _labels_engine is not None:
+        return _labels_engine
     labels_db_uri = os.getenv("LABELS_DB_URI")
     if not labels_db_uri:
         raise ValueError("LABELS_DB_URI environment variable not set")
-    return create_engine(labels_db_uri)
+    from sqlalchemy import create_engine  # heavy; only the labels module needs it
+    with _pools_lock:
+        if _labels_engine is None:
+            _labels_engine = create_engine(
+                labels_db_uri,
+                pool_size=settings.DB_POOL_MAX_SIZE,
+                max_overflow=settings.DB_POOL_MAX_OVERFLOW,
+                pool_timeout=settings.DB_POOL_TIMEOUT,
+                pool_recycle=int(settings.DB_POOL_MAX_LIFETIME),
+                pool_pre_ping=True,
+            )
+            _time_engine_queries(_labels_engine)
+    return _labels_engine
 
-def initialize_database():
-    """Test database connection and initialize roles table"""
-    print("🔧 Testing database connection...")
-    
+
+def _time_engine_queries(engine) -> None:
+    """Feed SQLAlchemy statement time into the Server-Timing "db" span and core.querylog."""
+    from sqlalchemy import event
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_timing_t0", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("_timing_t0")
+        if started:
+            elapsed = time.perf_counter() - started.pop()
+            timing.record("db", elapsed)
+            querylog.observe("labels", statement, None if executemany else parameters, elapsed,
+                             rows=len(parameters) if executemany else None)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_conn, record, proxy):
+        querylog.connection_checked_out()
+
+def database_names():
+    return list(_DATABASES)
+
+
+def check_database(name: str) -> bool:
+    """
+    Borrow (and so warm up) a pooled connection for one database and run SELECT 1.
+    Returns False when unreachable or not configured; never raises.
+    """
     try:
-        # Test database connection
-        conn = get_psycopg_connection()
-        conn.close()
-        print("✅ Database connection successful - Railway database is ready")
-        
-        # Initialize roles table
-        try:
-            from modules.roles.service import RolesService
-            roles_svc = RolesService()
-            roles_svc.init_roles_table()
-            print("✅ Roles table initialized with default roles")
-        except Exception as e:
-            print(f"⚠️  Could not initialize roles table: {e}")
-        
+        conn = get_pool(name).getconn()
+    except ValueError as e:
+        print(f"⚠️  {name} database not configured: {e}")
+        return False
+    except Exception as e:
+        print(f"❌ {name} database connection failed: {e}")
+        return False
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT 1")
+            cur.fetchone()
+        conn.rollback()
+        print(f"✅ {name} database connection successful")
         return True
     except Exception as e:
-        print(f"❌ Database connection failed: {e}")
+        print(f"❌ {name} database check failed: {e}")
+        return False
+    finally:
+        conn.close()
+
+
+def initialize_database():
+    """Test the main database connection (tables are created by core.migrations)"""
+    print("🔧 Testing database connection...")
+    ok = check_database("attendance")
+    if not ok:
         print("⚠️  Check Railway database configuration and environment variables")
-        return False
\ No newline at end of file
+    return ok
@@ -0,0 +1,167 @@
+"""
+Async database access (psycopg 3) for read-heavy endpoints.
+
+Sync routes run on the anyio worker threads (40 by default), so a handful of
+slow reports can hold every thread while kiosk requests queue behind them.
+Routes that `await` these helpers wait on the event loop instead and don't
+occupy a thread. They also use their own per-database async pools, so report
+traffic can't drain the sync pools that write paths depend on.
+
+psycopg 3 keeps the same `%s` placeholders as psycopg2, so repos share their
+SQL builders between the sync and the async path. If psycopg 3 isn't
+installed (or ASYNC_DB_ENABLED is off) the helpers run the same query on the
+sync pool in the thread pool, so async routes still work, just without the gain.
+
+fetch_all/fetch_one are for reads only: when the database has a read replica
+they run there (see core.replicas).
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, List, Optional, Sequence
+
+from core import deadline, executors, querylog, replicas, timing
+from core.config import settings
+from core.db import _connect_kwargs, get_pool
+
+if TYPE_CHECKING:
+    from psycopg_pool import AsyncConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Optional dependency. Only probed here; psycopg itself is imported when the
+# first async pool is opened so it stays off the startup path.
+ASYNC_DRIVER_AVAILABLE = bool(find_spec("psycopg") and find_spec("psycopg_pool"))
+
+_async_pools: Dict[str, "AsyncConnectionPool"] = {}
+_async_pools_lock: Optional[asyncio.Lock] = None
+
+
+def async_enabled() -> bool:
+    return ASYNC_DRIVER_AVAILABLE and settings.ASYNC_DB_ENABLED
+
+
+def _conninfo(name: str) -> str:
+    kwargs = dict(_connect_kwargs(name))  # raises ValueError if not configured
+    from psycopg.conninfo import make_conninfo
+    if "dsn" in kwargs:  # read replica
+        return make_conninfo(kwargs.pop("dsn"), **kwargs)
+    kwargs["dbname"] = kwargs.pop("database")
+    return make_conninfo(**kwargs)
+
+
+async def get_async_pool(name: str) -> "AsyncConnectionPool":
+    """Return (lazily opening) the async pool for a logical database."""
+    global _async_pools_lock
+    pool = _async_pools.get(name)
+    if pool is not None:
+        return pool
+    if _async_pools_lock is None:
+        _async_pools_lock = asyncio.Lock()
+    async with _async_pools_lock:
+        pool = _async_pools.get(name)
+        if pool is None:
+            from psycopg_pool import AsyncConnectionPool
+            pool = AsyncConnectionPool(
+                _conninfo(name),
+                min_size=settings.DB_POOL_MIN_SIZE,
+                max_size=settings.ASYNC_DB_POOL_MAX_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT,
+                max_idle=settings.DB_POOL_IDLE_TIMEOUT,
+                max_lifetime=settings.DB_POOL_MAX_LIFETIME,
+                name=f"{name}-async",
+                open=False,
+            )
+            await pool.open()
+            _async_pools[name] = pool
+            logger.info(f"Created '{name}' async connection pool (max {settings.ASYNC_DB_POOL_MAX_SIZE})")
+    return pool
+
+
+@asynccontextmanager
+async def async_connection(name: str) -> AsyncIterator[Any]:
+    """Borrow an async connection; the transaction is committed (or rolled back) on exit."""
+    pool = await get_async_pool(name)
+    async with pool.connection() as conn:
+        querylog.connection_checked_out()
+        yield conn
+
+
+def _sync_fetch(name: str, query: str, params: Sequence[Any], as_dict: bool, one: bool):
+    import psycopg2.extras
+    conn = get_pool(name).getconn()
+    try:
+        factory = psycopg2.extras.RealDictCursor if as_dict else None
+        with conn.cursor(cursor_factory=factory) as cur:
+            cur.execute(query, params)
+            return cur.fetchone() if one else cur.fetchall()
+    finally:
+        conn.close()
+
+
+async def _fetch(name: str, query: str, params: Sequence[Any], as_dict: bool, one: bool):
+    if not async_enabled():
+        return await executors.run("db", _sync_fetch, name, query, params, as_dict, one)
+    from psycopg.rows import dict_row
+    async with async_connection(name) as conn:
+        cur = conn.cursor(row_factory=dict_row) if as_dict else conn.cursor()
+        async with cur:
+            with timing.span("db"):
+                t0 = time.perf_counter()
+                ms = deadline.statement_timeout_ms()
+                if ms is not None:  # request deadline; cancellation on disconnect is psycopg's own
+                    await cur.execute("SELECT set_config('statement_timeout', %s, true)", (str(ms),))
+                await cur.execute(query, params)
+                querylog.observe(name, query, params, time.perf_counter() - t0)
+                return await (cur.fetchone() if one else cur.fetchall())
+
+
+async def _read(name: str, query: str, params: Sequence[Any], as_dict: bool, one: bool):
+    # read-only by contract, so it may run on the replica (core.replicas)
+    target = replicas.route(name)
+    if target == name:
+        return await _fetch(name, query, params, as_dict, one)
+    try:
+        return await _fetch(target, query, params, as_dict, one)
+    except Exception as e:
+        if not replicas.is_connection_error(e):
+            raise
+        replicas.mark_down(name, e)
+        return await _fetch(name, query, params, as_dict, one)
+
+
+async def fetch_all(name: str, query: str, params: Sequence[Any] = (), *, as_dict: bool = False) -> List[Any]:
+    """Run a read query and return all rows (tuples, or dicts with as_dict=True)."""
+    return await _read(name, query, params, as_dict, False)
+
+
+async def fetch_one(name: str, query: str, params: Sequence[Any] = (), *, as_dict: bool = False) -> Optional[Any]:
+    return await _read(name, query, params, as_dict, True)
+
+
+def async_pool_stats() -> Dict[str, Dict[str, Any]]:
+    out = {}
+    for name, pool in list(_async_pools.items()):
+        s = pool.get_stats()
+        out[f"{name}-async"] = {
+            "name": f"{name}-async",
+            "max_size": pool.max_size,
+            "open": s.get("pool_size"),
+            "idle": s.get("pool_available"),
+            "waiting": s.get("requests_waiting", 0),
+            "checkouts": s.get("requests_num", 0),
+            "timeouts": s.get("requests_errors", 0),
+            "wait_seconds_total": round(s.get("requests_wait_ms", 0) / 1000, 6),
+        }
+    return out
+
+
+async def close_async_pools() -> None:
+    pools = list(_async_pools.values())
+    _async_pools.clear()
+    for pool in pools:
+        await pool.close()
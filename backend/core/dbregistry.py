@@ -0,0 +1,149 @@
+"""
+Which physical database a logical database's connections come from.
+
+Most logical databases map to their own pool and nothing else. The inventory
+database (logs and metadata) has a fallback: when it isn't configured, or
+can't be reached, the inventory tables in the main (attendance) database are
+used instead - what the inventory repos used to decide on every call, paying
+a full connect timeout each time the inventory DB was down.
+
+Here the decision is made once and kept:
+
+  * not configured (no INVENTORY_LOGS_* env): always the fallback, decided
+    on first use;
+  * configured: a circuit breaker (core.breaker) opens after
+    DB_BREAKER_FAILURES failed connects in a row. While it is open
+    connections come from the fallback straight away; every DB_BREAKER_RESET
+    seconds a background probe tries the database again and, if it answers,
+    closes the breaker so the next connection goes back to it.
+
+Only failures to reach the database count; a busy pool (PoolTimeout) or a
+bad query is raised to the caller as before.
+
+    from core import dbregistry
+    conn = dbregistry.connection("inventory")
+
+/api/debug/inventory shows the current routing (`status()`).
+"""
+from __future__ import annotations
+
+import logging
+import threading
+from typing import Any, Dict, Optional
+
+from core import metrics
+from core.breaker import CLOSED, HALF_OPEN, CircuitBreaker
+from core.config import settings
+from core.db import database_names, get_pool
+
+logger = logging.getLogger(__name__)
+
+# logical database -> the database whose copy of its tables to use instead (see core.migrations)
+_FALLBACKS = {"inventory": "attendance"}
+
+
+class _Route:
+    def __init__(self, database: str, fallback: str):
+        self.database = database
+        self.fallback = fallback
+        self.configured: Optional[bool] = None  # None until the first connection
+        self.not_configured_reason: Optional[str] = None
+        self.breaker = CircuitBreaker(
+            f"db:{database}",
+            failure_threshold=settings.DB_BREAKER_FAILURES,
+            reset_timeout=settings.DB_BREAKER_RESET,
+        )
+
+    def using(self) -> str:
+        if self.configured is False or self.breaker.state != CLOSED:
+            return self.fallback
+        return self.database
+
+    def _probe(self) -> None:
+        try:
+            conn = get_pool(self.database).getconn()
+            try:
+                with conn.raw.cursor() as cur:  # raw: not a request's query
+                    cur.execute("SELECT 1")
+                conn.rollback()
+            finally:
+                conn.close()
+        except Exception as e:
+            self.breaker.record_failure(e)
+            return
+        logger.info(f"{self.database} database reachable again, switching back from {self.fallback}")
+        self.breaker.record_success()
+
+    def probe_in_background(self) -> None:
+        threading.Thread(target=self._probe, name=f"db-probe:{self.database}", daemon=True).start()
+
+
+_routes: Dict[str, _Route] = {}
+_routes_lock = threading.Lock()
+
+
+def _route(database: str) -> Optional[_Route]:
+    fallback = _FALLBACKS.get(database)
+    if fallback is None:
+        return None
+    route = _routes.get(database)
+    if route is None:
+        with _routes_lock:
+            route = _routes.setdefault(database, _Route(database, fallback))
+    return route
+
+
+def is_unreachable(exc: BaseException) -> bool:
+    """Whether `exc` from a connect means the database can't be reached (not a busy pool or a bad query)."""
+    return isinstance(exc, OSError) or type(exc).__name__ == "OperationalError"
+
+
+def _fall_back(route: _Route, reason: str):
+    metrics.DB_FALLBACK_CONNECTIONS.inc(database=route.database, reason=reason)
+    return get_pool(route.fallback).getconn()
+
+
+def connection(database: str):
+    """Borrow a pooled connection for logical `database`, from its fallback when it's unconfigured or down."""
+    route = _route(database)
+    if route is None:
+        return get_pool(database).getconn()
+    if route.configured is False:
+        return _fall_back(route, "not_configured")
+    if not route.breaker.allow():
+        return _fall_back(route, "circuit_open")
+    if route.breaker.state == HALF_OPEN:  # we hold the trial; probe off the request path
+        route.probe_in_background()
+        return _fall_back(route, "circuit_open")
+    try:
+        conn = get_pool(database).getconn()
+    except ValueError as e:
+        route.configured, route.not_configured_reason = False, str(e)
+        logger.warning(f"{database} database not configured ({e}), using the {route.fallback} database")
+        return _fall_back(route, "not_configured")
+    except Exception as e:
+        if not is_unreachable(e):
+            raise
+        route.breaker.record_failure(e)
+        logger.warning(f"{database} database unreachable ({e}), using the {route.fallback} database")
+        return _fall_back(route, "unreachable")
+    route.configured = True
+    route.breaker.record_success()
+    return conn
+
+
+def status() -> Dict[str, Any]:
+    out = {}
+    for database in database_names():
+        route = _route(database)
+        if route is None:
+            out[database] = {"using": database}
+            continue
+        out[database] = {
+            "using": route.using(),
+            "fallback": route.fallback,
+            "configured": route.configured,
+            "not_configured_reason": route.not_configured_reason,
+            "circuit": route.breaker.status(),
+        }
+    return out
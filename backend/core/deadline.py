@@ -0,0 +1,239 @@
+"""
+Per-request deadlines, and cancelling work the client no longer waits for.
+
+DeadlineMiddleware gives every request a time budget: REQUEST_DEADLINE
+seconds, or the value of the longest matching path prefix in
+REQUEST_DEADLINES. Code below it spends from that budget:
+
+  * every psycopg2 statement runs under `SET LOCAL statement_timeout` of the
+    time left (core.querylog.QueryCursor), async reads likewise (core.db_async);
+  * core.outbound clamps each call's timeout to the time left and refuses to
+    start one once the budget is gone;
+  * retry loops wait with `deadline.sleep()`, which gives up instead of
+    sleeping past the deadline.
+
+Running out raises DeadlineExceeded (504). Outside a request (jobs, scheduled
+tasks, scripts) there is no deadline and all of the above are no-ops.
+
+For GET/HEAD requests the middleware also notices the client disconnecting
+(closed tab, navigated away): it cancels the request task, which makes psycopg
+3 cancel the running query, and runs the abort hooks registered with
+`on_abort()`, which cancel in-flight psycopg2 queries from the worker thread
+a sync route is still running on. Requests with a body are left alone so
+uploads aren't buffered twice.
+
+    from core import deadline
+    for candidate in candidates:
+        deadline.check()
+        httpx.post(url, timeout=deadline.timeout(5.0))
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Iterator, List, Optional
+
+from core import metrics
+from core.config import settings
+from core.errors import AppError
+
+logger = logging.getLogger(__name__)
+
+
+class DeadlineExceeded(AppError):
+    def __init__(self, message: str = "Request deadline exceeded"):
+        super().__init__(message, status_code=504)
+
+
+class Deadline:
+    def __init__(self, seconds: float, label: str = ""):
+        self.seconds = seconds
+        self.label = label
+        self.expires = time.monotonic() + seconds
+        self.aborted: Optional[str] = None
+        self._hooks: List[Callable[[], Any]] = []
+        self._lock = threading.Lock()  # hooks are registered from worker threads
+
+    def remaining(self) -> float:
+        return self.expires - time.monotonic()
+
+    def abort(self, reason: str) -> None:
+        """Stop the request's work: mark it aborted and run the registered hooks."""
+        with self._lock:
+            self.aborted = reason
+            hooks, self._hooks = self._hooks, []
+        for hook in hooks:
+            try:
+                hook()
+            except Exception as e:
+                logger.debug(f"abort hook failed: {e}")
+
+    def _add(self, hook: Callable[[], Any]) -> bool:
+        with self._lock:
+            if self.aborted:
+                return False
+            self._hooks.append(hook)
+            return True
+
+    def _remove(self, hook: Callable[[], Any]) -> None:
+        with self._lock:
+            if hook in self._hooks:
+                self._hooks.remove(hook)
+
+
+_current: ContextVar[Optional[Deadline]] = ContextVar("request_deadline", default=None)
+
+
+def budget_for(path: str) -> float:
+    """Deadline for a request path: the longest matching REQUEST_DEADLINES prefix, else REQUEST_DEADLINE."""
+    best, seconds = -1, settings.REQUEST_DEADLINE
+    for prefix, value in settings.REQUEST_DEADLINES.items():
+        if path.startswith(prefix) and len(prefix) > best:
+            best, seconds = len(prefix), value
+    return seconds
+
+
+def start(seconds: float, label: str = "") -> Optional[Deadline]:
+    """Begin a deadline in the current context (0 or less: none)."""
+    deadline = Deadline(seconds, label) if seconds and seconds > 0 else None
+    _current.set(deadline)
+    return deadline
+
+
+def current() -> Optional[Deadline]:
+    return _current.get()
+
+
+def remaining() -> Optional[float]:
+    deadline = _current.get()
+    return None if deadline is None else deadline.remaining()
+
+
+def check() -> None:
+    """Raise DeadlineExceeded if the current request is out of time or was abandoned."""
+    deadline = _current.get()
+    if deadline is None:
+        return
+    if deadline.aborted:
+        raise DeadlineExceeded(f"Request aborted: {deadline.aborted}")
+    if deadline.remaining() <= 0:
+        metrics.REQUESTS_ABANDONED.inc(reason="deadline")
+        deadline.abort(f"deadline of {deadline.seconds:g}s exceeded")
+        raise DeadlineExceeded(f"Request aborted: {deadline.aborted}")
+
+
+def timeout(default: Any = None) -> Any:
+    """`default` (seconds, or a (connect, read) tuple) capped at the time left; raises if none is left."""
+    deadline = _current.get()
+    if deadline is None:
+        return default
+    check()
+    left = deadline.remaining()
+    if default is None:
+        return left
+    if isinstance(default, tuple):
+        return tuple(left if t is None else min(t, left) for t in default)
+    if isinstance(default, (int, float)):
+        return min(default, left)
+    return default  # e.g. an httpx.Timeout; leave it alone
+
+
+def sleep(seconds: float) -> None:
+    """time.sleep for retry backoff, unless that would run past the deadline."""
+    left = remaining()
+    if left is not None and left < seconds:
+        check()
+        raise DeadlineExceeded(f"Not enough time left to retry ({left:.1f}s)")
+    time.sleep(seconds)
+
+
+def statement_timeout_ms() -> Optional[int]:
+    """Postgres statement_timeout for the next statement (None outside a deadline)."""
+    deadline = _current.get()
+    if deadline is None:
+        return None
+    check()
+    return max(1, math.ceil(deadline.remaining() * 1000))
+
+
+@contextmanager
+def on_abort(hook: Callable[[], Any]) -> Iterator[None]:
+    """Run `hook` (e.g. connection.cancel) if the client goes away while the block runs."""
+    deadline = _current.get()
+    if deadline is None:
+        yield
+        return
+    if not deadline._add(hook):
+        check()
+    try:
+        yield
+    finally:
+        deadline._remove(hook)
+
+
+@contextmanager
+def shielded() -> Iterator[None]:
+    """Run the block without the deadline: bookkeeping that must follow work already done elsewhere."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+class DeadlineMiddleware:
+    """ASGI middleware: starts each request's deadline and cancels GET/HEAD work on disconnect."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        deadline = start(budget_for(scope["path"]), f"{scope['method']} {scope['path']}")
+        if deadline is None or scope["method"] not in ("GET", "HEAD"):
+            return await self.app(scope, receive, send)
+
+        # No request body to read, so the only other message is http.disconnect:
+        # pump receive() here and hand the messages on, watching for that one.
+        # The server also reports a disconnect once the response is complete;
+        # by then only background tasks are left and they are allowed to finish.
+        messages: asyncio.Queue = asyncio.Queue()
+        responded = False
+
+        async def send_watching(message):
+            nonlocal responded
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                responded = True
+
+        async def pump():
+            while True:
+                message = await receive()
+                messages.put_nowait(message)
+                if message["type"] == "http.disconnect":
+                    return
+
+        app_task = asyncio.ensure_future(self.app(scope, messages.get, send_watching))
+        pump_task = asyncio.ensure_future(pump())
+        try:
+            await asyncio.wait({app_task, pump_task}, return_when=asyncio.FIRST_COMPLETED)
+            if not app_task.done() and not responded:
+                metrics.REQUESTS_ABANDONED.inc(reason="disconnect")
+                logger.info(f"client went away, cancelling {deadline.label}")
+                deadline.abort("client disconnected")
+                app_task.cancel()
+            try:
+                await app_task
+            except asyncio.CancelledError:
+                if not deadline.aborted:
+                    raise
+        finally:
+            pump_task.cancel()
+            if not app_task.done():  # we were cancelled ourselves (shutdown)
+                app_task.cancel()
@@ -9,4 +9,11 @@ class AppError(Exception):
 def install_handlers(app: FastAPI):
     @app.exception_handler(AppError)
     async def app_error_handler(_: Request, exc: AppError):
-        return JSONResponse({"error": exc.message}, status_code=exc.status_code)
+        return JSONResponse({"error": exc.message}, status_code=exc.status_code, headers=getattr(exc, "headers", None))
+
+    from psycopg2.extensions import QueryCanceledError
+
+    @app.exception_handler(QueryCanceledError)
+    async def query_canceled_handler(_: Request, exc: QueryCanceledError):
+        # statement_timeout from the request deadline (core.deadline), or cancelled on disconnect
+        return JSONResponse({"error": "Request deadline exceeded"}, status_code=504)
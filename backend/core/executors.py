@@ -0,0 +1,193 @@
+"""
+Named, bounded thread pools per kind of blocking work.
+
+Sync routes all share anyio's default thread limiter, so a few slow hardware
+scans or Zoho crawls could take every thread and leave cheap requests
+(/attendance/clock) queueing behind them. Blocking work that can stall is
+given its own pool instead:
+
+    hardware   card / fingerprint reader calls (block for seconds)
+    external   routes that wait on Zoho or the SGI matcher
+    cpu        bcrypt hashing and verifying
+    db         short database work started from async code
+
+Sizes are EXECUTOR_WORKERS (0 = one per CPU). Each pool also has a bounded
+queue (EXECUTOR_QUEUE); past that, work is refused with ExecutorBusy (503)
+rather than queued without limit. Undeclared sync routes keep using anyio's
+default pool, which now only sees cheap work.
+
+A sync route declares its pool with a decorator; it then runs there, with
+the request's context (deadline, query counts, Server-Timing) carried over:
+
+    @router.post("/scan/card")
+    @executors.offload("hardware")
+    def scan_card(user=Depends(get_current_user)): ...
+
+Async code uses `await executors.run("db", fn, *args)` where it used
+run_in_threadpool.
+
+Busy/limit/queued per pool are exported like the default pool's
+(rm365_executor_*), with queue wait times and rejections; /api/debug/executors
+shows them.
+"""
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import functools
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, TypeVar
+
+from core import metrics
+from core.config import settings
+from core.errors import AppError
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+NAMES = ("hardware", "external", "cpu", "db")
+
+
+class ExecutorBusy(AppError):
+    def __init__(self, name: str):
+        super().__init__(f"Server is busy ({name} work queue is full); try again shortly", status_code=503)
+        self.headers = {"Retry-After": "1"}
+
+
+class Executor:
+    """A ThreadPoolExecutor with a cap on queued work and saturation counters."""
+
+    def __init__(self, name: str, workers: int, queue: int):
+        self.name = name
+        self.workers = workers
+        self.queue = queue
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"exec-{name}")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self._lock = threading.Lock()
+        self.busy = 0
+        self.queued = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def submit(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> "Future[T]":
+        """Queue fn(*args, **kwargs); raises ExecutorBusy when workers and queue are all taken."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.rejected += 1
+            metrics.EXECUTOR_REJECTED.inc(executor=self.name)
+            raise ExecutorBusy(self.name)
+        queued_at = time.perf_counter()
+        with self._lock:
+            self.queued += 1
+
+        def work():
+            metrics.EXECUTOR_QUEUE_WAIT.observe(time.perf_counter() - queued_at, executor=self.name)
+            with self._lock:
+                self.queued -= 1
+                self.busy += 1
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self.busy -= 1
+                    self.completed += 1
+                self._slots.release()
+
+        try:
+            return self._pool.submit(work)
+        except BaseException:  # shut down
+            with self._lock:
+                self.queued -= 1
+            self._slots.release()
+            raise
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Await fn(*args, **kwargs) on this pool, in a copy of the caller's context."""
+        ctx = contextvars.copy_context()
+        return await asyncio.wrap_future(self.submit(ctx.run, functools.partial(fn, *args, **kwargs)))
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": self.workers,
+            "busy": self.busy,
+            "queued": self.queued,
+            "queue_limit": self.queue,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+
+_executors: Dict[str, Executor] = {}
+_executors_lock = threading.Lock()
+
+
+def get(name: str) -> Executor:
+    """The process-wide pool called `name` (created on first use)."""
+    executor = _executors.get(name)
+    if executor is not None:
+        return executor
+    if name not in NAMES:
+        raise ValueError(f"Unknown executor: {name}")
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            workers = settings.EXECUTOR_WORKERS.get(name) or os.cpu_count() or 2
+            executor = _executors[name] = Executor(name, workers, settings.EXECUTOR_QUEUE.get(name, 4 * workers))
+            logger.info(f"Created '{name}' executor ({workers} threads, queue {executor.queue})")
+    return executor
+
+
+async def run(name: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """run_in_threadpool, on the named pool."""
+    return await get(name).run(fn, *args, **kwargs)
+
+
+def offload(name: str):
+    """Decorator for a sync route: run it on the named pool instead of anyio's default one."""
+    if name not in NAMES:
+        raise ValueError(f"Unknown executor: {name}")
+
+    def decorate(fn: Callable[..., T]) -> Callable[..., Any]:
+        @functools.wraps(fn)  # keeps the signature FastAPI reads parameters/dependencies from
+        async def wrapper(*args: Any, **kwargs: Any) -> T:
+            return await run(name, fn, *args, **kwargs)
+        wrapper.executor = name
+        return wrapper
+
+    return decorate
+
+
+def shutdown() -> None:
+    """Lifespan hook: stop accepting work and drop what's still queued."""
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.shutdown()
+
+
+def executor_stats() -> Dict[str, Dict[str, Any]]:
+    """Counters for every named pool created so far."""
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {e.name: e.stats() for e in executors}
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    """All named pools plus anyio's default one (for /api/debug/executors)."""
+    out = {name: get(name).stats() for name in NAMES}
+    try:
+        import anyio.to_thread
+        limiter = anyio.to_thread.current_default_thread_limiter().statistics()
+        out["default"] = {"workers": limiter.total_tokens, "busy": limiter.borrowed_tokens, "queued": limiter.tasks_waiting}
+    except Exception:
+        pass  # not inside an event loop
+    return out
@@ -0,0 +1,457 @@
+"""
+In-process background jobs.
+
+Long operations (Zoho adjustment sync, CSV imports, label files) run on a
+small bounded thread pool instead of inside the HTTP request. Their state
+lives in a `jobs` table on the main database, so any worker process can
+answer "how far along is job X?".
+
+A module registers a handler and submits work:
+
+    from core import jobs
+
+    @jobs.handler("inventory.adjustments.sync")
+    def _sync(ctx: jobs.JobContext, **params):
+        for i, row in enumerate(rows):
+            ctx.progress(i, len(rows))     # heartbeat; raises JobCancelled if cancel was requested
+            ...
+        return {"synced": n}               # stored as the job result (JSON)
+
+    job = jobs.submit("inventory.adjustments.sync", user=user)   # returns at once
+
+Routes answer 202 with jobs.accepted(job). Clients poll GET /api/v1/jobs/{id}
+and may POST /api/v1/jobs/{id}/cancel. `params` are stored with the job;
+`inputs` (e.g. an uploaded file) are handed to the handler in memory only.
+
+Jobs don't survive a restart. A running job whose heartbeat goes quiet for
+JOBS_STALE_AFTER seconds is marked failed; a queued job only heartbeats when
+it starts, so it is failed once it has waited JOBS_QUEUED_TIMEOUT (its
+process died before getting to it). Finished jobs are deleted after
+JOBS_RETENTION_HOURS. The sweep runs as a scheduled task (core.scheduler)
+and, as a fallback, at most every five minutes on submit.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from core import metrics, scheduler
+from core.config import settings
+from core.db import get_psycopg_connection
+from core.errors import AppError
+from core.security import get_current_user
+
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED, CANCELLED = "queued", "running", "succeeded", "failed", "cancelled"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+_COLUMNS = (
+    "id, kind, status, progress, message, params, result, error, created_by, "
+    "created_at, started_at, finished_at, cancel_requested"
+)
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a handler (by ctx.progress / ctx.check_cancelled) once the
+    job has been cancelled. A BaseException, like asyncio.CancelledError, so
+    the broad `except Exception` blocks in services don't swallow it.
+    """
+
+
+class JobNotFound(AppError):
+    def __init__(self, job_id: str):
+        super().__init__(f"Job {job_id} not found", status_code=404)
+
+
+@dataclass
+class _Handler:
+    kind: str
+    fn: Callable[..., Any]
+    public: bool  # may be submitted through the generic POST /api/v1/jobs
+
+
+_handlers: Dict[str, _Handler] = {}
+
+
+def handler(kind: str, *, public: bool = True):
+    """Register `fn(ctx, **params)` as the handler for jobs of `kind`."""
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        _handlers[kind] = _Handler(kind, fn, public)
+        return fn
+    return decorate
+
+
+def kinds() -> List[str]:
+    return sorted(k for k, h in _handlers.items() if h.public)
+
+
+# --- Persistence ------------------------------------------------------------------
+def _execute(query: str, params: tuple = (), fetch: str = "") -> Any:
+    conn = get_psycopg_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(query, params)
+            if fetch == "one":
+                out = cur.fetchone()
+            elif fetch == "all":
+                out = cur.fetchall()
+            else:
+                out = cur.rowcount
+        conn.commit()
+        return out
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def _json(value: Any) -> Optional[str]:
+    return None if value is None else json.dumps(value, default=str)
+
+
+def _row_to_job(row) -> Dict[str, Any]:
+    keys = [c.strip() for c in _COLUMNS.split(",")]
+    job = dict(zip(keys, row))
+    for key in ("created_at", "started_at", "finished_at"):
+        if job[key] is not None:
+            job[key] = job[key].isoformat()
+    job["progress"] = float(job["progress"]) if job["progress"] is not None else None
+    return job
+
+
+def get(job_id: str) -> Dict[str, Any]:
+    try:
+        uuid.UUID(job_id)
+    except ValueError:
+        raise JobNotFound(job_id)
+    row = _execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = %s", (job_id,), fetch="one")
+    if row is None:
+        raise JobNotFound(job_id)
+    return _row_to_job(row)
+
+
+def list_jobs(created_by: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+    if created_by is None:
+        rows = _execute(f"SELECT {_COLUMNS} FROM jobs ORDER BY created_at DESC LIMIT %s", (limit,), fetch="all")
+    else:
+        rows = _execute(
+            f"SELECT {_COLUMNS} FROM jobs WHERE created_by = %s ORDER BY created_at DESC LIMIT %s",
+            (created_by, limit), fetch="all",
+        )
+    return [_row_to_job(r) for r in rows]
+
+
+# --- Execution --------------------------------------------------------------------
+@dataclass
+class JobContext:
+    job_id: str
+    kind: str
+    _cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _last_beat: float = 0.0
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def check_cancelled(self) -> None:
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def progress(self, done: float, total: Optional[float] = None, message: Optional[str] = None) -> None:
+        """
+        Report progress as done/total (or a 0..1 fraction when total is None).
+        Written at most once a second; each write doubles as the heartbeat
+        and picks up cancellation requested from another worker.
+        """
+        self.check_cancelled()
+        now = time.monotonic()
+        if now - self._last_beat < 1.0 and message is None:
+            return
+        self._last_beat = now
+        fraction = (done / total if total else 0.0) if total is not None else done
+        row = _execute(
+            """
+            UPDATE jobs SET progress = %s, message = COALESCE(%s, message), heartbeat_at = now()
+            WHERE id = %s RETURNING cancel_requested
+            """,
+            (max(0.0, min(1.0, fraction)), message, self.job_id), fetch="one",
+        )
+        if row and row[0]:
+            self._cancel.set()
+            raise JobCancelled()
+
+
+class _Runner:
+    def __init__(self, max_workers: int, max_queued: int):
+        self.max_queued = max_queued
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._active: Dict[str, JobContext] = {}  # queued or running in this process
+        self._running = 0
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._active)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"pending": len(self._active), "running": self._running, "max_queued": self.max_queued}
+
+    def submit(self, ctx: JobContext, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> None:
+        with self._lock:
+            self._active[ctx.job_id] = ctx
+        self._executor.submit(self._run, ctx, fn, kwargs)
+
+    def cancel_local(self, job_id: str) -> bool:
+        with self._lock:
+            ctx = self._active.get(job_id)
+        if ctx is None:
+            return False
+        ctx._cancel.set()
+        return True
+
+    def _run(self, ctx: JobContext, fn: Callable[..., Any], kwargs: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        status, result, error = FAILED, None, None
+        with self._lock:
+            self._running += 1
+        try:
+            claimed = _execute(
+                """
+                UPDATE jobs SET status = 'running', started_at = now(), heartbeat_at = now()
+                WHERE id = %s AND status = 'queued' AND NOT cancel_requested
+                """,
+                (ctx.job_id,),
+            )
+            if not claimed:
+                status = CANCELLED
+                return
+            result = fn(ctx, **kwargs)
+            status = SUCCEEDED
+        except JobCancelled:
+            status = CANCELLED
+        except Exception as e:
+            logger.exception(f"job {ctx.job_id} ({ctx.kind}) failed")
+            error = str(e) or type(e).__name__
+        finally:
+            with self._lock:
+                self._active.pop(ctx.job_id, None)
+                self._running -= 1
+            try:
+                _execute(
+                    """
+                    UPDATE jobs SET status = %s, result = %s::jsonb, error = %s,
+                        progress = CASE WHEN %s = 'succeeded' THEN 1 ELSE progress END,
+                        finished_at = now(), heartbeat_at = now()
+                    WHERE id = %s AND status IN ('queued', 'running')
+                    """,
+                    (status, _json(result), error, status, ctx.job_id),
+                )
+            except Exception as e:
+                logger.error(f"could not record outcome of job {ctx.job_id}: {e}")
+            metrics.JOBS_FINISHED.inc(kind=ctx.kind, status=status)
+            metrics.JOB_DURATION.observe(time.perf_counter() - started, kind=ctx.kind)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            active = list(self._active.values())
+        for ctx in active:
+            ctx._cancel.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if active:
+            _execute(
+                """
+                UPDATE jobs SET status = 'failed', error = 'Server restarted before the job finished',
+                    finished_at = now()
+                WHERE id = ANY(%s::uuid[]) AND status IN ('queued', 'running')
+                """,
+                ([c.job_id for c in active],),
+            )
+
+
+_runner: Optional[_Runner] = None
+_runner_lock = threading.Lock()
+_last_sweep = 0.0
+
+
+def _get_runner() -> _Runner:
+    global _runner
+    with _runner_lock:
+        if _runner is None:
+            _runner = _Runner(settings.JOBS_MAX_WORKERS, settings.JOBS_MAX_QUEUED)
+        return _runner
+
+
+def runner_stats() -> Dict[str, int]:
+    """This process's queue depth (queued + running), running jobs and queue limit."""
+    with _runner_lock:
+        runner = _runner
+    if runner is None:  # nothing submitted yet
+        return {"pending": 0, "running": 0, "max_queued": settings.JOBS_MAX_QUEUED}
+    return runner.stats()
+
+
+def sweep() -> None:
+    """Fail jobs whose worker went quiet and delete finished jobs past retention."""
+    failed = _execute(
+        """
+        UPDATE jobs SET status = 'failed', finished_at = now(),
+            error = CASE WHEN status = 'running' THEN 'Job stopped reporting progress (worker restarted?)'
+                         ELSE 'Job never started (worker restarted?)' END
+        WHERE (status = 'running' AND heartbeat_at < now() - make_interval(secs => %s))
+           OR (status = 'queued' AND created_at < now() - make_interval(secs => %s))
+        """,
+        (settings.JOBS_STALE_AFTER, settings.JOBS_QUEUED_TIMEOUT),
+    )
+    deleted = _execute(
+        "DELETE FROM jobs WHERE finished_at < now() - make_interval(hours => %s)",
+        (settings.JOBS_RETENTION_HOURS,),
+    )
+    if failed or deleted:
+        logger.info(f"jobs sweep: {failed} stale job(s) failed, {deleted} old job(s) deleted")
+
+
+scheduler.task("jobs.sweep", settings.SCHEDULE_JOBS_SWEEP)(sweep)
+
+
+def _maybe_sweep() -> None:
+    global _last_sweep
+    now = time.monotonic()
+    if now - _last_sweep < 300:
+        return
+    _last_sweep = now
+    try:
+        sweep()
+    except Exception as e:
+        logger.warning(f"jobs sweep failed: {e}")
+
+
+def submit(
+    kind: str,
+    params: Optional[Dict[str, Any]] = None,
+    *,
+    user: Optional[Dict[str, Any]] = None,
+    inputs: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Record a queued job and hand it to the pool; returns the job row."""
+    h = _handlers.get(kind)
+    if h is None:
+        raise AppError(f"Unknown job kind '{kind}'", status_code=400)
+    runner = _get_runner()
+    if runner.pending() >= runner.max_queued:
+        raise AppError("Too many background jobs in progress, try again shortly", status_code=503)
+    _maybe_sweep()
+
+    params = params or {}
+    job_id = str(uuid.uuid4())
+    row = _execute(
+        f"""
+        INSERT INTO jobs (id, kind, status, params, created_by, worker, heartbeat_at)
+        VALUES (%s, %s, 'queued', %s::jsonb, %s, %s, now())
+        RETURNING {_COLUMNS}
+        """,
+        (job_id, kind, _json(params), (user or {}).get("username"), _WORKER_ID),
+        fetch="one",
+    )
+    runner.submit(JobContext(job_id, kind), h.fn, {**params, **(inputs or {})})
+    return _row_to_job(row)
+
+
+def cancel(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued job outright; ask a running one to stop at its next progress report."""
+    job = get(job_id)
+    if job["status"] in FINISHED:
+        return job
+    _execute(
+        """
+        UPDATE jobs SET cancel_requested = TRUE,
+            status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END,
+            finished_at = CASE WHEN status = 'queued' THEN now() ELSE finished_at END
+        WHERE id = %s
+        """,
+        (job_id,),
+    )
+    if _runner is not None:
+        _runner.cancel_local(job_id)
+    return get(job_id)
+
+
+def shutdown() -> None:
+    """Lifespan hook: stop taking jobs and mark this process's unfinished jobs failed."""
+    global _runner
+    with _runner_lock:
+        runner, _runner = _runner, None
+    if runner is not None:
+        try:
+            runner.shutdown()
+        except Exception as e:
+            logger.warning(f"jobs shutdown: {e}")
+
+
+def accepted(job: Dict[str, Any]) -> JSONResponse:
+    """202 response for a submitted job, pointing at its status URL."""
+    url = f"/api/v1/jobs/{job['id']}"
+    return JSONResponse({"job": job, "status_url": url}, status_code=202, headers={"Location": url})
+
+
+# --- API: mounted at /api/v1/jobs ---------------------------------------------------
+router = APIRouter()
+
+
+class JobSubmitIn(BaseModel):
+    kind: str
+    params: Dict[str, Any] = {}
+
+
+def _visible(job: Dict[str, Any], user: Dict[str, Any]) -> Dict[str, Any]:
+    if job["created_by"] not in (None, user["username"]) and user.get("role") != "admin":
+        raise JobNotFound(job["id"])
+    return job
+
+
+@router.get("")
+async def list_my_jobs(limit: int = 50, user=Depends(get_current_user)):
+    """Recent jobs submitted by the current user (all users' jobs for admins)"""
+    created_by = None if user.get("role") == "admin" else user["username"]
+    jobs_ = await run_in_threadpool(list_jobs, created_by, max(1, min(limit, 200)))
+    return {"jobs": jobs_, "kinds": kinds()}
+
+
+@router.post("", status_code=202)
+async def submit_job(body: JobSubmitIn, user=Depends(get_current_user)):
+    """Submit any registered job kind that takes JSON parameters"""
+    h = _handlers.get(body.kind)
+    if h is None or not h.public:
+        raise AppError(f"Unknown job kind '{body.kind}'", status_code=400)
+    return accepted(await run_in_threadpool(submit, body.kind, body.params, user=user))
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str, user=Depends(get_current_user)):
+    """Status, progress and (once finished) result of a job"""
+    return _visible(await run_in_threadpool(get, job_id), user)
+
+
+@router.post("/{job_id}/cancel")
+async def cancel_job(job_id: str, user=Depends(get_current_user)):
+    """Cancel a queued or running job"""
+    _visible(await run_in_threadpool(get, job_id), user)
+    return await run_in_threadpool(cancel, job_id)
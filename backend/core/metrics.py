@@ -0,0 +1,419 @@
+"""
+In-process metrics with Prometheus text exposition (served at /api/metrics).
+
+Deliberately tiny: counters, gauges and histograms with labels, kept in
+memory per process, rendered on scrape. Values that already live elsewhere
+(DB pool stats, thread pool usage) are read at scrape time by collectors
+instead of being mirrored on every event.
+
+    from core import metrics
+    REQS = metrics.counter("rm365_things_total", "Things done", ["kind"])
+    REQS.inc(kind="x")
+"""
+from __future__ import annotations
+
+import bisect
+import logging
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# (name, type, help, [(labels, value), ...])
+Family = Tuple[str, str, str, List[Tuple[Dict[str, str], float]]]
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+
+
+def _fmt_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(self._labels(k))} {_fmt_value(v)}" for k, v in items]
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_fmt_labels(self._labels(k))} {_fmt_value(v)}" for k, v in items]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        idx = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            row = self._values.get(key)
+            if row is None:
+                row = self._values[key] = [0.0] * (len(self.buckets) + 2)
+            row[idx] += 1
+            row[-1] += value
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        out = []
+        for key, row in items:
+            labels = self._labels(key)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float("inf"),), row[:-1]):
+                cumulative += count
+                out.append(f"{self.name}_bucket{_fmt_labels({**labels, 'le': _fmt_value(float(bound))})} {_fmt_value(cumulative)}")
+            out.append(f"{self.name}_sum{_fmt_labels(labels)} {_fmt_value(row[-1])}")
+            out.append(f"{self.name}_count{_fmt_labels(labels)} {_fmt_value(cumulative)}")
+        return out
+
+
+_registry: Dict[str, _Metric] = {}
+_collectors: List[Callable[[], Iterable[Family]]] = []
+_registry_lock = threading.Lock()
+
+
+def _get_or_create(cls, name: str, help: str, labelnames: Sequence[str], **kwargs):
+    with _registry_lock:
+        metric = _registry.get(name)
+        if metric is None:
+            metric = _registry[name] = cls(name, help, labelnames, **kwargs)
+        elif not isinstance(metric, cls):
+            raise ValueError(f"metric {name} already registered as {metric.kind}")
+        return metric
+
+
+def counter(name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _get_or_create(Counter, name, help, labelnames)
+
+
+def gauge(name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return _get_or_create(Gauge, name, help, labelnames)
+
+
+def histogram(name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help, labelnames, buckets=buckets)
+
+
+def register_collector(fn: Callable[[], Iterable[Family]]) -> None:
+    """Register a callable evaluated on every scrape (for values owned by other modules)."""
+    with _registry_lock:
+        if fn not in _collectors:
+            _collectors.append(fn)
+
+
+def render() -> str:
+    """Everything in Prometheus text exposition format."""
+    out: List[str] = []
+    with _registry_lock:
+        metrics = list(_registry.values())
+        collectors = list(_collectors)
+    for m in metrics:
+        out.append(f"# HELP {m.name} {m.help}")
+        out.append(f"# TYPE {m.name} {m.kind}")
+        out.extend(m.lines())
+    for collect in collectors:
+        try:
+            families = list(collect())
+        except Exception as e:
+            logger.warning(f"metrics collector {getattr(collect, '__name__', collect)} failed: {e}")
+            continue
+        for name, kind, help, samples in families:
+            out.append(f"# HELP {name} {help}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(f"{name}{_fmt_labels(labels)} {_fmt_value(float(v))}" for labels, v in samples if v is not None)
+    return "\n".join(out) + "\n"
+
+
+# --- HTTP server metrics (fed by core.middleware) --------------------------------
+HTTP_REQUESTS = counter(
+    "rm365_http_requests_total", "HTTP requests by route template and status class",
+    ["method", "route", "status"],
+)
+HTTP_LATENCY = histogram(
+    "rm365_http_request_duration_seconds", "HTTP request latency by route template",
+    ["method", "route"],
+)
+HTTP_IN_FLIGHT = gauge(
+    "rm365_http_requests_in_flight", "HTTP requests currently being served",
+    ["method"],
+)
+
+# --- Database statements (fed by core.querylog) ------------------------------------
+DB_QUERIES = counter(
+    "rm365_db_queries_total", "SQL statements executed, by database",
+    ["database"],
+)
+DB_SLOW_QUERIES = counter(
+    "rm365_db_slow_queries_total", "Statements slower than SLOW_QUERY_MS, by database",
+    ["database"],
+)
+DB_QUERIES_PER_REQUEST = histogram(
+    "rm365_db_queries_per_request", "SQL statements per HTTP request (an N+1 shows up as a long tail)",
+    ["route"], buckets=(0, 1, 2, 5, 10, 20, 50, 100, 250, 1000),
+)
+
+# --- Read replicas (fed by core.replicas) -------------------------------------------
+DB_READ_ROUTES = counter(
+    "rm365_db_read_routes_total",
+    "Read-only queries by where they ran (replica, or primary_* with the reason)",
+    ["database", "target"],
+)
+DB_REPLICA_LAG = gauge(
+    "rm365_db_replica_lag_seconds", "Last measured replication lag per replicated database",
+    ["database"],
+)
+
+# --- Database fallback (fed by core.dbregistry) ------------------------------------
+DB_FALLBACK_CONNECTIONS = counter(
+    "rm365_db_fallback_connections_total",
+    "Connections taken from a fallback database (reason: not_configured, unreachable, circuit_open)",
+    ["database", "reason"],
+)
+
+# --- Circuit breakers (fed by core.breaker) -------------------------------------------
+CIRCUIT_STATE = gauge(
+    "rm365_circuit_state", "Circuit breaker state: 0 closed, 1 half-open, 2 open",
+    ["breaker"],
+)
+CIRCUIT_TRANSITIONS = counter(
+    "rm365_circuit_transitions_total", "Circuit breaker state changes, by the state entered",
+    ["breaker", "state"],
+)
+
+# --- Request deadlines (fed by core.deadline) ----------------------------------------
+REQUESTS_ABANDONED = counter(
+    "rm365_http_requests_abandoned_total",
+    "Requests whose work was stopped early (reason=deadline: out of time, disconnect: client went away)",
+    ["reason"],
+)
+
+# --- Response compression (fed by core.compression) ---------------------------
+COMPRESSION_RESPONSES = counter(
+    "rm365_http_compressed_responses_total", "Responses sent compressed, by encoding",
+    ["encoding"],
+)
+COMPRESSION_BYTES_IN = counter(
+    "rm365_http_compression_input_bytes_total", "Response body bytes before compression",
+    ["encoding"],
+)
+COMPRESSION_BYTES_OUT = counter(
+    "rm365_http_compression_output_bytes_total", "Response body bytes after compression",
+    ["encoding"],
+)
+COMPRESSION_BYTES_SAVED = counter(
+    "rm365_http_compression_saved_bytes_total", "Bytes saved on the wire by response compression",
+    ["encoding"],
+)
+
+# --- Outbound calls (fed by core.outbound) ---------------------------------------
+OUTBOUND_LATENCY = histogram(
+    "rm365_outbound_request_duration_seconds", "Outbound HTTP call latency (Zoho, SGI, ...)",
+    ["target", "method"],
+)
+OUTBOUND_REQUESTS = counter(
+    "rm365_outbound_requests_total", "Outbound HTTP calls by result (status class or error)",
+    ["target", "method", "result"],
+)
+
+OUTBOUND_IN_FLIGHT = gauge(
+    "rm365_outbound_in_flight", "Outbound calls in progress per target (capped by OUTBOUND_MAX_CONCURRENT)",
+    ["target"],
+)
+OUTBOUND_REJECTED = counter(
+    "rm365_outbound_rejected_total", "Outbound calls refused without being sent (circuit_open, bulkhead_full)",
+    ["target", "reason"],
+)
+
+# --- Named executors (fed by core.executors) -----------------------------------------
+EXECUTOR_QUEUE_WAIT = histogram(
+    "rm365_executor_queue_wait_seconds", "Time work waited for a thread in a named executor",
+    ["executor"], buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+EXECUTOR_REJECTED = counter(
+    "rm365_executor_rejected_total", "Work refused because the executor's threads and queue were full",
+    ["executor"],
+)
+
+# --- Request coalescing (fed by core.singleflight) -------------------------------
+SINGLEFLIGHT_CALLS = counter(
+    "rm365_singleflight_calls_total", "Coalesced calls by group; role=follower means the call shared another's result",
+    ["name", "role"],
+)
+
+# --- Cross-worker shared values (fed by core.shared_state) ------------------------
+SHARED_VALUE_LOOKUPS = counter(
+    "rm365_shared_value_lookups_total",
+    "Shared value loads by result (shared = reused another worker's refresh, refreshed, local_refresh = DB unavailable)",
+    ["name", "result"],
+)
+
+# --- Background jobs (fed by core.jobs) -------------------------------------------
+JOBS_FINISHED = counter(
+    "rm365_jobs_finished_total", "Background jobs finished, by kind and final status",
+    ["kind", "status"],
+)
+JOB_DURATION = histogram(
+    "rm365_job_duration_seconds", "Background job run time (queue wait excluded)",
+    ["kind"], buckets=(0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800),
+)
+
+# --- Periodic tasks (fed by core.scheduler) ------------------------------------------
+SCHEDULER_RUNS = counter(
+    "rm365_scheduler_runs_total", "Scheduled task runs by outcome",
+    ["task", "result"],
+)
+SCHEDULER_RUN_DURATION = histogram(
+    "rm365_scheduler_run_duration_seconds", "Scheduled task run time",
+    ["task"], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600),
+)
+SCHEDULER_OVERLAPS = counter(
+    "rm365_scheduler_overlaps_total", "Runs skipped because the previous run of the task was still going",
+    ["task"],
+)
+SCHEDULER_LEADER = gauge(
+    "rm365_scheduler_leader", "1 if this process holds the scheduler leader lock",
+)
+
+
+# --- Collectors --------------------------------------------------------------------
+def _db_pool_collector() -> Iterable[Family]:
+    from core.db import pool_stats
+    from core.db_async import async_pool_stats
+    stats = {**pool_stats(), **async_pool_stats()}
+    gauges = [
+        ("open", "rm365_db_pool_connections", "Open connections per pool"),
+        ("in_use", "rm365_db_pool_in_use", "Connections checked out per pool"),
+        ("idle", "rm365_db_pool_idle", "Idle connections per pool"),
+        ("waiting", "rm365_db_pool_waiting", "Callers waiting for a connection"),
+        ("overflow", "rm365_db_pool_overflow", "Overflow connections above max_size"),
+    ]
+    counters = [
+        ("checkouts", "rm365_db_pool_checkouts_total", "Connection checkouts"),
+        ("timeouts", "rm365_db_pool_timeouts_total", "Checkouts that timed out"),
+        ("wait_seconds_total", "rm365_db_pool_wait_seconds_total", "Total time spent waiting for a connection"),
+    ]
+    for key, name, help in gauges:
+        yield name, "gauge", help, [({"pool": p}, s.get(key)) for p, s in stats.items() if key in s]
+    for key, name, help in counters:
+        yield name, "counter", help, [({"pool": p}, s.get(key)) for p, s in stats.items() if key in s]
+
+
+def _threadpool_collector() -> Iterable[Family]:
+    # sync routes and run_in_threadpool work queue on anyio's default limiter
+    try:
+        import anyio.to_thread
+        limiter = anyio.to_thread.current_default_thread_limiter()
+        stats = limiter.statistics()
+    except Exception:
+        return []  # not inside an event loop (e.g. rendered from a script)
+    return [
+        ("rm365_threadpool_busy", "gauge", "Worker threads in use by sync routes / run_in_threadpool",
+         [({}, stats.borrowed_tokens)]),
+        ("rm365_threadpool_limit", "gauge", "Worker thread limit", [({}, stats.total_tokens)]),
+        ("rm365_threadpool_queued", "gauge", "Tasks waiting for a worker thread", [({}, stats.tasks_waiting)]),
+    ]
+
+
+def _executor_collector() -> Iterable[Family]:
+    # named pools for hardware / external / cpu / db work (core.executors)
+    from core.executors import executor_stats
+    stats = executor_stats()
+    gauges = [
+        ("busy", "rm365_executor_busy", "Threads running work, per named executor"),
+        ("workers", "rm365_executor_limit", "Threads per named executor"),
+        ("queued", "rm365_executor_queued", "Work waiting for a thread, per named executor"),
+    ]
+    for key, name, help in gauges:
+        yield name, "gauge", help, [({"executor": e}, s[key]) for e, s in stats.items()]
+
+
+def _jobs_collector() -> Iterable[Family]:
+    # background job queue in this process (core.jobs)
+    from core.jobs import runner_stats
+    stats = runner_stats()
+    return [
+        ("rm365_jobs_pending", "gauge", "Background jobs queued or running in this process", [({}, stats["pending"])]),
+        ("rm365_jobs_running", "gauge", "Background jobs running in this process", [({}, stats["running"])]),
+        ("rm365_jobs_queue_limit", "gauge", "Queued + running jobs per process before submits get 503",
+         [({}, stats["max_queued"])]),
+    ]
+
+
+register_collector(_db_pool_collector)
+register_collector(_threadpool_collector)
+register_collector(_executor_collector)
+register_collector(_jobs_collector)
@@ -1,12 +1,85 @@
+import re
 import time
+
 from fastapi import FastAPI, Request
 
+from starlette.concurrency import run_in_threadpool
+
+from core import metrics, querylog, replicas, timing
+from core.compression import CompressionMiddleware
+from core.deadline import DeadlineMiddleware
+from core.config import settings
+
+_PARAM = re.compile(r"{([^}:]+)(:[^}]+)?}")
+
+
+def route_template(request: Request, status: int) -> str:
+    """
+    Route template ("/api/v1/enrollment/employees/{employee_id}") for the
+    request, so metrics are labelled per endpoint rather than per raw URL.
+    Only valid after the router ran (it sets scope["route"]). Depending on the
+    FastAPI version an included router's route.path may or may not carry the
+    prefix, so the prefix is recovered from the raw path.
+    """
+    route = request.scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return "static" if status < 400 else "unmatched"
+    params = request.scope.get("path_params") or {}
+    rendered = _PARAM.sub(lambda m: str(params.get(m.group(1), m.group(0))), template)
+    path = request.url.path
+    if path != rendered and path.endswith(rendered):
+        return path[: len(path) - len(rendered)] + template
+    return template
+
+
 def install_middleware(app: FastAPI):
     @app.middleware("http")
     async def log_requests(request: Request, call_next):
         t0 = time.time()
-        resp = await call_next(request)
-        dt = time.time() - t0
+        method = request.method
+        timings = timing.start() if settings.SERVER_TIMING_ENABLED else None
+        queries = querylog.start(f"{method} {request.url.path}")
+        session = replicas.session_key(request.headers.get("authorization"), request.client.host if request.client else None)
+        replicas.begin_request(session)
+        metrics.HTTP_IN_FLIGHT.inc(method=method)
+        status = 500
+        try:
+            resp = await call_next(request)
+            status = resp.status_code
+        finally:
+            dt = time.time() - t0
+            metrics.HTTP_IN_FLIGHT.dec(method=method)
+            route = route_template(request, status)
+            metrics.HTTP_LATENCY.observe(dt, method=method, route=route)
+            metrics.HTTP_REQUESTS.inc(method=method, route=route, status=f"{status // 100}xx")
+            metrics.DB_QUERIES_PER_REQUEST.observe(queries.queries, route=route)
+        if timings is not None:
+            resp.headers["Server-Timing"] = timings.header(total=dt)
+            # lets the cross-origin SPA read the header via the Resource Timing API
+            allowed = resp.headers.get("access-control-allow-origin")
+            if allowed:
+                resp.headers["Timing-Allow-Origin"] = allowed
+        written = replicas.replicated(queries.writes)
+        if written:
+            await run_in_threadpool(replicas.after_request, session, written)
+        if settings.QUERY_COUNT_HEADER:
+            resp.headers["X-DB-Queries"] = str(queries.queries)
+            resp.headers["X-DB-Connections"] = str(queries.connections)
         # Keep logs short and useful
         print(f"[{request.method}] {request.url.path} -> {resp.status_code} in {dt:.3f}s")
         return resp
+
+    # outside log_requests, so the deadline (a contextvar) covers the whole request
+    app.add_middleware(DeadlineMiddleware)
+
+    if settings.COMPRESSION_ENABLED:
+        # added last, so it's the outermost layer and sees the final headers/body
+        app.add_middleware(
+            CompressionMiddleware,
+            min_size=settings.COMPRESSION_MIN_SIZE,
+            encodings=settings.COMPRESSION_ENCODINGS,
+            gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+            brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+            zstd_level=settings.COMPRESSION_ZSTD_LEVEL,
+        )
@@ -0,0 +1,324 @@
+"""
+Versioned schema migrations.
+
+All DDL lives here instead of in repos/services. Each logical database
+("attendance", "inventory", "products") has its own ordered list of
+migrations; applied versions are recorded in a `schema_migrations` table in
+that database. A transaction-scoped Postgres advisory lock serialises
+concurrent runners (several replicas booting at once), and the whole run for
+one database is a single transaction, so a failed migration leaves nothing
+half-applied.
+
+Runs at app startup (lifespan) when MIGRATIONS_ON_STARTUP is set, or by hand:
+
+    python -m core.migrations            # apply pending migrations everywhere
+    python -m core.migrations --status   # show applied / pending versions
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import sys
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from core import dbregistry
+from core.db import database_names
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_xact_lock key shared by every migration runner ("RM365")
+_LOCK_KEY = 0x524D333635
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    name: str
+    statements: List[str] = field(default_factory=list)
+
+
+def _table_versions(*tables: str) -> List[str]:
+    """
+    Change counters for core.etag: a statement-level trigger bumps
+    table_versions.version on every write to each table. Tables that don't
+    exist yet are skipped (their endpoints just don't get an ETag).
+    """
+    statements = [
+        """
+        CREATE TABLE IF NOT EXISTS table_versions (
+            table_name TEXT PRIMARY KEY,
+            version BIGINT NOT NULL DEFAULT 1,
+            changed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+        )
+        """,
+        """
+        CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO table_versions (table_name) VALUES (TG_TABLE_NAME)
+            ON CONFLICT (table_name)
+            DO UPDATE SET version = table_versions.version + 1, changed_at = now();
+            RETURN NULL;
+        END
+        $$
+        """,
+    ]
+    for table in tables:
+        statements.append(f"""
+        DO $$
+        BEGIN
+            IF to_regclass('{table}') IS NOT NULL THEN
+                DROP TRIGGER IF EXISTS {table}_version ON {table};
+                CREATE TRIGGER {table}_version
+                    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table}
+                    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version();
+                INSERT INTO table_versions (table_name) VALUES ('{table}')
+                ON CONFLICT (table_name) DO NOTHING;
+            END IF;
+        END
+        $$
+        """)
+    return statements
+
+
+MIGRATIONS: Dict[str, List[Migration]] = {
+    "attendance": [
+        Migration(1, "roles table with default roles", [
+            """
+            CREATE TABLE IF NOT EXISTS roles (
+                id SERIAL PRIMARY KEY,
+                role_name VARCHAR(100) UNIQUE NOT NULL,
+                allowed_tabs TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            """
+            INSERT INTO roles (role_name, allowed_tabs) VALUES
+            ('admin', 'enrollment,inventory,attendance,labels,sales-imports,usermanagement'),
+            ('manager', 'enrollment,inventory,attendance,labels,sales-imports'),
+            ('user', 'enrollment,attendance')
+            ON CONFLICT (role_name) DO NOTHING
+            """,
+        ]),
+        Migration(2, "table change counters for ETags", _table_versions("employees", "roles", "login_users")),
+        Migration(3, "shared_values for cross-worker state", [
+            # see core.shared_state (short-lived values such as the Zoho access token)
+            """
+            CREATE TABLE IF NOT EXISTS shared_values (
+                name TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at TIMESTAMPTZ NOT NULL,
+                refreshed_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
+        ]),
+        Migration(4, "jobs table for background work", [
+            # see core.jobs
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id UUID PRIMARY KEY,
+                kind TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'queued',
+                progress REAL NOT NULL DEFAULT 0,
+                message TEXT,
+                params JSONB NOT NULL DEFAULT '{}'::jsonb,
+                result JSONB,
+                error TEXT,
+                created_by TEXT,
+                worker TEXT,
+                cancel_requested BOOLEAN NOT NULL DEFAULT FALSE,
+                created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+                started_at TIMESTAMPTZ,
+                finished_at TIMESTAMPTZ,
+                heartbeat_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_jobs_created_by_created_at ON jobs (created_by, created_at DESC)",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_unfinished ON jobs (heartbeat_at) WHERE status IN ('queued', 'running')",
+            "CREATE INDEX IF NOT EXISTS idx_jobs_finished_at ON jobs (finished_at) WHERE finished_at IS NOT NULL",
+        ]),
+    ],
+    "inventory": [
+        Migration(1, "inventory_logs and inventory_metadata", [
+            """
+            CREATE TABLE IF NOT EXISTS inventory_logs (
+                id SERIAL PRIMARY KEY,
+                barcode VARCHAR(255) NOT NULL,
+                quantity INTEGER NOT NULL,
+                reason VARCHAR(255) NOT NULL,
+                field VARCHAR(50) NOT NULL,
+                status VARCHAR(50),
+                response_message TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            # matches the actual production table schema
+            """
+            CREATE TABLE IF NOT EXISTS inventory_metadata (
+                item_id VARCHAR(50) PRIMARY KEY,
+                location VARCHAR(100),
+                date VARCHAR(20),
+                uk_6m_data VARCHAR(100),
+                shelf_lt1 VARCHAR(100),
+                shelf_lt1_qty INTEGER DEFAULT 0,
+                shelf_gt1 VARCHAR(100),
+                shelf_gt1_qty INTEGER DEFAULT 0,
+                top_floor_expiry VARCHAR(20),
+                top_floor_total INTEGER DEFAULT 0,
+                status VARCHAR(50) DEFAULT 'Active',
+                uk_fr_preorder VARCHAR(100),
+                fr_6m_data VARCHAR(100),
+                created_at TIMESTAMP DEFAULT NOW()
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_inventory_logs_barcode ON inventory_logs (barcode)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_logs_created_at ON inventory_logs (created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_inventory_logs_status ON inventory_logs (status)",
+        ]),
+        Migration(2, "table change counters for ETags", _table_versions("inventory_metadata")),
+    ],
+    "products": [
+        Migration(1, "uk_sales_data", [
+            """
+            CREATE TABLE IF NOT EXISTS uk_sales_data (
+                id SERIAL PRIMARY KEY,
+                order_number VARCHAR(255) NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                sku VARCHAR(255) NOT NULL,
+                name TEXT NOT NULL,
+                qty INTEGER NOT NULL DEFAULT 1,
+                price NUMERIC(10, 2) NOT NULL DEFAULT 0.0,
+                status VARCHAR(100),
+                imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """,
+            "CREATE INDEX IF NOT EXISTS idx_uk_sales_order_number ON uk_sales_data(order_number)",
+            "CREATE INDEX IF NOT EXISTS idx_uk_sales_sku ON uk_sales_data(sku)",
+            "CREATE INDEX IF NOT EXISTS idx_uk_sales_created_at ON uk_sales_data(created_at)",
+            "CREATE INDEX IF NOT EXISTS idx_uk_sales_status ON uk_sales_data(status)",
+        ]),
+        Migration(2, "keyset pagination index for uk_sales_data", [
+            # matches UK_SALES_KEYSET: ORDER BY created_at DESC, id DESC / (created_at, id) < (...)
+            "CREATE INDEX IF NOT EXISTS idx_uk_sales_created_at_id ON uk_sales_data (created_at DESC, id DESC)",
+        ]),
+    ],
+}
+
+
+def _connect(database: str):
+    """Connection for a logical database; inventory falls back to the main DB like the repos do (core.dbregistry)."""
+    if database not in database_names():
+        raise ValueError(f"Unknown database: {database}")
+    return dbregistry.connection(database)
+
+
+def _ensure_version_table(cur) -> None:
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            scope VARCHAR(50) NOT NULL,
+            version INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (scope, version)
+        )
+    """)
+
+
+def _applied_versions(cur, database: str) -> set:
+    cur.execute("SELECT version FROM schema_migrations WHERE scope = %s", (database,))
+    return {row[0] for row in cur.fetchall()}
+
+
+def migrate(database: str) -> List[int]:
+    """Apply pending migrations for one database. Returns the versions applied."""
+    conn = _connect(database)
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(%s)", (_LOCK_KEY,))
+            _ensure_version_table(cur)
+            done = _applied_versions(cur, database)
+            applied = []
+            for m in sorted(MIGRATIONS[database], key=lambda m: m.version):
+                if m.version in done:
+                    continue
+                logger.info(f"[migrations] {database} v{m.version}: {m.name}")
+                for stmt in m.statements:
+                    cur.execute(stmt)
+                cur.execute(
+                    "INSERT INTO schema_migrations (scope, version, name) VALUES (%s, %s, %s)",
+                    (database, m.version, m.name),
+                )
+                applied.append(m.version)
+        conn.commit()
+        return applied
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def run_migrations(databases: Optional[List[str]] = None) -> Dict[str, str]:
+    """
+    Migrate every configured database. Unconfigured databases are skipped and
+    failures are reported per database rather than aborting the others.
+    """
+    results: Dict[str, str] = {}
+    for database in databases or list(MIGRATIONS):
+        try:
+            applied = migrate(database)
+            results[database] = f"applied {applied}" if applied else "up to date"
+        except ValueError as e:
+            results[database] = f"skipped ({e})"
+        except Exception as e:
+            logger.error(f"[migrations] {database} failed: {e}")
+            results[database] = f"failed ({e})"
+        print(f"[migrations] {database}: {results[database]}")
+    return results
+
+
+def status(database: str) -> Dict[str, List[int]]:
+    conn = _connect(database)
+    try:
+        with conn.cursor() as cur:
+            _ensure_version_table(cur)
+            done = _applied_versions(cur, database)
+        conn.commit()
+    finally:
+        conn.close()
+    known = [m.version for m in MIGRATIONS[database]]
+    return {
+        "applied": sorted(done),
+        "pending": [v for v in known if v not in done],
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    try:
+        from dotenv import load_dotenv
+        load_dotenv()
+    except ImportError:
+        pass
+    parser = argparse.ArgumentParser(description="Apply RM365 schema migrations")
+    parser.add_argument("--database", choices=list(MIGRATIONS), action="append",
+                        help="limit to one database (repeatable)")
+    parser.add_argument("--status", action="store_true", help="show applied/pending versions only")
+    args = parser.parse_args(argv)
+
+    if args.status:
+        for database in args.database or list(MIGRATIONS):
+            try:
+                print(f"{database}: {status(database)}")
+            except Exception as e:
+                print(f"{database}: unavailable ({e})")
+        return 0
+
+    results = run_migrations(args.database)
+    return 1 if any(r.startswith("failed") for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
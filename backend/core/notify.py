@@ -0,0 +1,147 @@
+"""
+Cross-worker signals over Postgres LISTEN/NOTIFY.
+
+Every worker process (and every replica) that subscribes to a channel gets
+the payload of each publish() on that channel, including its own. A daemon
+thread holds one dedicated LISTEN connection on the main database and
+reconnects with backoff if it drops. Because notifications sent while the
+listener was disconnected are lost, subscribers are called with payload=None
+after every reconnect and should treat that as "drop everything".
+"""
+import logging
+import select
+import threading
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from psycopg2 import sql
+
+from core.config import settings
+from core.db import get_psycopg_connection, open_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+Callback = Callable[[Optional[str]], None]
+
+_subscribers: Dict[str, List[Callback]] = defaultdict(list)
+_lock = threading.Lock()
+_listener: Optional["_Listener"] = None
+
+
+def publish(channel: str, payload: str = "") -> None:
+    """Send a notification to every subscriber of `channel` in every worker."""
+    if not settings.NOTIFY_ENABLED:
+        return
+    conn = get_psycopg_connection()
+    try:
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_notify(%s, %s)", (channel, payload))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def subscribe(channel: str, callback: Callback) -> None:
+    """Register `callback(payload)` for `channel` and make sure the listener runs."""
+    global _listener
+    with _lock:
+        _subscribers[channel].append(callback)
+        if not settings.NOTIFY_ENABLED:
+            return
+        if _listener is None or not _listener.is_alive():
+            _listener = _Listener()
+            _listener.start()
+        _listener.pending.add(channel)
+
+
+def stop_listener() -> None:
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+def reset_after_fork() -> None:
+    """A forked worker inherits the subscriptions but not the listener thread: start its own."""
+    global _listener, _lock
+    _lock = threading.Lock()  # may have been held by another thread at fork time
+    _listener = None
+    with _lock:
+        if settings.NOTIFY_ENABLED and _subscribers:
+            _listener = _Listener()  # listens on every subscribed channel when it connects
+            _listener.start()
+
+
+def is_listening() -> bool:
+    listener = _listener
+    return bool(listener and listener.connected)
+
+
+def _dispatch(channel: str, payload: Optional[str]) -> None:
+    for cb in list(_subscribers.get(channel, ())):
+        try:
+            cb(payload)
+        except Exception as e:
+            logger.warning(f"notify subscriber for '{channel}' failed: {e}")
+
+
+class _Listener(threading.Thread):
+    def __init__(self):
+        super().__init__(name="pg-notify-listener", daemon=True)
+        self.pending: set = set()
+        self.connected = False
+        self._stopping = threading.Event()
+
+    def stop(self) -> None:
+        self._stopping.set()
+
+    def _listen(self, conn, channels) -> None:
+        with conn.cursor() as cur:
+            for ch in channels:
+                cur.execute(sql.SQL("LISTEN {}").format(sql.Identifier(ch)))
+
+    def run(self) -> None:
+        failures = 0
+        first = True
+        while not self._stopping.is_set():
+            conn = None
+            try:
+                conn = open_dedicated_connection("attendance")
+                conn.autocommit = True
+                with _lock:
+                    channels = set(_subscribers)
+                    self.pending.clear()
+                self._listen(conn, channels)
+                self.connected = True
+                missed = not first or failures > 0
+                failures = 0
+                if missed:
+                    # anything published while we were away is lost
+                    for ch in channels:
+                        _dispatch(ch, None)
+                first = False
+
+                while not self._stopping.is_set():
+                    if self.pending:
+                        with _lock:
+                            new, self.pending = set(self.pending), set()
+                        self._listen(conn, new)
+                    if select.select([conn], [], [], 1.0)[0]:
+                        conn.poll()
+                        while conn.notifies:
+                            n = conn.notifies.pop(0)
+                            _dispatch(n.channel, n.payload)
+            except Exception as e:
+                failures += 1
+                self.connected = False
+                delay = min(30, 2 ** failures)
+                logger.warning(f"notify listener disconnected ({e}); retrying in {delay}s")
+                self._stopping.wait(delay)
+            finally:
+                self.connected = False
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
@@ -0,0 +1,228 @@
+"""
+Single choke point for outbound HTTP calls (Zoho, SGI fingerprint service).
+
+Services call `outbound.request(...)` (requests) or wrap their own client call
+in `outbound.call(...)` (httpx) so every external call is timed and counted
+the same way, labelled by `target` ("zoho", "zoho_accounts", "sgi"). The
+time also shows up as a span of that name in the Server-Timing header.
+Inside a request, timeouts are capped at the time left before the request's
+deadline, and no call is started once it has passed (core.deadline).
+
+Every target is also a guarded dependency:
+
+  * a circuit breaker (core.breaker) opens after OUTBOUND_BREAKER_FAILURES
+    failures in a row, or a failure share of OUTBOUND_BREAKER_FAILURE_RATE
+    over the last OUTBOUND_BREAKER_WINDOW calls; failures are exceptions
+    (timeouts, refused connections), 5xx and 429. While open, calls fail
+    at once with DependencyUnavailable (503 with Retry-After) instead of
+    walking retry ladders; after OUTBOUND_BREAKER_RESET one trial call
+    decides whether it closes again;
+  * a bulkhead caps in-flight calls per target (OUTBOUND_MAX_CONCURRENT);
+    a caller that can't get a slot within OUTBOUND_BULKHEAD_WAIT gets
+    DependencyUnavailable too, rather than parking another request thread.
+
+A caller that makes several calls for one logical operation (trying each of
+the SGI endpoints) wraps them in `guard(target)`: the block takes one slot
+and counts as one call, succeeding if its last HTTP call did.
+
+    with outbound.guard("sgi"):
+        for ep in endpoints:
+            r = outbound.call("sgi", "POST", client.post, ep, json=payload, timeout=5.0)
+
+State per target is at /api/debug/outbound.
+"""
+from __future__ import annotations
+
+import math
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterator, Optional, TypeVar
+
+from core import deadline, metrics, timing
+from core.breaker import OPEN, CircuitBreaker
+from core.config import settings
+from core.errors import AppError
+
+if TYPE_CHECKING:
+    import requests
+
+T = TypeVar("T")
+
+_NAMES = {"zoho": "Zoho Inventory", "zoho_accounts": "Zoho sign-in", "sgi": "The fingerprint matcher"}
+
+
+class DependencyUnavailable(AppError):
+    """An outbound dependency is failing (circuit open) or saturated (bulkhead full)."""
+
+    def __init__(self, target: str, reason: str, retry_after: float):
+        what = "is not responding" if reason == "circuit_open" else "is busy"
+        super().__init__(f"{_NAMES.get(target, target)} {what}; try again shortly", status_code=503)
+        self.target = target
+        self.reason = reason
+        self.headers = {"Retry-After": str(max(1, math.ceil(retry_after)))}
+
+
+class Dependency:
+    """Circuit breaker + bulkhead for one outbound target."""
+
+    def __init__(self, target: str):
+        self.target = target
+        self.breaker = CircuitBreaker(
+            f"outbound:{target}",
+            failure_threshold=settings.OUTBOUND_BREAKER_FAILURES,
+            reset_timeout=settings.OUTBOUND_BREAKER_RESET,
+            failure_rate=settings.OUTBOUND_BREAKER_FAILURE_RATE,
+            window=settings.OUTBOUND_BREAKER_WINDOW,
+            min_calls=settings.OUTBOUND_BREAKER_MIN_CALLS,
+        )
+        self.max_concurrent = settings.OUTBOUND_MAX_CONCURRENT.get(target, settings.OUTBOUND_MAX_CONCURRENT_DEFAULT)
+        self._slots = threading.BoundedSemaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.rejected = {"circuit_open": 0, "bulkhead_full": 0}
+
+    def _reject(self, reason: str, retry_after: float) -> DependencyUnavailable:
+        with self._lock:
+            self.rejected[reason] += 1
+        metrics.OUTBOUND_REJECTED.inc(target=self.target, reason=reason)
+        return DependencyUnavailable(self.target, reason, retry_after)
+
+    def _enter(self) -> None:
+        # fail fast while open, rather than queueing for a slot held by hung calls first;
+        # allow() (which hands out the half-open trial) waits until a slot is taken
+        if self.breaker.state == OPEN and self.breaker.retry_in() > 0:
+            raise self._reject("circuit_open", self.breaker.retry_in())
+        wait = settings.OUTBOUND_BULKHEAD_WAIT
+        left = deadline.remaining()
+        if left is not None:
+            wait = max(0.0, min(wait, left))
+        if not self._slots.acquire(timeout=wait):
+            raise self._reject("bulkhead_full", 1)
+        if not self.breaker.allow():
+            self._slots.release()
+            raise self._reject("circuit_open", self.breaker.retry_in())
+        with self._lock:
+            self.in_flight += 1
+        metrics.OUTBOUND_IN_FLIGHT.set(self.in_flight, target=self.target)
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        metrics.OUTBOUND_IN_FLIGHT.set(self.in_flight, target=self.target)
+        self._slots.release()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "circuit": self.breaker.status(),
+            "in_flight": self.in_flight,
+            "max_concurrent": self.max_concurrent,
+            "rejected": dict(self.rejected),
+        }
+
+
+_dependencies: Dict[str, Dependency] = {}
+_dependencies_lock = threading.Lock()
+
+
+def dependency(target: str) -> Dependency:
+    dep = _dependencies.get(target)
+    if dep is None:
+        with _dependencies_lock:
+            dep = _dependencies.setdefault(target, Dependency(target))
+    return dep
+
+
+class _Outcome:
+    __slots__ = ("calls", "failure")
+
+    def __init__(self):
+        self.calls = 0
+        self.failure: Optional[str] = None  # of the latest call in the block
+
+
+_guarded: ContextVar[Dict[str, _Outcome]] = ContextVar("outbound_guarded", default={})
+
+
+@contextmanager
+def guard(target: str) -> Iterator[None]:
+    """Admit the block as one call to `target` (raises DependencyUnavailable when it's down or saturated)."""
+    held = _guarded.get()
+    if target in held:  # already inside a guard for this target
+        yield
+        return
+    dep = dependency(target)
+    dep._enter()
+    outcome = _Outcome()
+    token = _guarded.set({**held, target: outcome})
+    error: Optional[BaseException] = None
+    try:
+        yield
+    except AppError:  # deadline / nested rejection: says nothing about the dependency
+        outcome.calls = 0
+        raise
+    except Exception as e:
+        error = e
+        raise
+    finally:
+        _guarded.reset(token)
+        dep._exit()
+        if outcome.failure is not None or (error is not None and outcome.calls):
+            dep.breaker.record_failure(outcome.failure or error)
+        elif outcome.calls:
+            dep.breaker.record_success()
+
+
+def _classify_error(exc: BaseException) -> str:
+    name = type(exc).__name__.lower()
+    if "timeout" in name:
+        return "timeout"
+    if "connect" in name:
+        return "connection_error"
+    return "error"
+
+
+def call(target: str, method: str, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Run `fn(*args, **kwargs)` (an HTTP call returning a response) with latency/error metrics."""
+    method = method.upper()
+    if "timeout" in kwargs:
+        kwargs["timeout"] = deadline.timeout(kwargs["timeout"])
+    else:
+        deadline.check()
+    with guard(target):
+        outcome = _guarded.get()[target]
+        outcome.calls += 1
+        t0 = time.perf_counter()
+        try:
+            resp = fn(*args, **kwargs)
+        except BaseException as exc:
+            elapsed = time.perf_counter() - t0
+            timing.record(target, elapsed)
+            metrics.OUTBOUND_LATENCY.observe(elapsed, target=target, method=method)
+            result = _classify_error(exc)
+            metrics.OUTBOUND_REQUESTS.inc(target=target, method=method, result=result)
+            if isinstance(exc, Exception):
+                outcome.failure = f"{result}: {exc}"
+            raise
+        elapsed = time.perf_counter() - t0
+        timing.record(target, elapsed)
+        metrics.OUTBOUND_LATENCY.observe(elapsed, target=target, method=method)
+        status = getattr(resp, "status_code", None)
+        result = f"{status // 100}xx" if isinstance(status, int) else "ok"
+        metrics.OUTBOUND_REQUESTS.inc(target=target, method=method, result=result)
+        outcome.failure = f"HTTP {status}" if isinstance(status, int) and (status >= 500 or status == 429) else None
+        return resp
+
+
+def status() -> Dict[str, Dict[str, Any]]:
+    with _dependencies_lock:
+        deps = list(_dependencies.values())
+    return {dep.target: dep.status() for dep in deps}
+
+
+def request(target: str, method: str, url: str, **kwargs: Any) -> requests.Response:
+    """`requests.request` with outbound metrics."""
+    import requests  # imported on first use to keep it off the startup path
+    kwargs.setdefault("timeout", None)  # so call() caps it at the deadline
+    return call(target, method, requests.request, method, url, **kwargs)
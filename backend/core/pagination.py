@@ -1,8 +1,15 @@
+import base64
+import json
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
 from math import ceil
-from typing import Generic, List, Optional, Sequence, TypeVar
+from typing import Any, Generic, List, Literal, Optional, Sequence, Tuple, TypeVar
 from fastapi import Query, Depends
 from pydantic import BaseModel, Field
 
+from core.errors import AppError
+
 T = TypeVar('T')
 
 # Query params (page-based; switch to offset-based by changing fields)
@@ -50,3 +57,198 @@ def limit_offset(params: PageParams) -> tuple[int, int]:
     limit = params.size
     offset = (params.page - 1) * params.size
     return limit, offset
+
+
+# --- Keyset (cursor) pagination ---------------------------------------------------
+# LIMIT/OFFSET makes Postgres walk and discard every skipped row, so page N
+# costs O(N * size). Keyset pagination seeks straight to the last row seen
+# using an index on the sort key, so every page costs the same:
+#
+#     WHERE (created_at, id) < (%s, %s) ORDER BY created_at DESC, id DESC LIMIT 51
+#
+# The position travels as an opaque cursor token. The sort key must be unique
+# (append the primary key) and backed by a matching composite index.
+
+class InvalidCursor(AppError):
+    def __init__(self, message: str = "Invalid pagination cursor"):
+        super().__init__(message, status_code=400)
+
+
+TotalMode = Literal["exact", "estimate", "none"]
+
+
+class CursorParams(BaseModel):
+    cursor: Optional[str] = None
+    size: int = Field(50, ge=1, le=200)
+    total: TotalMode = "estimate"
+
+
+def get_cursor_params(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page"),
+    size: int = Query(50, ge=1, le=200),
+    total: TotalMode = Query("estimate", description="exact (COUNT(*)), estimate (planner statistics) or none"),
+) -> CursorParams:
+    return CursorParams(cursor=cursor, size=size, total=total)
+
+
+class CursorPage(BaseModel, Generic[T]):
+    items: List[T]
+    size: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_is_estimate: bool = False
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "dec" in value:
+            return Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], backwards: bool = False) -> str:
+    payload = {"k": [_dump_value(v) for v in values], "b": int(backwards)}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, width: int) -> Tuple[List[Any], bool]:
+    """(sort key values, backwards) from a cursor; InvalidCursor (400) if it's malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        payload = json.loads(raw)
+        values = [_load_value(v) for v in payload["k"]]
+        backwards = bool(payload.get("b"))
+    except Exception:
+        raise InvalidCursor()
+    if len(values) != width:
+        raise InvalidCursor()
+    return values, backwards
+
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    A unique sort key, e.g. Keyset(("created_at", "id")), and the SQL to seek on it.
+    All columns sort in the same direction, so a row-value comparison can use
+    one composite index.
+    """
+    columns: Tuple[str, ...]
+    descending: bool = True
+
+    def _reverse(self, backwards: bool) -> bool:
+        # walking backwards flips the comparison and the ORDER BY; rows are re-reversed afterwards
+        return self.descending != backwards
+
+    def where(self, values: Sequence[Any], backwards: bool = False) -> Tuple[str, List[Any]]:
+        op = "<" if self._reverse(backwards) else ">"
+        cols = ", ".join(self.columns)
+        marks = ", ".join(["%s"] * len(self.columns))
+        return f"({cols}) {op} ({marks})", list(values)
+
+    def order_by(self, backwards: bool = False) -> str:
+        direction = "DESC" if self._reverse(backwards) else "ASC"
+        return "ORDER BY " + ", ".join(f"{c} {direction}" for c in self.columns)
+
+    def values(self, row: Any) -> List[Any]:
+        return [row[c] for c in self.columns]
+
+    def page_sql(self, select: str, where: Sequence[str], params: Sequence[Any],
+                 cursor: Optional[str], size: int) -> Tuple[str, List[Any], bool]:
+        """
+        (query, params, backwards) for one page: `select` plus the caller's
+        `where` conditions plus the seek condition, fetching size+1 rows so
+        to_cursor_page() can tell whether there is another page.
+        """
+        conditions = list(where)
+        params = list(params)
+        backwards = False
+        if cursor:
+            values, backwards = decode_cursor(cursor, len(self.columns))
+            seek, seek_params = self.where(values, backwards)
+            conditions.append(seek)
+            params += seek_params
+        query = select
+        if conditions:
+            query += " WHERE " + " AND ".join(f"({c})" for c in conditions)
+        query += f" {self.order_by(backwards)} LIMIT %s"
+        return query, params + [size + 1], backwards
+
+
+def to_cursor_page(
+    *,
+    rows: Sequence[Any],
+    keyset: Keyset,
+    size: int,
+    cursor: Optional[str],
+    backwards: bool,
+    total: Optional[int] = None,
+    total_is_estimate: bool = False,
+) -> CursorPage:
+    """Trim the size+1 probe row, restore display order and build next/prev cursors."""
+    rows = list(rows)
+    more = len(rows) > size
+    rows = rows[:size]
+    if backwards:
+        rows.reverse()
+    if not rows:
+        return CursorPage(items=[], size=size, total=total, total_is_estimate=total_is_estimate)
+    has_next = more if not backwards else True
+    has_prev = more if backwards else bool(cursor)
+    return CursorPage(
+        items=rows,
+        size=size,
+        next_cursor=encode_cursor(keyset.values(rows[-1])) if has_next else None,
+        prev_cursor=encode_cursor(keyset.values(rows[0]), backwards=True) if has_prev else None,
+        total=total,
+        total_is_estimate=total_is_estimate,
+    )
+
+
+# Totals: COUNT(*) is itself a full scan on a big table, so callers can ask
+# for the planner's estimate instead (or skip the total altogether).
+RELTUPLES_SQL = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)"
+
+
+def explain_sql(count_query: str) -> str:
+    """Planner row estimate for a filtered query; read it with planner_rows()."""
+    return f"EXPLAIN (FORMAT JSON) {count_query}"
+
+
+def planner_rows(explain_result: Any) -> Optional[int]:
+    """Plan Rows of the top node from an EXPLAIN (FORMAT JSON) result cell."""
+    try:
+        plan = explain_result if not isinstance(explain_result, str) else json.loads(explain_result)
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except Exception:
+        return None
+
+
+def reltuples(value: Any) -> Optional[int]:
+    """pg_class.reltuples is -1 for a table that was never analyzed."""
+    if value is None or int(value) < 0:
+        return None
+    return int(value)
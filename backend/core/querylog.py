@@ -0,0 +1,293 @@
+"""
+Slow-query log and per-request query/connection counts.
+
+Every cursor handed out by core.db goes through `QueryCursor`, which times
+each statement (feeding the Server-Timing "db" span as before) and:
+
+  * counts it against the current `QueryStats` - one per request, started by
+    core.middleware, which reports the totals in the X-DB-Queries /
+    X-DB-Connections response headers and the queries-per-request histogram;
+  * logs it if it took longer than SLOW_QUERY_MS, with the parameters
+    redacted to their types (statements carry names, card UIDs, templates);
+  * for a sampled share (SLOW_QUERY_EXPLAIN_SAMPLE) of slow SELECTs, re-runs
+    it under EXPLAIN (ANALYZE, BUFFERS) inside a savepoint and logs the plan.
+    Plans show the values the statement ran with, so string and numeric
+    literals are replaced by '?' before the plan is logged or kept.
+
+Inside a request it also applies the request deadline (core.deadline): the
+statement is sent as `SET LOCAL statement_timeout = <ms left>; <statement>`
+(one round trip; transactions only, so not on autocommit connections) and is
+cancelled on the server if the client disconnects while it runs.
+
+The last slow statements are kept for /api/debug/slow-queries (admins only).
+
+Tests can use the counter to pin down N+1 regressions:
+
+    with querylog.capture() as q:
+        service.import_csv_file(...)
+    assert q.queries <= 5, q.statements
+
+The async (psycopg 3) and SQLAlchemy paths are counted and slow-logged too,
+but not EXPLAINed.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterator, List, Optional, Set
+
+from core import deadline, metrics, timing
+from core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SPACE = re.compile(r"\s+")
+_READ_ONLY = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(insert|update|delete|merge)\b|\bfor\s+(update|share)\b", re.IGNORECASE)
+_WRITE_START = re.compile(r"^\s*(insert|update|delete|merge|copy|create|alter|drop|truncate)\b", re.IGNORECASE)
+_MAX_STATEMENT = 1000
+_PLAN_STRING = re.compile(r"'(?:[^']|'')*'")
+_PLAN_CONDITION = re.compile(r"((?:Cond|Filter): )(\(.*)$", re.MULTILINE)  # not "Rows Removed by Filter: 12"
+_PLAN_NUMBER = re.compile(r"(?<![\w$.])-?\d+(?:\.\d+)?\b")
+
+_recent: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+
+def _normalize(statement: Any) -> str:
+    if isinstance(statement, bytes):
+        statement = statement.decode("utf-8", "replace")
+    text = _SPACE.sub(" ", str(statement)).strip()
+    return text if len(text) <= _MAX_STATEMENT else text[:_MAX_STATEMENT] + " ..."
+
+
+def is_write(statement: str) -> bool:
+    """True for statements that change data (what read-your-writes has to see)."""
+    if _WRITE_START.match(statement):
+        return True
+    return statement.lstrip()[:4].lower() == "with" and bool(_WRITES.search(statement))  # data-modifying CTE
+
+
+def redact(params: Any) -> Any:
+    """Parameter values replaced by their type names, keeping the shape."""
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: f"<{type(v).__name__}>" for k, v in params.items()}
+    if isinstance(params, (list, tuple)):
+        return [f"<{type(v).__name__}>" for v in params]
+    return f"<{type(params).__name__}>"
+
+
+class QueryStats:
+    """Statements and connection checkouts seen while this collector was current."""
+
+    def __init__(self, label: str = ""):
+        self._lock = threading.Lock()  # sync routes count from a worker thread
+        self.label = label
+        self.queries = 0
+        self.connections = 0
+        self.slow = 0
+        self.seconds = 0.0
+        self.by_statement: Counter = Counter()
+        self.writes: Set[str] = set()  # databases written to (core.replicas reads from the primary after)
+
+    @property
+    def statements(self) -> List[tuple]:
+        """(statement, count) pairs, most repeated first - an N+1 shows up at the top."""
+        with self._lock:
+            return self.by_statement.most_common()
+
+    def _add_query(self, database: str, statement: str, seconds: float, slow: bool) -> None:
+        write = is_write(statement)
+        with self._lock:
+            self.queries += 1
+            self.seconds += seconds
+            self.slow += slow
+            self.by_statement[statement] += 1
+            if write:
+                self.writes.add(database)
+
+    def _add_connection(self) -> None:
+        with self._lock:
+            self.connections += 1
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def start(label: str = "") -> QueryStats:
+    """Begin counting for the current request (called by the middleware)."""
+    stats = QueryStats(label)
+    _current.set(stats)
+    return stats
+
+
+def current() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def capture(label: str = "") -> Iterator[QueryStats]:
+    """Count the queries and connections made inside the block (for tests and scripts)."""
+    stats = QueryStats(label)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def connection_checked_out() -> None:
+    stats = _current.get()
+    if stats is not None:
+        stats._add_connection()
+
+
+def observe(database: str, statement: Any, params: Any, seconds: float, *, rows: Optional[int] = None) -> bool:
+    """Account for one executed statement; logs it if slow. Returns whether it was slow."""
+    text = _normalize(statement)
+    threshold = settings.SLOW_QUERY_MS
+    slow = bool(threshold) and seconds * 1000 >= threshold
+    stats = _current.get()
+    if stats is not None:
+        stats._add_query(database, text, seconds, slow)
+    metrics.DB_QUERIES.inc(database=database)
+    if slow:
+        metrics.DB_SLOW_QUERIES.inc(database=database)
+        entry = {
+            "at": datetime.now().isoformat(timespec="seconds"),
+            "database": database,
+            "ms": round(seconds * 1000, 1),
+            "statement": text,
+            "params": f"{rows} rows" if rows is not None else redact(params),
+            "request": stats.label if stats is not None else None,
+        }
+        _recent.append(entry)
+        logger.warning(
+            f"slow query on {database} ({entry['ms']} ms, {entry['request'] or 'no request'}): "
+            f"{text} params={entry['params']}"
+        )
+    return slow
+
+
+def strip_plan_literals(plan: str) -> str:
+    """EXPLAIN output with the statement's values (quoted, and numbers in conditions) replaced by '?'."""
+    plan = _PLAN_STRING.sub("'?'", plan)
+    return _PLAN_CONDITION.sub(lambda m: m.group(1) + _PLAN_NUMBER.sub("?", m.group(2)), plan)
+
+
+def _sql_text(cur, statement: Any) -> str:
+    """The statement as SQL text; psycopg2.sql objects (Composed, SQL) are rendered for `cur`."""
+    if isinstance(statement, bytes):
+        return statement.decode("utf-8", "replace")
+    if hasattr(statement, "as_string"):
+        return statement.as_string(cur)
+    return str(statement)
+
+
+def _explain(cur, database: str, statement: Any, params: Any) -> None:
+    """Log EXPLAIN (ANALYZE, BUFFERS) for a slow read; never disturbs the caller's transaction."""
+    conn = cur.connection
+    text = _sql_text(cur, statement)
+    savepoint = not conn.autocommit
+    try:
+        with conn.cursor() as ecur:
+            if savepoint:
+                ecur.execute("SAVEPOINT querylog_explain")
+            try:
+                ecur.execute("EXPLAIN (ANALYZE, BUFFERS) " + text, params)
+                plan = strip_plan_literals("\n".join(row[0] for row in ecur.fetchall()))
+            finally:
+                if savepoint:
+                    ecur.execute("ROLLBACK TO SAVEPOINT querylog_explain")
+                    ecur.execute("RELEASE SAVEPOINT querylog_explain")
+    except Exception as e:
+        logger.info(f"EXPLAIN of slow query on {database} failed: {e}")
+        return
+    if _recent and _recent[-1]["statement"] == _normalize(statement):
+        _recent[-1]["plan"] = plan
+    logger.warning(f"plan for slow query on {database}:\n{plan}")
+
+
+def _should_explain(cur, statement: Any) -> bool:
+    rate = settings.SLOW_QUERY_EXPLAIN_SAMPLE
+    if not rate or getattr(cur, "name", None):  # named (server-side) cursors can't be re-run here
+        return False
+    text = _sql_text(cur, statement)
+    if not _READ_ONLY.match(text) or _WRITES.search(text):
+        return False
+    return random.random() < rate
+
+
+def _with_statement_timeout(cur, query):
+    ms = deadline.statement_timeout_ms()
+    if ms is None or getattr(cur, "name", None) or cur.connection.autocommit:
+        return query
+    prefix = f"SET LOCAL statement_timeout = {ms}; "
+    return prefix.encode("ascii") + query if isinstance(query, bytes) else prefix + _sql_text(cur, query)
+
+
+def recent() -> List[Dict[str, Any]]:
+    return list(reversed(_recent))
+
+
+class QueryCursor:
+    """psycopg2 cursor proxy: statement timing, counting and the slow-query log."""
+    __slots__ = ("_cur", "_database")
+
+    def __init__(self, cur, database: str):
+        self._cur = cur
+        self._database = database
+
+    def execute(self, query, vars=None):
+        sent = _with_statement_timeout(self._cur, query)
+        t0 = time.perf_counter()
+        try:
+            with timing.span("db"), deadline.on_abort(self._cur.connection.cancel):
+                return self._cur.execute(sent, vars)
+        finally:
+            slow = observe(self._database, query, vars, time.perf_counter() - t0)
+            if slow and _should_explain(self._cur, query):
+                _explain(self._cur, self._database, query, vars)
+
+    def executemany(self, query, vars_list):
+        vars_list = list(vars_list)
+        deadline.check()
+        t0 = time.perf_counter()
+        try:
+            with timing.span("db"), deadline.on_abort(self._cur.connection.cancel):
+                return self._cur.executemany(query, vars_list)
+        finally:
+            observe(self._database, query, None, time.perf_counter() - t0, rows=len(vars_list))
+
+    def fetchone(self):
+        with timing.span("db", calls=0):
+            return self._cur.fetchone()
+
+    def fetchmany(self, *args, **kwargs):
+        with timing.span("db", calls=0):
+            return self._cur.fetchmany(*args, **kwargs)
+
+    def fetchall(self):
+        with timing.span("db", calls=0):
+            return self._cur.fetchall()
+
+    def __iter__(self):
+        return iter(self._cur)
+
+    def __enter__(self):
+        self._cur.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return self._cur.__exit__(exc_type, exc, tb)
+
+    def __getattr__(self, name):
+        return getattr(self._cur, name)
@@ -0,0 +1,245 @@
+"""
+Read-replica routing for reporting reads.
+
+When a database has a replica DSN configured (ATTENDANCE_DB_REPLICA_DSN,
+INVENTORY_LOGS_REPLICA_DSN, PRODUCTS_DB_REPLICA_DSN), read-only repo paths
+(core.db_async.fetch_all/fetch_one, and sync repos through `read_connection`)
+run on a separate "<name>_replica" pool; everything else, and anything inside
+a unit of work, stays on the primary. Without a replica DSN nothing changes.
+
+A read goes to the primary instead when:
+
+  * the same request already wrote to that database, or the same session
+    (Authorization token, else client address) wrote within
+    REPLICA_STICKY_SECONDS - read-your-writes. Writes are seen by
+    core.querylog; the middleware hands them to `after_request`, which
+    tells the other workers over core.notify;
+  * the replica is more than REPLICA_MAX_LAG seconds behind (measured in a
+    background thread every REPLICA_LAG_CHECK_INTERVAL), or its lag is not
+    known yet, or it is unreachable.
+
+Routing decisions are counted in rm365_db_read_routes_total and the last
+measured lag is exported as rm365_db_replica_lag_seconds; /api/debug/replicas
+shows both per database.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Dict, Optional, Set, Tuple
+
+from core import metrics, notify, querylog
+from core.config import settings
+from core.db import REPLICA_SUFFIX, PoolTimeout, database_names, get_pool, replica_dsn
+
+logger = logging.getLogger(__name__)
+
+_WRITES_CHANNEL = "rm365_db_writes"
+
+_session: ContextVar[Optional[str]] = ContextVar("replica_session", default=None)
+
+
+class _Replica:
+    """Lag tracking for one database's replica; measured off the request path."""
+
+    def __init__(self, database: str):
+        self.database = database
+        self.pool_name = database + REPLICA_SUFFIX
+        self.lag: Optional[float] = None  # None until the first successful check
+        self.error: Optional[str] = None
+        self.checked_at = 0.0
+        self._checking = False
+        self._lock = threading.Lock()
+
+    def _measure(self) -> None:
+        try:
+            conn = get_pool(self.pool_name).getconn()
+            try:
+                with conn.raw.cursor() as cur:  # raw: don't count this against any request
+                    cur.execute(
+                        """
+                        SELECT CASE
+                            WHEN NOT pg_is_in_recovery() THEN 0
+                            WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+                            ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+                        END
+                        """
+                    )
+                    lag = float(cur.fetchone()[0])
+                conn.rollback()
+            finally:
+                conn.close()
+            if self.error:
+                logger.info(f"replica for {self.database} reachable again")
+            self.lag, self.error = lag, None
+            metrics.DB_REPLICA_LAG.set(lag, database=self.database)
+        except Exception as e:
+            if self.error is None:
+                logger.warning(f"replica for {self.database} unavailable, reading from the primary: {e}")
+            self.lag, self.error = None, str(e) or type(e).__name__
+        finally:
+            self.checked_at = time.monotonic()
+            with self._lock:
+                self._checking = False
+
+    def refresh_if_stale(self) -> None:
+        if time.monotonic() - self.checked_at < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._checking:
+                return
+            self._checking = True
+        threading.Thread(target=self._measure, name=f"replica-lag:{self.database}", daemon=True).start()
+
+    def mark_down(self, error: Exception) -> None:
+        """The replica failed a real checkout; stay on the primary until the next check."""
+        self.lag, self.error, self.checked_at = None, str(error) or type(error).__name__, time.monotonic()
+
+    def healthy(self) -> bool:
+        self.refresh_if_stale()
+        return self.lag is not None and self.lag <= settings.REPLICA_MAX_LAG
+
+
+_replicas: Dict[str, _Replica] = {}
+_replicas_lock = threading.Lock()
+
+# (database, session) -> monotonic time until which that session reads from the primary
+_sticky: Dict[Tuple[str, str], float] = {}
+_all_sticky_until = 0.0  # set when cross-worker write notices may have been missed
+
+
+def _replica(database: str) -> Optional[_Replica]:
+    if not replica_dsn(database):
+        return None
+    replica = _replicas.get(database)
+    if replica is None:
+        with _replicas_lock:
+            replica = _replicas.setdefault(database, _Replica(database))
+    return replica
+
+
+def _sticky_reason(database: str) -> Optional[str]:
+    stats = querylog.current()
+    if stats is not None and database in stats.writes:
+        return "primary_own_write"
+    now = time.monotonic()
+    session = _session.get()
+    if session is not None and _sticky.get((database, session), 0.0) > now:
+        return "primary_sticky"
+    if _all_sticky_until > now:
+        return "primary_sticky"
+    return None
+
+
+def route(database: str) -> str:
+    """Pool name a read-only query on `database` should use right now."""
+    replica = _replica(database)
+    if replica is None:
+        return database
+    reason = _sticky_reason(database)
+    if reason is None and not replica.healthy():
+        reason = "primary_lagging" if replica.lag is not None else "primary_replica_down"
+    metrics.DB_READ_ROUTES.inc(database=database, target=reason or "replica")
+    return database if reason else replica.pool_name
+
+
+def is_connection_error(exc: BaseException) -> bool:
+    """Whether `exc` means the replica couldn't be reached (as opposed to a bad query)."""
+    return isinstance(exc, (PoolTimeout, OSError)) or type(exc).__name__ in ("OperationalError", "PoolTimeout", "PoolClosed")
+
+
+def mark_down(database: str, exc: BaseException) -> None:
+    """A read on the replica failed to connect; it is retried on the primary by the caller."""
+    replica = _replicas.get(database)
+    if replica is not None:
+        replica.mark_down(exc)
+    logger.warning(f"replica for {database} failed, using the primary: {exc}")
+    metrics.DB_READ_ROUTES.inc(database=database, target="primary_replica_down")
+
+
+def read_connection(database: str):
+    """Borrow a connection for a read-only query: the replica when `route` allows it, else the primary."""
+    name = route(database)
+    if name != database:
+        try:
+            return get_pool(name).getconn()
+        except Exception as e:
+            if not is_connection_error(e):
+                raise
+            mark_down(database, e)
+    return get_pool(database).getconn()
+
+
+# --- Read-your-writes ------------------------------------------------------------------
+def session_key(authorization: Optional[str], client: Optional[str]) -> str:
+    """Stable, non-reversible key for the caller: their token if any, else their address."""
+    raw = authorization or f"addr:{client or '-'}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+
+def begin_request(session: str) -> None:
+    """Called by the middleware for every request."""
+    _session.set(session)
+
+
+def _mark(database: str, session: str) -> None:
+    now = time.monotonic()
+    _sticky[(database, session)] = now + settings.REPLICA_STICKY_SECONDS
+    if len(_sticky) > 10000:
+        for key in [k for k, until in _sticky.items() if until <= now]:
+            _sticky.pop(key, None)
+
+
+def _on_write_notice(payload: Optional[str]) -> None:
+    global _all_sticky_until
+    if payload is None:  # listener reconnected; notices may have been missed
+        _all_sticky_until = time.monotonic() + settings.REPLICA_STICKY_SECONDS
+        return
+    database, _, session = payload.partition(" ")
+    if session:
+        _mark(database, session)
+
+
+def start() -> None:
+    """Lifespan hook: listen for other workers' writes if any database has a replica."""
+    if any(replica_dsn(d) for d in database_names()):
+        notify.subscribe(_WRITES_CHANNEL, _on_write_notice)
+
+
+def replicated(databases: Set[str]) -> Set[str]:
+    """The subset of `databases` (pool names) whose logical database has a replica."""
+    return {d for d in databases if not d.endswith(REPLICA_SUFFIX) and replica_dsn(d)}
+
+
+def after_request(session: str, databases: Set[str]) -> None:
+    """Make `session` read from the primary for a while after writing to `databases` (blocking)."""
+    for database in databases:
+        _mark(database, session)
+        try:
+            notify.publish(_WRITES_CHANNEL, f"{database} {session}")
+        except Exception as e:
+            logger.warning(f"couldn't broadcast write on {database} to other workers: {e}")
+
+
+def status() -> Dict[str, Any]:
+    now = time.monotonic()
+    out = {}
+    for database in database_names():
+        dsn = replica_dsn(database)
+        replica = _replicas.get(database)
+        out[database] = {
+            "replica_configured": bool(dsn),
+            "lag_seconds": replica.lag if replica else None,
+            "error": replica.error if replica else None,
+            "checked_seconds_ago": round(now - replica.checked_at, 1) if replica and replica.checked_at else None,
+            "sticky_sessions": sum(1 for (db, _), until in list(_sticky.items()) if db == database and until > now),
+        }
+    return {
+        "max_lag": settings.REPLICA_MAX_LAG,
+        "sticky_seconds": settings.REPLICA_STICKY_SECONDS,
+        "all_sticky_for": max(0.0, round(_all_sticky_until - now, 1)),
+        "databases": out,
+    }
@@ -0,0 +1,327 @@
+"""
+Periodic tasks with a single leader across workers and replicas.
+
+Modules register tasks with a cron-like spec; the lifespan hook starts the
+scheduler loop in every worker process, but only the process holding a
+session-level Postgres advisory lock (the leader) actually runs them. If the
+leader dies its connection drops, the lock is released and another process
+takes over within SCHEDULER_LEADER_CHECK seconds.
+
+    from core import scheduler
+
+    @scheduler.task("inventory.adjustments.sync", "*/15 * * * *", jitter=60)
+    def _sync():                      # sync functions run on the threadpool
+        ...
+
+Specs are five cron fields (minute hour day-of-month month day-of-week;
+`*`, `a-b`, `a,b`, `*/n`, `a-b/n`; Sunday is 0), or `@hourly`, `@daily`,
+`@every 90s` / `@every 5m` / `@every 1h`. Times are in SCHEDULER_TIMEZONE.
+An empty spec disables the task (so a setting can turn it off).
+
+A run that is still going when the task is due again is not started twice;
+the skip is counted in rm365_scheduler_overlaps_total. Run durations and
+outcomes are exported too, and /api/debug/scheduler shows the last runs.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, FrozenSet, Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from starlette.concurrency import run_in_threadpool
+
+from core import metrics
+from core.config import settings
+from core.db import open_dedicated_connection
+
+logger = logging.getLogger(__name__)
+
+# pg_try_advisory_lock key for the scheduler leader ("SCHED")
+_LOCK_KEY = 0x5343484544
+
+_ALIASES = {"@hourly": "0 * * * *", "@daily": "0 0 * * *", "@weekly": "0 0 * * 0", "@monthly": "0 0 1 * *"}
+_EVERY = re.compile(r"^@every\s+(\d+)\s*([smh])$")
+_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+
+# --- Specs ---------------------------------------------------------------------------
+def _parse_field(text: str, lo: int, hi: int) -> FrozenSet[int]:
+    values = set()
+    for part in text.split(","):
+        expr, _, step = part.partition("/")
+        step_n = int(step) if step else 1
+        if expr == "*":
+            start, end = lo, hi
+        elif "-" in expr:
+            start, end = (int(x) for x in expr.split("-", 1))
+        else:
+            start = int(expr)
+            end = hi if step else start
+        if not (lo <= start <= end <= hi) or step_n < 1:
+            raise ValueError(f"cron field '{text}' out of range {lo}-{hi}")
+        values.update(range(start, end + 1, step_n))
+    return frozenset(values)
+
+
+@dataclass(frozen=True)
+class Cron:
+    minutes: FrozenSet[int]
+    hours: FrozenSet[int]
+    days: FrozenSet[int]
+    months: FrozenSet[int]
+    weekdays: FrozenSet[int]  # 0 = Sunday
+    any_day: bool
+    any_weekday: bool
+
+    @classmethod
+    def parse(cls, spec: str) -> "Cron":
+        fields = _ALIASES.get(spec.strip(), spec).split()
+        if len(fields) != 5:
+            raise ValueError(f"cron spec '{spec}' needs 5 fields")
+        minute, hour, day, month, weekday = fields
+        weekdays = frozenset(d % 7 for d in _parse_field(weekday, 0, 7))  # 7 is Sunday too
+        return cls(
+            _parse_field(minute, 0, 59), _parse_field(hour, 0, 23), _parse_field(day, 1, 31),
+            _parse_field(month, 1, 12), weekdays, day == "*", weekday == "*",
+        )
+
+    def _day_matches(self, d: datetime) -> bool:
+        if d.month not in self.months:
+            return False
+        dom = d.day in self.days
+        dow = (d.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return dom and dow
+        return dom or dow  # both restricted: either matches, as in cron
+
+    def next_after(self, now: datetime) -> datetime:
+        start = now.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        for _ in range(366 * 5):
+            if self._day_matches(day):
+                for hour in sorted(self.hours):
+                    for minute in sorted(self.minutes):
+                        candidate = day.replace(hour=hour, minute=minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError("cron spec never fires")
+
+
+@dataclass(frozen=True)
+class Every:
+    seconds: float
+
+    def next_after(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=self.seconds)
+
+
+def parse_spec(spec: str):
+    m = _EVERY.match(spec.strip())
+    if m:
+        return Every(int(m.group(1)) * _UNITS[m.group(2)])
+    return Cron.parse(spec)
+
+
+# --- Tasks -----------------------------------------------------------------------------
+@dataclass
+class _Task:
+    name: str
+    spec: str
+    schedule: Any
+    fn: Callable[[], Any]
+    jitter: float
+    due: Optional[datetime] = None
+    running: bool = False
+    last_started: Optional[str] = None
+    last_duration: Optional[float] = None
+    last_error: Optional[str] = None
+    runs: int = 0
+    overlaps: int = 0
+
+    def plan(self, now: datetime) -> None:
+        self.due = self.schedule.next_after(now) + timedelta(seconds=random.uniform(0, self.jitter))
+
+
+_tasks: Dict[str, _Task] = {}
+
+
+def task(name: str, spec: Optional[str], *, jitter: float = 0.0):
+    """Register a periodic task (sync or async, no arguments). Empty spec = disabled."""
+    def decorate(fn: Callable[[], Any]) -> Callable[[], Any]:
+        if spec:
+            _tasks[name] = _Task(name, spec, parse_spec(spec), fn, jitter)
+        return fn
+    return decorate
+
+
+@functools.lru_cache(maxsize=None)
+def _zone(name: str):
+    try:
+        return ZoneInfo(name)
+    except ZoneInfoNotFoundError:  # no tz database in the image
+        logger.warning(f"scheduler: unknown timezone '{name}', using UTC")
+        return timezone.utc
+
+
+def _now() -> datetime:
+    return datetime.now(_zone(settings.SCHEDULER_TIMEZONE)).replace(tzinfo=None)
+
+
+# --- Leadership --------------------------------------------------------------------------
+class _Leader:
+    """Holds the scheduler advisory lock on a dedicated connection while leader."""
+
+    def __init__(self):
+        self.conn = None
+        self.is_leader = False
+
+    def check(self) -> bool:
+        try:
+            if self.conn is None or self.conn.closed:
+                self.is_leader = False
+                self.conn = open_dedicated_connection("attendance")
+                self.conn.autocommit = True
+            with self.conn.cursor() as cur:
+                if self.is_leader:
+                    cur.execute("SELECT 1")  # still connected, so still holding the lock
+                else:
+                    cur.execute("SELECT pg_try_advisory_lock(%s)", (_LOCK_KEY,))
+                    self.is_leader = bool(cur.fetchone()[0])
+                    if self.is_leader:
+                        logger.info("scheduler: this process is now the leader")
+        except Exception as e:
+            if self.is_leader:
+                logger.warning(f"scheduler: lost leadership ({e})")
+            self.is_leader = False
+            self.release()
+        metrics.SCHEDULER_LEADER.set(1 if self.is_leader else 0)
+        return self.is_leader
+
+    def release(self) -> None:
+        conn, self.conn = self.conn, None
+        if conn is not None:
+            try:
+                conn.close()  # ends the session, which releases the lock
+            except Exception:
+                pass
+
+
+class Scheduler:
+    def __init__(self):
+        self._leader = _Leader()
+        self._loop_task: Optional[asyncio.Task] = None
+        self._runs: set = set()
+
+    async def _run(self, t: _Task) -> None:
+        t.running = True
+        t.runs += 1
+        t.last_started = _now().isoformat()
+        started = time.perf_counter()
+        result = "ok"
+        try:
+            if inspect.iscoroutinefunction(t.fn):
+                await t.fn()
+            else:
+                await run_in_threadpool(t.fn)
+            t.last_error = None
+        except Exception as e:
+            result = "error"
+            t.last_error = str(e) or type(e).__name__
+            logger.exception(f"scheduled task {t.name} failed")
+        finally:
+            t.running = False
+            t.last_duration = round(time.perf_counter() - started, 3)
+            metrics.SCHEDULER_RUNS.inc(task=t.name, result=result)
+            metrics.SCHEDULER_RUN_DURATION.observe(t.last_duration, task=t.name)
+
+    def _launch(self, t: _Task) -> None:
+        if t.running:
+            t.overlaps += 1
+            metrics.SCHEDULER_OVERLAPS.inc(task=t.name)
+            logger.warning(f"scheduled task {t.name} still running; skipping this run")
+            return
+        run = asyncio.create_task(self._run(t), name=f"scheduled:{t.name}")
+        self._runs.add(run)
+        run.add_done_callback(self._runs.discard)
+
+    async def _loop(self) -> None:
+        now = _now()
+        for t in _tasks.values():
+            t.plan(now)
+        while True:
+            leader = await run_in_threadpool(self._leader.check)
+            now = _now()
+            for t in _tasks.values():
+                if t.due <= now:
+                    t.plan(now)
+                    if leader:
+                        self._launch(t)
+            next_due = min((t.due for t in _tasks.values()), default=now + timedelta(hours=1))
+            wait = (next_due - _now()).total_seconds()
+            await asyncio.sleep(max(0.5, min(wait, settings.SCHEDULER_LEADER_CHECK)))
+
+    def start(self) -> None:
+        if self._loop_task is None and _tasks:
+            self._loop_task = asyncio.create_task(self._loop(), name="scheduler")
+            logger.info(f"scheduler started: {', '.join(f'{t.name} ({t.spec})' for t in _tasks.values())}")
+
+    async def stop(self) -> None:
+        loop_task, self._loop_task = self._loop_task, None
+        if loop_task is not None:
+            loop_task.cancel()
+            try:
+                await loop_task
+            except asyncio.CancelledError:
+                pass
+        if self._runs:
+            await asyncio.wait(list(self._runs), timeout=settings.SCHEDULER_SHUTDOWN_GRACE)
+        await run_in_threadpool(self._leader.release)
+        metrics.SCHEDULER_LEADER.set(0)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "running": self._loop_task is not None,
+            "leader": self._leader.is_leader,
+            "timezone": settings.SCHEDULER_TIMEZONE,
+            "tasks": [
+                {
+                    "name": t.name,
+                    "spec": t.spec,
+                    "jitter": t.jitter,
+                    "next_run": t.due.isoformat() if t.due else None,
+                    "running": t.running,
+                    "runs": t.runs,
+                    "overlaps": t.overlaps,
+                    "last_started": t.last_started,
+                    "last_duration": t.last_duration,
+                    "last_error": t.last_error,
+                }
+                for t in _tasks.values()
+            ],
+        }
+
+
+_scheduler = Scheduler()
+
+
+def start() -> None:
+    """Lifespan hook (after routers are imported, so every module's tasks are registered)."""
+    if settings.SCHEDULER_ENABLED:
+        _scheduler.start()
+
+
+async def stop() -> None:
+    await _scheduler.stop()
+
+
+def status() -> Dict[str, Any]:
+    return _scheduler.status()
@@ -1,10 +1,13 @@
+import secrets
 from datetime import datetime, timedelta
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 import jwt
 from passlib.context import CryptContext
 from fastapi import Header, HTTPException, status, Depends
 from core.config import settings
 from core.db import get_psycopg_connection
+from core.cache import TTLCache
+from core import executors, notify
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -47,24 +50,108 @@ def parse_allowed_tabs(value) -> list[str]:
         return []
     return [t.strip() for t in s.split(',') if t and t.strip()]
 
-async def get_current_user(authorization: str = Header(...)):
-    token = authorization.split("Bearer ")[-1]
-    payload = decode_token(token)
-    username = payload.get("sub")
-    if not username:
-        raise HTTPException(status_code=401, detail="Invalid token payload")
+# --- Authenticated principal cache --------------------------------------------
+# Resolved {username, role, allowed_tabs} keyed by username. Entries live for at
+# most AUTH_USER_CACHE_TTL seconds, which is also the upper bound on how stale a
+# role can be if a cross-worker invalidation is missed.
+_USER_CHANNEL = "rm365_auth_user_cache"
+_user_cache = TTLCache(
+    ttl=settings.AUTH_USER_CACHE_TTL,
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    name="auth_users",
+)
+_subscribed = False
+
+
+def _on_user_invalidation(payload):
+    # payload is a username, "*" for everything, or None after a listener reconnect
+    if payload and payload != "*":
+        _user_cache.invalidate(payload)
+    else:
+        _user_cache.clear()
+
+
+def _ensure_subscribed():
+    global _subscribed
+    if not _subscribed:
+        _subscribed = True
+        try:
+            notify.subscribe(_USER_CHANNEL, _on_user_invalidation)
+        except Exception as e:
+            print(f"[auth] cache invalidation listener unavailable: {e}")
+
+
+def invalidate_user(*usernames: str) -> None:
+    """Drop cached principals here and signal every other worker to do the same."""
+    for username in usernames:
+        if not username:
+            continue
+        _user_cache.invalidate(username)
+        try:
+            notify.publish(_USER_CHANNEL, username)
+        except Exception as e:
+            print(f"[auth] could not publish cache invalidation for {username}: {e}")
+
+
+def invalidate_all_users() -> None:
+    _user_cache.clear()
+    try:
+        notify.publish(_USER_CHANNEL, "*")
+    except Exception as e:
+        print(f"[auth] could not publish cache invalidation: {e}")
+
 
+def user_cache_stats() -> Dict[str, Any]:
+    return {**_user_cache.stats(), "listening": notify.is_listening()}
+
+
+def _load_user(username: str):
     conn = get_psycopg_connection()
     try:
         cur = conn.cursor()
         cur.execute("SELECT COALESCE(NULLIF(role, ''), 'user') as role, allowed_tabs FROM login_users WHERE username = %s", (username,))
-        row = cur.fetchone()
+        return cur.fetchone()
     finally:
         conn.close()
 
+
+async def get_current_user(authorization: str = Header(...)):
+    token = authorization.split("Bearer ")[-1]
+    payload = decode_token(token)
+    username = payload.get("sub")
+    if not username:
+        raise HTTPException(status_code=401, detail="Invalid token payload")
+
+    cached = _user_cache.get(username) if settings.AUTH_USER_CACHE_TTL > 0 else None
+    if cached is not None:
+        return dict(cached, allowed_tabs=list(cached["allowed_tabs"]))
+
+    _ensure_subscribed()
+    row = await executors.run("db", _load_user, username)
+
     if not row:
         raise HTTPException(status_code=404, detail="User not found")
 
     role = row[0] if row[0] else 'user'
     allowed_tabs = parse_allowed_tabs(row[1])
-    return {"username": username, "role": role, "allowed_tabs": allowed_tabs}
+    user = {"username": username, "role": role, "allowed_tabs": allowed_tabs}
+    if settings.AUTH_USER_CACHE_TTL > 0:
+        _user_cache.set(username, dict(user, allowed_tabs=list(allowed_tabs)))
+    return user
+
+
+async def require_admin(user=Depends(get_current_user)):
+    """get_current_user, for admins only (403 for everyone else)."""
+    if user.get("role") != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin only")
+    return user
+
+
+async def require_metrics_access(authorization: Optional[str] = Header(None)) -> None:
+    """The METRICS_TOKEN bearer token (for scrapers) or an admin's login token."""
+    token = settings.METRICS_TOKEN
+    if token and authorization and secrets.compare_digest(authorization, f"Bearer {token}"):
+        return
+    if not authorization:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
+    await require_admin(await get_current_user(authorization))
@@ -0,0 +1,156 @@
+"""
+State shared by every worker process (and replica).
+
+With several workers, module-level state is per process: each worker would
+refresh its own Zoho access token and keep its own copy of every cache. This
+module keeps short-lived values such as access tokens in a `shared_values`
+table on the main database instead:
+
+    _token = SharedValue("zoho_access_token", fetch)   # fetch() -> (value, ttl_seconds)
+    _token.get()
+
+get() answers from a per-process copy while it is fresh, then from the
+shared row. Only when the shared row is stale as well does one worker, holding
+a transaction-scoped advisory lock on the name, call fetch() and store the
+result; workers that queued on the lock pick up that value instead of
+refreshing again. If the table can't be reached, the worker falls back to
+calling fetch() itself, so a database outage degrades to the old
+one-refresh-per-process behaviour rather than failing.
+
+store()/load() share a computed result the same way, e.g. a status that the
+scheduler leader refreshes and every worker serves.
+
+Caches are kept coherent with core.notify (see core.security for the auth
+user cache), and leader-only work uses advisory locks the same way.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+from core import metrics
+from core.db import get_pool
+
+logger = logging.getLogger(__name__)
+
+# pg_advisory_xact_lock(class, key) namespace for shared values ("SV")
+_LOCK_CLASS = 0x5356
+
+_SELECT_FRESH = """
+    SELECT value, EXTRACT(EPOCH FROM expires_at)::float8
+    FROM shared_values
+    WHERE name = %s AND expires_at > now() + make_interval(secs => %s)
+"""
+
+_UPSERT = """
+    INSERT INTO shared_values (name, value, expires_at, refreshed_at)
+    VALUES (%s, %s, now() + make_interval(secs => %s), now())
+    ON CONFLICT (name) DO UPDATE
+        SET value = EXCLUDED.value, expires_at = EXCLUDED.expires_at, refreshed_at = now()
+    RETURNING EXTRACT(EPOCH FROM expires_at)::float8
+"""
+
+
+class _FetchFailed(Exception):
+    """fetch() itself failed: surface that error instead of retrying it locally."""
+
+
+class SharedValue:
+    """A value refreshed by one worker at a time and read by all of them."""
+
+    def __init__(
+        self,
+        name: str,
+        fetch: Callable[[], Tuple[str, float]],
+        *,
+        database: str = "attendance",
+        margin: float = 60.0,
+    ):
+        self.name = name
+        self.database = database
+        self.margin = margin  # treat values this close to expiry as stale
+        self._fetch = fetch
+        self._lock = threading.Lock()
+        self._value: Optional[str] = None
+        self._expires_at = 0.0
+
+    def _fresh(self) -> bool:
+        return self._value is not None and self._expires_at - self.margin > time.time()
+
+    def get(self) -> str:
+        if self._fresh():
+            return self._value
+        with self._lock:  # one thread per process goes to the database
+            if self._fresh():
+                return self._value
+            try:
+                self._value, self._expires_at = self._load_or_refresh()
+            except _FetchFailed as e:
+                raise e.__cause__ from None
+            except Exception as e:
+                logger.warning(f"shared value '{self.name}' unavailable, refreshing locally: {e}")
+                value, ttl = self._fetch()
+                self._value, self._expires_at = value, time.time() + ttl
+                metrics.SHARED_VALUE_LOOKUPS.inc(name=self.name, result="local_refresh")
+            return self._value
+
+    def _load_or_refresh(self) -> Tuple[str, float]:
+        conn = get_pool(self.database).getconn()
+        try:
+            with conn.cursor() as cur:
+                cur.execute(_SELECT_FRESH, (self.name, self.margin))
+                row = cur.fetchone()
+                if row is None:
+                    cur.execute("SELECT pg_advisory_xact_lock(%s, hashtext(%s))", (_LOCK_CLASS, self.name))
+                    cur.execute(_SELECT_FRESH, (self.name, self.margin))
+                    row = cur.fetchone()  # another worker may have refreshed while we waited
+                if row is not None:
+                    conn.commit()
+                    metrics.SHARED_VALUE_LOOKUPS.inc(name=self.name, result="shared")
+                    return row[0], row[1]
+                try:
+                    value, ttl = self._fetch()
+                except Exception as e:
+                    raise _FetchFailed() from e
+                cur.execute(_UPSERT, (self.name, value, ttl))
+                expires_at = cur.fetchone()[0]
+            conn.commit()
+            metrics.SHARED_VALUE_LOOKUPS.inc(name=self.name, result="refreshed")
+            return value, expires_at
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+
+def store(name: str, value: str, ttl: float, *, database: str = "attendance") -> None:
+    """Publish `value` under `name` for every worker, valid for `ttl` seconds."""
+    conn = get_pool(database).getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_UPSERT, (name, value, ttl))
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+def load(name: str, *, database: str = "attendance") -> Optional[str]:
+    """The value last store()d under `name`, or None if missing or expired."""
+    conn = get_pool(database).getconn()
+    try:
+        with conn.cursor() as cur:
+            cur.execute(_SELECT_FRESH, (name, 0))
+            row = cur.fetchone()
+        conn.commit()
+        return row[0] if row else None
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
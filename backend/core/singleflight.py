@@ -0,0 +1,208 @@
+"""
+Single-flight request coalescing.
+
+When several callers ask for the same expensive thing at the same moment
+(five supervisors opening the inventory page, the overview dashboard's
+parallel report queries), only the first caller - the leader - runs it; the
+others wait for the leader and get the same result (or the same exception).
+Nothing is cached: once the call finishes, the next caller starts a new one.
+
+    from core.singleflight import single_flight
+
+    @single_flight("zoho_inventory_items")
+    def get_zoho_inventory_items(self): ...        # sync: coalesced across worker threads
+
+    @single_flight()
+    async def get_employee_work_hours(self, from_date, to_date, ...): ...   # async: across tasks
+
+Calls are identical when they go to the same function with the same
+arguments after binding defaults (`self`/`cls` is ignored, dicts/lists are
+compared by value). Followers share the leader's result object, so treat it
+as read-only. An async leader runs as its own task, so a caller whose client
+disconnects doesn't cancel the work for everyone else; once every caller has
+gone (core.deadline cancels abandoned requests) the task is cancelled too.
+
+Leader/follower counts per name are exported at /api/metrics
+(rm365_singleflight_calls_total) and as hit rates at /api/debug/singleflight.
+"""
+from __future__ import annotations
+
+import asyncio
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from core import metrics
+
+
+class _Call:
+    __slots__ = ("event", "result", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """One coalescing group: concurrent calls with the same key share one execution."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def _count(self, leader: bool) -> None:
+        with self._lock:
+            if leader:
+                self._leaders += 1
+            else:
+                self._followers += 1
+        metrics.SINGLEFLIGHT_CALLS.inc(name=self.name, role="leader" if leader else "follower")
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run fn(*args, **kwargs) unless a call with `key` is already running; then wait for it."""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        self._count(leader)
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    async def do_async(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Async twin of do(): the leader's coroutine runs as a task every caller awaits."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            task = self._tasks.get(key)
+            leader = task is None or task.done() or task.get_loop() is not loop
+            if leader:
+                task = loop.create_task(fn(*args, **kwargs))
+                self._tasks[key] = task
+                task.add_done_callback(functools.partial(self._forget, key))
+            self._waiters[task] = self._waiters.get(task, 0) + 1
+        self._count(leader)
+        try:
+            return await asyncio.shield(task)
+        finally:
+            with self._lock:
+                left = self._waiters.pop(task) - 1
+                if left:
+                    self._waiters[task] = left
+                abandoned = not left and not task.done()  # every caller has gone
+                if abandoned and self._tasks.get(key) is task:
+                    del self._tasks[key]  # the next caller starts afresh
+            if abandoned:
+                task.cancel()
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        with self._lock:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved; followers already got it
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls) + len(self._tasks)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            total = self._leaders + self._followers
+            return {
+                "name": self.name,
+                "leaders": self._leaders,
+                "coalesced": self._followers,
+                "in_flight": len(self._calls) + len(self._tasks),
+                "hit_rate": round(self._followers / total, 4) if total else None,
+            }
+
+
+_groups: Dict[str, SingleFlight] = {}
+_groups_lock = threading.Lock()
+
+
+def group(name: str) -> SingleFlight:
+    """The process-wide group called `name` (created on first use)."""
+    with _groups_lock:
+        g = _groups.get(name)
+        if g is None:
+            g = _groups[name] = SingleFlight(name)
+        return g
+
+
+def stats() -> Dict[str, Dict[str, Any]]:
+    with _groups_lock:
+        groups = list(_groups.values())
+    return {g.name: g.stats() for g in groups}
+
+
+def _freeze(value: Any) -> Hashable:
+    """Hashable, order-insensitive form of an argument value."""
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    if isinstance(value, (set, frozenset)):
+        return frozenset(_freeze(v) for v in value)
+    try:
+        hash(value)
+    except TypeError:
+        return repr(value)
+    return value
+
+
+def single_flight(name: Optional[str] = None, *, key: Optional[Callable[..., Hashable]] = None):
+    """
+    Decorator: coalesce concurrent identical calls of a sync or async function.
+    `key(*args, **kwargs)` overrides the default argument-based key.
+    """
+    def decorate(fn: Callable[..., Any]) -> Callable[..., Any]:
+        g = group(name or fn.__qualname__)
+        sig = inspect.signature(fn)
+        params = list(sig.parameters)
+        skip_first = bool(params) and params[0] in ("self", "cls")
+
+        def make_key(args, kwargs) -> Hashable:
+            if key is not None:
+                return key(*args, **kwargs)
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            items = list(bound.arguments.items())
+            if skip_first:
+                items = items[1:]
+            return _freeze(items)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                return await g.do_async(make_key(args, kwargs), fn, *args, **kwargs)
+            async_wrapper.single_flight = g
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            return g.do(make_key(args, kwargs), fn, *args, **kwargs)
+        wrapper.single_flight = g
+        return wrapper
+
+    return decorate
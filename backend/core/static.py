@@ -0,0 +1,406 @@
+"""
+Static frontend pipeline: fingerprinted, precompressed assets.
+
+Build step (run before deploying; output goes to frontend/dist by default):
+
+    python -m core.static build                    # ../frontend -> ../frontend/dist
+    python -m core.static build --src X --out Y
+
+- every .js/.css/image/font file is copied as `name.<hash>.ext`, where the
+  hash covers its content and the hashed names of everything it imports, so
+  a change ripples up to the importers and nothing else changes name
+- import specifiers (static and dynamic), CSS url()/@import and HTML
+  src/href attributes are rewritten to the hashed names; HTML pages and
+  partials keep their names because the router fetches them by path
+- `.br` (if brotli is installed) and `.gz` siblings are written next to
+  every text asset, and manifest.json maps source paths to hashed ones
+
+Serving (app.py mounts StaticAssets on the build output when it exists,
+otherwise on the source tree):
+
+- fingerprinted files: `Cache-Control: public, max-age=31536000, immutable`
+- everything else (index.html, html partials): `no-cache`, so browsers
+  revalidate with If-None-Match and get a 304
+- a `.br`/`.gz` sibling is sent when the client accepts it
+- small files (the HTML partials) are kept in memory with their
+  precompressed variants, so navigation never touches the disk
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import posixpath
+import re
+import shutil
+import sys
+import threading
+from collections import OrderedDict
+from email.utils import formatdate
+from mimetypes import guess_type
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from starlette.types import Scope
+
+from core.compression import negotiate
+
+try:
+    import brotli
+except ImportError:  # optional dependency; only .gz siblings are built
+    brotli = None
+
+MANIFEST_NAME = "manifest.json"
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+HASHED_EXTS = {".js", ".css", ".png", ".jpg", ".jpeg", ".gif", ".svg", ".ico", ".webp", ".woff", ".woff2"}
+COMPRESSIBLE_EXTS = {".js", ".css", ".html", ".svg", ".json", ".webmanifest", ".txt"}
+SKIP_EXTS = {".md"}
+MIN_COMPRESS_SIZE = 256
+
+# (prefix)(quote)(specifier)(quote); prefix kept so only the specifier is replaced
+_JS_SPEC = re.compile(r"""(\bfrom\s*|\bimport\s*\(\s*|\bimport\s+)(['"])([^'"\n]+)\2""")
+_CSS_URL = re.compile(r"""(url\(\s*)(['"]?)([^'")\s]+)\2(?=\s*\))""")
+_CSS_IMPORT = re.compile(r"""(@import\s+)(['"])([^'"]+)\2""")
+_HTML_ATTR = re.compile(r"""(\b(?:src|href)\s*=\s*)(['"])([^'"]+)\2""")
+
+
+# --- build ---------------------------------------------------------------------
+def _patterns(rel: str) -> List[re.Pattern]:
+    ext = posixpath.splitext(rel)[1]
+    if ext == ".js":
+        return [_JS_SPEC]
+    if ext == ".css":
+        return [_CSS_URL, _CSS_IMPORT]
+    if ext == ".html":
+        return [_HTML_ATTR, _JS_SPEC]  # inline <script type="module"> imports too
+    return []
+
+
+def _resolve(rel: str, spec: str) -> Optional[str]:
+    """Source-relative path a specifier in `rel` points at, or None for external/odd ones."""
+    if ":" in spec or spec.startswith("//") or "?" in spec or "#" in spec:
+        return None  # external URL, data: URI, query/fragment
+    if spec.startswith("/"):
+        target = spec.lstrip("/")
+    else:
+        target = posixpath.join(posixpath.dirname(rel), spec)
+    target = posixpath.normpath(target)
+    return None if target.startswith("..") else target
+
+
+def _references(rel: str, text: str, files: Set[str]) -> Set[str]:
+    refs = set()
+    for pattern in _patterns(rel):
+        for m in pattern.finditer(text):
+            target = _resolve(rel, m.group(3))
+            if target in files:
+                refs.add(target)
+    return refs
+
+
+def _rewrite(rel: str, text: str, mapping: Dict[str, str]) -> str:
+    def swap(m: re.Match) -> str:
+        spec = m.group(3)
+        target = _resolve(rel, spec)
+        if target not in mapping:
+            return m.group(0)
+        # hashed files stay in the same directory, so only the last segment changes
+        new_spec = spec[: spec.rfind("/") + 1] + posixpath.basename(mapping[target])
+        return f"{m.group(1)}{m.group(2)}{new_spec}{m.group(2)}"
+
+    for pattern in _patterns(rel):
+        text = pattern.sub(swap, text)
+    return text
+
+
+def _strongly_connected(graph: Dict[str, Set[str]]) -> List[List[str]]:
+    """Tarjan's SCCs, emitted dependencies-first (module import cycles share one hash)."""
+    index: Dict[str, int] = {}
+    low: Dict[str, int] = {}
+    stack: List[str] = []
+    on_stack: Set[str] = set()
+    out: List[List[str]] = []
+    counter = 0
+
+    for root in sorted(graph):
+        if root in index:
+            continue
+        work = [(root, iter(sorted(graph[root])))]
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = counter
+                    counter += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(graph[child]))))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                low[parent] = min(low[parent], low[node])
+            if low[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.append(member)
+                    if member == node:
+                        break
+                out.append(sorted(component))
+    return out
+
+
+def _hashed_name(rel: str, digest: str) -> str:
+    stem, ext = posixpath.splitext(rel)
+    return f"{stem}.{digest[:10]}{ext}"
+
+
+def _write_compressed(path: Path, data: bytes) -> None:
+    if path.suffix not in COMPRESSIBLE_EXTS or len(data) < MIN_COMPRESS_SIZE:
+        return
+    path.with_name(path.name + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + ".br").write_bytes(brotli.compress(data, quality=11))
+
+
+def build(src: Path, out: Path) -> Dict[str, str]:
+    """Build the fingerprinted, precompressed tree. Returns source path -> hashed path."""
+    src, out = src.resolve(), out.resolve()
+    files: Dict[str, bytes] = {}
+    for path in sorted(src.rglob("*")):
+        if not path.is_file() or path.suffix in SKIP_EXTS or out in path.parents:
+            continue
+        if any(part.startswith(".") for part in path.relative_to(src).parts):
+            continue
+        files[path.relative_to(src).as_posix()] = path.read_bytes()
+
+    hashable = {rel for rel in files if posixpath.splitext(rel)[1] in HASHED_EXTS}
+    texts = {rel: files[rel].decode("utf-8") for rel in files if _patterns(rel)}
+    graph = {rel: (_references(rel, texts[rel], hashable) if rel in texts else set()) for rel in hashable}
+
+    mapping: Dict[str, str] = {}
+    output: Dict[str, bytes] = {}
+    for component in _strongly_connected(graph):
+        members = set(component)
+        h = hashlib.sha256()
+        for rel in component:
+            h.update(rel.encode() + b"\0" + files[rel] + b"\0")
+            for dep in sorted(graph[rel] - members):
+                h.update(mapping[dep].encode() + b"\0")
+        scc_digest = h.hexdigest()
+        for rel in component:
+            mapping[rel] = _hashed_name(rel, hashlib.sha256(f"{scc_digest}:{rel}".encode()).hexdigest())
+        for rel in component:
+            data = _rewrite(rel, texts[rel], mapping).encode("utf-8") if rel in texts else files[rel]
+            output[mapping[rel]] = data
+
+    for rel, data in files.items():
+        if rel not in hashable:
+            output[rel] = _rewrite(rel, texts[rel], mapping).encode("utf-8") if rel in texts else data
+
+    if out.exists():
+        shutil.rmtree(out)
+    for rel, data in output.items():
+        target = out / rel
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        _write_compressed(target, data)
+
+    (out / MANIFEST_NAME).write_text(json.dumps({"version": 1, "assets": mapping}, indent=2, sort_keys=True))
+    # Cloudflare Pages honours a _headers file when the build output is deployed there
+    rules = [f"/{hashed}\n  Cache-Control: {IMMUTABLE}\n" for hashed in sorted(mapping.values())]
+    (out / "_headers").write_text("".join(rules))
+    return mapping
+
+
+def load_manifest(root: Path) -> Dict[str, str]:
+    """source path -> hashed path from a build's manifest.json ({} if there is none)."""
+    try:
+        data = json.loads((root / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+    return dict(data.get("assets") or {})
+
+
+# --- serving -------------------------------------------------------------------
+class _CachedFile:
+    __slots__ = ("stamp", "media_type", "last_modified", "variants", "size")
+
+    def __init__(self, stamp, media_type: str, last_modified: str, variants: Dict[str, Tuple[bytes, str]]):
+        self.stamp = stamp
+        self.media_type = media_type
+        self.last_modified = last_modified
+        self.variants = variants  # encoding ("identity", "br", "gzip") -> (body, etag)
+        self.size = sum(len(body) for body, _ in variants.values())
+
+
+class MemoryFileCache:
+    """
+    Bounded LRU of small static files and their precompressed siblings,
+    revalidated against the stat() StaticFiles already did for the request.
+    """
+
+    def __init__(self, *, max_file_size: int = 64 * 1024, max_bytes: int = 8 * 1024 * 1024):
+        self.max_file_size = max_file_size
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[str, _CachedFile]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, full_path: str, stat_result: os.stat_result) -> _CachedFile:
+        stamp = (stat_result.st_mtime_ns, stat_result.st_size)
+        with self._lock:
+            entry = self._data.get(full_path)
+            if entry is not None and entry.stamp == stamp:
+                self._data.move_to_end(full_path)
+                self._hits += 1
+                return entry
+            self._misses += 1
+        entry = self._load(full_path, stat_result, stamp)
+        with self._lock:
+            old = self._data.pop(full_path, None)
+            if old is not None:
+                self._bytes -= old.size
+            self._data[full_path] = entry
+            self._bytes += entry.size
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                _, evicted = self._data.popitem(last=False)
+                self._bytes -= evicted.size
+        return entry
+
+    def _load(self, full_path: str, stat_result: os.stat_result, stamp) -> _CachedFile:
+        with open(full_path, "rb") as f:
+            body = f.read()
+        digest = hashlib.md5(body).hexdigest()
+        variants = {"identity": (body, f'"{digest}"')}
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            try:
+                with open(full_path + suffix, "rb") as f:
+                    variants[encoding] = (f.read(), f'"{digest}-{encoding}"')
+            except OSError:
+                pass
+        media_type = guess_type(full_path)[0] or "text/plain"
+        return _CachedFile(stamp, media_type, formatdate(stat_result.st_mtime, usegmt=True), variants)
+
+    def stats(self) -> Dict[str, object]:
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "files": len(self._data),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 4) if total else None,
+            }
+
+
+class StaticAssets(StaticFiles):
+    """
+    StaticFiles with long-lived caching for fingerprinted files, precompressed
+    `.br`/`.gz` siblings and an in-memory cache for small files.
+
+    `site_root` is the root of the whole frontend tree (manifest paths are
+    relative to it), which differs from `directory` for the /js, /css mounts.
+    """
+
+    def __init__(
+        self,
+        *,
+        directory: str,
+        html: bool = False,
+        site_root: Optional[str] = None,
+        immutable: Optional[Set[str]] = None,
+        memory_cache: Optional[MemoryFileCache] = None,
+    ):
+        super().__init__(directory=directory, html=html)
+        self.site_root = os.path.realpath(site_root or directory)
+        self.immutable = immutable or set()
+        self.memory_cache = memory_cache
+
+    def _cache_control(self, full_path: str) -> str:
+        rel = os.path.relpath(os.path.realpath(full_path), self.site_root).replace(os.sep, "/")
+        return IMMUTABLE if rel in self.immutable else REVALIDATE
+
+    def file_response(self, full_path, stat_result, scope: Scope, status_code: int = 200) -> Response:
+        full_path = str(full_path)
+        request_headers = Headers(scope=scope)
+        cache_control = self._cache_control(full_path)
+        accept = request_headers.get("accept-encoding", "")
+
+        cache = self.memory_cache
+        if cache is not None and stat_result.st_size <= cache.max_file_size:
+            entry = cache.get(full_path, stat_result)
+            encoding = negotiate(accept, [e for e in ("br", "gzip") if e in entry.variants]) or "identity"
+            body, etag = entry.variants[encoding]
+            headers = {"ETag": etag, "Last-Modified": entry.last_modified, "Cache-Control": cache_control}
+            if len(entry.variants) > 1:
+                headers["Vary"] = "Accept-Encoding"
+            if encoding != "identity":
+                headers["Content-Encoding"] = encoding
+            if status_code == 200 and self.is_not_modified(Headers(headers), request_headers):
+                return NotModifiedResponse(Headers(headers))
+            return Response(body, status_code=status_code, headers=headers, media_type=entry.media_type)
+
+        media_type = guess_type(full_path)[0] or "text/plain"
+        siblings = {}
+        for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+            try:
+                siblings[encoding] = (full_path + suffix, os.stat(full_path + suffix))
+            except OSError:
+                pass
+        encoding = negotiate(accept, list(siblings)) if siblings else None
+        if encoding:
+            path, sibling_stat = siblings[encoding]
+            response = FileResponse(
+                path, status_code=status_code, stat_result=sibling_stat, media_type=media_type,
+                headers={"Content-Encoding": encoding},
+            )
+        else:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, media_type=media_type)
+        response.headers["Cache-Control"] = cache_control
+        if siblings:
+            response.headers["Vary"] = "Accept-Encoding"
+        if status_code == 200 and self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    frontend = Path(__file__).resolve().parent.parent.parent / "frontend"
+    parser = argparse.ArgumentParser(description="Build the fingerprinted, precompressed frontend")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="hash, rewrite and precompress the frontend")
+    p.add_argument("--src", type=Path, default=frontend)
+    p.add_argument("--out", type=Path, default=frontend / "dist")
+    args = parser.parse_args(argv)
+
+    mapping = build(args.src, args.out)
+    print(f"[static] {len(mapping)} fingerprinted assets -> {args.out}")
+    print(f"[static] precompressed: gzip{', br' if brotli is not None else ' (install brotli for .br)'}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Per-request timing spans, emitted as a `Server-Timing` response header.
+
+core.middleware starts a collector for every request; the DB layer, the
+outbound HTTP helpers and core.responses add time to named spans
+("db", "zoho", "sgi", "render"). Browser devtools then show where a slow
+call spent its time. Outside a request (scripts, startup) spans are no-ops.
+
+    from core import timing
+    with timing.span("db"):
+        cur.execute(...)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+DESCRIPTIONS = {
+    "db": "Postgres",
+    "zoho": "Zoho API",
+    "zoho_accounts": "Zoho OAuth",
+    "sgi": "SGI fingerprint service",
+    "render": "JSON rendering",
+    "total": "Total",
+}
+
+
+class Timings:
+    """Accumulated duration and call count per span name for one request."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # sync routes record from a worker thread
+        self.spans: Dict[str, List[float]] = {}
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        with self._lock:
+            entry = self.spans.setdefault(name, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += calls
+
+    def header(self, total: Optional[float] = None) -> str:
+        with self._lock:
+            items = [(k, v[0], v[1]) for k, v in self.spans.items()]
+        parts = []
+        for name, seconds, count in items:
+            desc = DESCRIPTIONS.get(name, name)
+            if count > 1:
+                desc = f"{desc} ({count} calls)"
+            parts.append(f'{name};dur={seconds * 1000:.1f};desc="{desc}"')
+        if total is not None:
+            parts.append(f'total;dur={total * 1000:.1f};desc="{DESCRIPTIONS["total"]}"')
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[Timings]] = ContextVar("server_timing", default=None)
+
+
+def start() -> Timings:
+    """Begin collecting spans for the current request (called by the middleware)."""
+    timings = Timings()
+    _current.set(timings)
+    return timings
+
+
+def current() -> Optional[Timings]:
+    return _current.get()
+
+
+def record(name: str, seconds: float) -> None:
+    timings = _current.get()
+    if timings is not None:
+        timings.add(name, seconds)
+
+
+@contextmanager
+def span(name: str, calls: int = 1) -> Iterator[None]:
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - t0, calls)
+
@@ -0,0 +1,168 @@
+"""
+Request-scoped unit of work.
+
+One UnitOfWork holds at most one borrowed connection per logical database
+("attendance", "inventory", ...) and runs everything on it inside a single
+transaction that is committed or rolled back once, at the end. Repos that are
+given a UnitOfWork fetch their connection from it instead of the pool; the
+connection they get back ignores the repo's own commit()/close() calls, so
+existing repo code works unchanged and a multi-step service call becomes one
+atomic transaction on one connection.
+
+Without a UnitOfWork, repos keep their old behaviour (own connection, own
+commit), which is what scripts and background code still use.
+"""
+from __future__ import annotations
+
+import logging
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+from core import dbregistry
+
+logger = logging.getLogger(__name__)
+
+
+class UowConnection:
+    """
+    Connection handed to repos inside a unit of work.
+
+    commit() and close() are deferred to the unit of work. rollback() rolls
+    back to the innermost savepoint if the service opened one, otherwise it
+    rolls back the transaction and marks the unit of work as failed so the
+    final commit becomes a rollback.
+    """
+    __slots__ = ("_uow", "_database", "_conn")
+
+    def __init__(self, uow: "UnitOfWork", database: str, conn):
+        self._uow = uow
+        self._database = database
+        self._conn = conn
+
+    @property
+    def raw(self):
+        return getattr(self._conn, "raw", self._conn)
+
+    def commit(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def rollback(self) -> None:
+        self._uow._rollback_requested(self._database)
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    # `with conn:` inside a unit of work: nothing on success, rollback on error
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.rollback()
+        return False
+
+
+class UnitOfWork:
+    def __init__(self):
+        self._conns: Dict[str, object] = {}
+        self._savepoints: Dict[str, List[str]] = {}
+        self._failed = False
+        self._closed = False
+
+    def connection(self, database: str = "attendance", connect: Optional[Callable[[], object]] = None) -> UowConnection:
+        """
+        Connection for `database`, borrowed on first use and reused afterwards.
+        It comes from core.dbregistry (so inventory falls back to the main
+        database while unavailable); `connect` overrides how it is opened.
+        """
+        if self._closed:
+            raise RuntimeError("unit of work is already closed")
+        conn = self._conns.get(database)
+        if conn is None:
+            conn = connect() if connect else dbregistry.connection(database)
+            self._conns[database] = conn
+        return UowConnection(self, database, conn)
+
+    @contextmanager
+    def savepoint(self, database: str = "attendance", connect: Optional[Callable[[], object]] = None) -> Iterator[None]:
+        """
+        Optional sub-transaction: a failure inside the block (exception or a
+        repo calling rollback()) only undoes the block, not the whole unit of work.
+        """
+        conn = self.connection(database, connect)._conn
+        stack = self._savepoints.setdefault(database, [])
+        name = f"uow_sp_{len(stack) + 1}"
+        with conn.cursor() as cur:
+            cur.execute(f"SAVEPOINT {name}")
+        stack.append(name)
+        try:
+            yield
+        except Exception:
+            if stack and stack[-1] == name:
+                self._rollback_to(conn, name)
+            raise
+        finally:
+            if stack and stack[-1] == name:
+                stack.pop()
+        with conn.cursor() as cur:
+            cur.execute(f"RELEASE SAVEPOINT {name}")
+
+    def _rollback_to(self, conn, name: str) -> None:
+        with conn.cursor() as cur:
+            cur.execute(f"ROLLBACK TO SAVEPOINT {name}")
+
+    def _rollback_requested(self, database: str) -> None:
+        conn = self._conns.get(database)
+        stack = self._savepoints.get(database)
+        if stack:
+            # leave the savepoint on the stack; savepoint() releases it on exit
+            self._rollback_to(conn, stack[-1])
+            return
+        self._failed = True
+        if conn is not None:
+            conn.rollback()
+
+    @property
+    def failed(self) -> bool:
+        return self._failed
+
+    def commit(self) -> None:
+        """Commit every connection used (or roll back if a repo asked for it)."""
+        if self._failed:
+            self.rollback()
+            return
+        for conn in self._conns.values():
+            conn.commit()
+
+    def rollback(self) -> None:
+        for database, conn in self._conns.items():
+            try:
+                conn.rollback()
+            except Exception as e:
+                logger.warning(f"Unit of work rollback on '{database}' failed: {e}")
+
+    def close(self) -> None:
+        """Return every borrowed connection to its pool (uncommitted work is rolled back by the pool)."""
+        self._closed = True
+        conns, self._conns = self._conns, {}
+        for conn in conns.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        finally:
+            self.close()
+        return False
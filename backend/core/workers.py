@@ -0,0 +1,97 @@
+"""
+Worker-process sizing and fork hygiene for the production launcher.
+
+`python scripts/start_server.py --prod` runs gunicorn with uvicorn workers
+(see gunicorn.conf.py). The worker count comes from WEB_CONCURRENCY, or when
+that is 0, from the CPU quota and memory limit the container actually gets
+(cgroup v2/v1, falling back to the host), capped at WEB_MAX_WORKERS:
+
+    python -m core.workers      # print the detected CPUs, memory and worker count
+
+With WEB_PRELOAD the app is imported once in the master and forked. Nothing
+at import time should hold connections or threads, but post_fork() drops
+anything a worker inherited anyway, so no two processes share a socket.
+"""
+from __future__ import annotations
+
+import math
+import os
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.config import settings
+
+_CGROUP = Path("/sys/fs/cgroup")
+
+
+def _read(path: Path) -> Optional[str]:
+    try:
+        return path.read_text().strip()
+    except OSError:
+        return None
+
+
+def cpu_limit() -> float:
+    """CPUs this process may use: cgroup quota if set, else the affinity mask / host count."""
+    try:
+        cpus = float(len(os.sched_getaffinity(0)))
+    except AttributeError:  # not on Linux
+        cpus = float(os.cpu_count() or 1)
+    quota = None
+    v2 = _read(_CGROUP / "cpu.max")  # "max 100000" or "200000 100000"
+    if v2:
+        limit, _, period = v2.partition(" ")
+        if limit != "max" and period:
+            quota = int(limit) / int(period)
+    else:
+        limit, period = _read(_CGROUP / "cpu" / "cpu.cfs_quota_us"), _read(_CGROUP / "cpu" / "cpu.cfs_period_us")
+        if limit and period and int(limit) > 0:
+            quota = int(limit) / int(period)
+    return min(cpus, quota) if quota else cpus
+
+
+def memory_limit() -> Optional[int]:
+    """Bytes of memory available to this container (or host), None if unknown."""
+    for path in (_CGROUP / "memory.max", _CGROUP / "memory" / "memory.limit_in_bytes"):
+        value = _read(path)
+        if value and value.isdigit() and int(value) < 1 << 60:  # v1 reports "no limit" as a huge number
+            return int(value)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def worker_count() -> int:
+    if settings.WEB_CONCURRENCY > 0:
+        return settings.WEB_CONCURRENCY
+    by_cpu = 2 * math.ceil(cpu_limit()) + 1
+    memory = memory_limit()
+    # leave ~20% for the master, page cache and spikes
+    by_memory = int(memory * 0.8 // (settings.WEB_WORKER_MEMORY_MB * 1024 * 1024)) if memory else by_cpu
+    return max(1, min(by_cpu, by_memory, settings.WEB_MAX_WORKERS))
+
+
+def sizing() -> Dict[str, object]:
+    memory = memory_limit()
+    return {
+        "cpus": round(cpu_limit(), 2),
+        "memory_mb": memory // (1024 * 1024) if memory else None,
+        "worker_memory_mb": settings.WEB_WORKER_MEMORY_MB,
+        "max_workers": settings.WEB_MAX_WORKERS,
+        "configured": settings.WEB_CONCURRENCY or None,
+        "workers": worker_count(),
+    }
+
+
+def post_fork() -> None:
+    """Run in each new worker: forget DB pools and listeners inherited from the master."""
+    from core import db, notify
+
+    db.reset_after_fork()
+    notify.reset_after_fork()
+
+
+if __name__ == "__main__":
+    for key, value in sizing().items():
+        print(f"{key:>18}: {value}")
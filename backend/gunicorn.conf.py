@@ -0,0 +1,33 @@
+# backend/gunicorn.conf.py
+# Production server settings, used by `python scripts/start_server.py --prod`.
+# Sizes and limits come from core.config (WEB_*); see core.workers.
+import os
+
+from core import workers as _workers
+from core.config import settings
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8080')}"
+workers = _workers.worker_count()
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app once in the master; workers fork with it already loaded
+preload_app = settings.WEB_PRELOAD
+
+# Recycle workers now and then (bounded memory growth), staggered by the jitter
+max_requests = settings.WEB_MAX_REQUESTS
+max_requests_jitter = settings.WEB_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT
+timeout = settings.WEB_TIMEOUT
+keepalive = 5
+
+accesslog = None  # request logging/metrics happen in core.middleware
+errorlog = "-"
+forwarded_allow_ips = "*"  # Railway's proxy sets X-Forwarded-*
+
+
+def when_ready(server):
+    server.log.info(f"[boot] {workers} workers ({_workers.sizing()})")
+
+
+def post_fork(server, worker):
+    _workers.post_fork()
@@ -1,30 +1,28 @@
 # modules/_integrations/zoho/client.py
-import time
-import requests
-from typing import Optional
+from typing import Optional, Tuple
+from core import outbound
 from core.config import settings
+from core.shared_state import SharedValue
 
 # Config (env-driven). You already have these in core.config.Settings.
 CLIENT_ID: Optional[str] = settings.ZC_CLIENT_ID
 CLIENT_SECRET: Optional[str] = settings.ZC_CLIENT_SECRET
 REFRESH_TOKEN: Optional[str] = settings.ZC_REFRESH_TOKEN
 
-# Optional override if you’re in EU/IN/… (defaults to .com)
-# e.g. set ZOHO_ACCOUNTS_BASE=https://accounts.zoho.eu in your .env
-ACCOUNTS_BASE: str = getattr(settings, "ZOHO_ACCOUNTS_BASE", "https://accounts.zoho.com")
+# Accounts and Inventory API roots (EU data centre unless ZOHO_ACCOUNTS_BASE /
+# ZOHO_INVENTORY_BASE say otherwise, e.g. https://accounts.zoho.com)
+ACCOUNTS_BASE: str = settings.ZOHO_ACCOUNTS_BASE.rstrip("/")
+INVENTORY_BASE: str = settings.ZOHO_INVENTORY_BASE.rstrip("/")
 
-_cached_token: Optional[str] = None
-_last_refresh: float = 0.0
-# Be conservative: refresh every 45 minutes
+# Be conservative: refresh every 45 minutes (Zoho tokens last an hour)
 _TOKEN_TTL: int = 2700
 
 def _require_creds():
     if not (CLIENT_ID and CLIENT_SECRET and REFRESH_TOKEN):
         raise RuntimeError("Zoho OAuth creds aren’t configured (ZC_CLIENT_ID/SECRET/REFRESH_TOKEN).")
 
-def _refresh_token() -> str:
-    """Exchange the refresh token for a new access token."""
-    global _cached_token, _last_refresh
+def _refresh_token() -> Tuple[str, float]:
+    """Exchange the refresh token for a new access token; returns (token, ttl seconds)."""
     _require_creds()
 
     url = f"{ACCOUNTS_BASE}/oauth/v2/token"
@@ -34,7 +32,7 @@ def _refresh_token() -> str:
         "client_secret": CLIENT_SECRET,
         "refresh_token": REFRESH_TOKEN,
     }
-    resp = requests.post(url, data=data, timeout=20)
+    resp = outbound.request("zoho_accounts", "POST", url, data=data, timeout=20)
     if not resp.ok:
         try:
             detail = resp.json()
@@ -47,16 +45,19 @@ def _refresh_token() -> str:
     if not token:
         raise RuntimeError(f"Zoho token refresh response didn’t include access_token: {body}")
 
-    _cached_token = token
-    _last_refresh = time.time()
-    return _cached_token
+    try:
+        ttl = min(float(body.get("expires_in") or _TOKEN_TTL), _TOKEN_TTL)
+    except (TypeError, ValueError):
+        ttl = _TOKEN_TTL
+    return token, ttl
+
+# One token for all workers: whichever worker finds it stale refreshes it,
+# the rest reuse it (see core.shared_state).
+_token = SharedValue("zoho_access_token", _refresh_token)
 
 def _get_cached_token() -> str:
     """Return a valid access token, refreshing if stale."""
-    global _cached_token, _last_refresh
-    if not _cached_token or (time.time() - _last_refresh) > _TOKEN_TTL:
-        return _refresh_token()
-    return _cached_token
+    return _token.get()
 
 def get_cached_creator_token() -> str:
     """Historically used for Zoho Creator; same token if scopes are combined."""
@@ -66,6 +67,10 @@ def get_cached_inventory_token() -> str:
     """Historically used for Zoho Inventory; same token if scopes are combined."""
     return _get_cached_token()
 
+def inventory_url(path: str) -> str:
+    """Zoho Inventory API URL for `path`, e.g. inventory_url("items/123")."""
+    return f"{INVENTORY_BASE}/{path.lstrip('/')}"
+
 def zoho_auth_header() -> dict:
     """Convenience: Authorization header for requests."""
     return {"Authorization": f"Zoho-oauthtoken {_get_cached_token()}"}
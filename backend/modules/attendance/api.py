@@ -4,40 +4,50 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, Query
 
-from common.deps import get_current_user
+from common.deps import get_current_user, etag_for, UnitOfWorkDep
+from core import executors
+from core.uow import UnitOfWork
 from .schemas import ClockRequest, FingerClockRequest
+from .repo import AsyncAttendanceRepo
 from .service import AttendanceService
 
 router = APIRouter()
 
-def _svc() -> AttendanceService:
-    return AttendanceService()
+def _svc(uow: UnitOfWork | None = None) -> AttendanceService:
+    return AttendanceService(uow=uow)
+
+def _async_svc() -> AttendanceService:
+    # read-only overview/report routes: awaited on the event loop, no worker thread held
+    return AttendanceService(repo=AsyncAttendanceRepo())
 @router.get("/employees")
-def list_employees(user=Depends(get_current_user)):
-    return _svc().list_employees_brief()
+async def list_employees(user=Depends(get_current_user), _etag=etag_for("employees")):
+    return await _async_svc().list_employees_brief()
 
 @router.get("/employees/status")
-def list_employees_with_status(
+async def list_employees_with_status(
     location: Optional[str] = Query(None),
     name_search: Optional[str] = Query(None),
     user=Depends(get_current_user)
 ):
-    return _svc().list_employees_with_status(location, name_search)
+    return await _async_svc().list_employees_with_status(location, name_search)
 
 @router.get("/locations")
-def get_locations(user=Depends(get_current_user)):
+async def get_locations(user=Depends(get_current_user), _etag=etag_for("employees")):
     """Get all available employee locations."""
-    return _svc().get_locations()
+    return await _async_svc().get_locations()
 @router.post("/clock")
-def clock(body: ClockRequest, user=Depends(get_current_user)):
-    direction = _svc().toggle_clock(body.employee_id)
+def clock(body: ClockRequest, user=Depends(get_current_user), uow=UnitOfWorkDep):
+    direction = _svc(uow).toggle_clock(body.employee_id)
     return {"status": "success", "direction": direction}
 
 @router.post("/clock-by-fingerprint")
+@executors.offload("external")  # SGI matcher, once per enrolled employee
 def clock_by_fingerprint(body: FingerClockRequest, user=Depends(get_current_user)):
+    # no UnitOfWorkDep: its connection would sit idle in a transaction through
+    # the whole matcher loop; the service opens one around the clock write only
     return _svc().clock_by_fingerprint(body.template_b64)
 @router.get("/logs")
-def logs(
+async def logs(
     from_date: date = Query(...),
     to_date: date = Query(...),
     search: Optional[str] = Query(None),
@@ -45,29 +55,29 @@ def logs(
     name_search: Optional[str] = Query(None),
     user=Depends(get_current_user),
 ):
-    return _svc().get_logs(from_date, to_date, search, location, name_search)
+    return await _async_svc().get_logs(from_date, to_date, search, location, name_search)
 
 @router.get("/summary")
-def summary(
+async def summary(
     from_date: date = Query(...),
     to_date: date = Query(...),
     location: Optional[str] = Query(None),
     name_search: Optional[str] = Query(None),
     user=Depends(get_current_user),
 ):
-    return _svc().get_summary(from_date, to_date, location, name_search)
+    return await _async_svc().get_summary(from_date, to_date, location, name_search)
 
 @router.get("/daily-stats")
-def daily_stats(
+async def daily_stats(
     location: Optional[str] = Query(None),
     name_search: Optional[str] = Query(None),
     user=Depends(get_current_user)
 ):
     """Get today's attendance statistics."""
-    return _svc().get_daily_stats(location, name_search)
+    return await _async_svc().get_daily_stats(location, name_search)
 
 @router.get("/weekly-chart")
-def weekly_chart(
+async def weekly_chart(
     from_date: date = Query(...),
     to_date: date = Query(...),
     location: Optional[str] = Query(None),
@@ -75,10 +85,10 @@ def weekly_chart(
     user=Depends(get_current_user),
 ):
     """Get weekly attendance data for chart visualization."""
-    return _svc().get_weekly_attendance_chart(from_date, to_date, location, name_search)
+    return await _async_svc().get_weekly_attendance_chart(from_date, to_date, location, name_search)
 
 @router.get("/work-hours")
-def work_hours(
+async def work_hours(
     from_date: date = Query(...),
     to_date: date = Query(...),
     location: Optional[str] = Query(None),
@@ -86,4 +96,4 @@ def work_hours(
     user=Depends(get_current_user),
 ):
     """Calculate work hours for each employee in the date range."""
-    return _svc().get_employee_work_hours(from_date, to_date, location, name_search)
+    return await _async_svc().get_employee_work_hours(from_date, to_date, location, name_search)
@@ -4,9 +4,9 @@ from dataclasses import dataclass
 from datetime import date
 from typing import Any, Dict, List, Optional
 
-import httpx
-
-from .repo import AttendanceRepo
+from core import deadline, outbound
+from core.uow import UnitOfWork
+from .repo import AttendanceRepo, AsyncAttendanceRepo
 
 # Local SecuGen endpoints (same order you used previously)
 _SGI_ENDPOINTS = [
@@ -17,6 +17,7 @@ _SGI_ENDPOINTS = [
     "http://localhost:8080/SGIMatchScore",
     "http://127.0.0.1:8080/SGIMatchScore",
 ]
+_sgi_endpoint: Optional[str] = None  # last endpoint that answered; tried first
 
 @dataclass
 class Match:
@@ -25,8 +26,13 @@ class Match:
     score: int
 
 class AttendanceService:
-    def __init__(self, repo: AttendanceRepo | None = None):
-        self.repo = repo or AttendanceRepo()
+    """
+    The read methods below are plain pass-throughs, so the same service works
+    over AttendanceRepo (returns values) or AsyncAttendanceRepo (returns
+    awaitables for async routes).
+    """
+    def __init__(self, repo: AttendanceRepo | AsyncAttendanceRepo | None = None, uow: UnitOfWork | None = None):
+        self.repo = repo or AttendanceRepo(uow)
 
     def list_employees_brief(self) -> List[Dict[str, Any]]:
         return self.repo.list_employees_brief()
@@ -42,6 +48,7 @@ class AttendanceService:
         """
         Toggle IN/OUT for the given employee, based on today's latest direction.
         Uses lowercase 'in'/'out' just like your original data.
+        With a unit of work the read and the insert share one transaction.
         """
         last = self.repo.latest_direction_today(employee_id)
         direction = "in" if last != "in" else "out"
@@ -75,6 +82,7 @@ class AttendanceService:
         best = Match(employee_id=-1, name="", score=-1)
 
         for cand in candidates:
+            deadline.check()  # a slow matcher shouldn't keep a kiosk scan going past its deadline
             cand_b64 = base64.b64encode(cand["tpl_bytes"]).decode("ascii")
             score = self._sgi_match_score(live_template_b64, cand_b64, template_format)
             if score is None:
@@ -87,11 +95,17 @@ class AttendanceService:
         return None
 
     def clock_by_fingerprint(self, live_template_b64: str) -> Dict[str, Any]:
+        """
+        Match the probe with no connection held (templates come from a read
+        connection that is returned first), then clock the match in a short
+        unit of work of its own.
+        """
         match = self.identify_best_match(live_template_b64)
         if not match:
             return {"status": "error", "message": "No matching fingerprint found"}
 
-        direction = self.toggle_clock(match.employee_id)
+        with UnitOfWork() as uow:
+            direction = AttendanceService(uow=uow).toggle_clock(match.employee_id)
         return {
             "status": "success",
             "message": f"Clocked {direction.upper()} for {match.name}",
@@ -101,23 +115,31 @@ class AttendanceService:
 
     @staticmethod
     def _sgi_match_score(live_b64: str, cand_b64: str, template_format: str = "ANSI") -> Optional[int]:
+        global _sgi_endpoint
+        import httpx  # deferred: only the fingerprint kiosk path needs it
         payload = {
             "Template1": live_b64,
             "Template2": cand_b64,
             "TemplateFormat": template_format,
         }
-        for ep in _SGI_ENDPOINTS:
-            try:
-                with httpx.Client(verify=False, timeout=5.0) as client:
-                    r = client.post(ep, json=payload)
-                    if r.status_code != 200:
-                        continue
-                    data = r.json()
-                    if data.get("ErrorCode") != 0:
-                        continue
-                    score = data.get("Score")
-                    if isinstance(score, int):
-                        return score
-            except Exception:
-                continue
+        endpoints = _SGI_ENDPOINTS if _sgi_endpoint is None else [_sgi_endpoint] + [ep for ep in _SGI_ENDPOINTS if ep != _sgi_endpoint]
+        # one guarded call per comparison: fails fast (503) while the matcher is down or saturated
+        with outbound.guard("sgi"):
+            for ep in endpoints:
+                try:
+                    with httpx.Client(verify=False) as client:
+                        r = outbound.call("sgi", "POST", client.post, ep, json=payload, timeout=5.0)
+                        if r.status_code != 200:
+                            continue
+                        data = r.json()
+                        if data.get("ErrorCode") != 0:
+                            continue
+                        score = data.get("Score")
+                        if isinstance(score, int):
+                            _sgi_endpoint = ep
+                            return score
+                except deadline.DeadlineExceeded:
+                    raise
+                except Exception:
+                    continue
         return None
@@ -3,7 +3,9 @@ from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from common.deps import get_current_user
+from common.deps import get_current_user, etag_for, UnitOfWorkDep
+from core import executors
+from core.uow import UnitOfWork
 from common.dto import (
     EmployeeOut, EnrollResponse, ScanCardResponse, FingerprintScanResponse, BulkDeleteResult
 )
@@ -14,17 +16,16 @@ from .service import EnrollmentService
 
 router = APIRouter()
 
-def _svc() -> EnrollmentService:
-    return EnrollmentService()
+def _svc(uow: UnitOfWork | None = None) -> EnrollmentService:
+    return EnrollmentService(uow=uow)
 @router.get("/employees", response_model=List[EmployeeOut])
-def list_employees(user=Depends(get_current_user)):
-    rows = _svc().list_employees()
-    # map rows (dicts) into EmployeeOut; unknown keys are ignored
-    return [EmployeeOut(**row) for row in rows]
+def list_employees(user=Depends(get_current_user), _etag=etag_for("employees")):
+    # rows (dicts) are validated into EmployeeOut once by response_model; unknown keys are ignored
+    return _svc().list_employees()
 
 @router.post("/employees", response_model=EnrollResponse)
-def create_employee(body: EmployeeCreateIn, user=Depends(get_current_user)):
-    result = _svc().create_employee(
+def create_employee(body: EmployeeCreateIn, user=Depends(get_current_user), uow=UnitOfWorkDep):
+    result = _svc(uow).create_employee(
         name=body.name, location=body.location, status=body.status, card_uid=body.card_uid
     )
     return EnrollResponse(employee=EmployeeOut(**result["employee"]))
@@ -54,6 +55,7 @@ def bulk_delete(body: BulkDeleteIn, user=Depends(get_current_user)):
         print(f"[Bulk Delete] Error: {e}")
         raise HTTPException(status_code=500, detail=f"Bulk delete failed: {str(e)}")
 @router.post("/scan/card", response_model=ScanCardResponse)
+@executors.offload("hardware")
 def scan_card(user=Depends(get_current_user)):
     result = _svc().scan_card()
     # status: 'scanned' or 'error'; uid may be None
@@ -63,6 +65,7 @@ def scan_card(user=Depends(get_current_user)):
 def save_card(body: SaveCardIn, user=Depends(get_current_user)):
     return _svc().save_card(body.employee_id, body.uid)
 @router.post("/scan/fingerprint", response_model=FingerprintScanResponse)
+@executors.offload("hardware")
 def scan_fingerprint(user=Depends(get_current_user)):
     result = _svc().scan_fingerprint()
     return FingerprintScanResponse(status=result["status"], template_b64=result.get("template_b64"))
@@ -2,15 +2,19 @@ from __future__ import annotations
 from typing import Any, Dict, List, Optional
 
 from common.deps import pg_conn
+from core.uow import UnitOfWork
 from common.utils import cursor_to_dicts
 
 class EnrollmentRepo:
+    def __init__(self, uow: Optional[UnitOfWork] = None):
+        self.uow = uow
+
     def list_employees(self) -> List[Dict[str, Any]]:
         """
         Returns employees with a derived has_fingerprint flag,
         matching your old manager/routes expectations.
         """
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """
@@ -29,9 +33,13 @@ class EnrollmentRepo:
     def get_last_employee_code(self) -> Optional[str]:
         """
         Fetch the highest EMP### code to generate the next one.
+        Inside a unit of work this also takes a transaction-scoped lock, so two
+        concurrent enrollments can't both read the same code before inserting.
         """
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
+                if self.uow:
+                    cur.execute("SELECT pg_advisory_xact_lock(hashtext(%s))", ("employees.employee_code",))
                 cur.execute(
                     """
                     SELECT employee_code
@@ -46,7 +54,7 @@ class EnrollmentRepo:
         # :contentReference[oaicite:2]{index=2}
     def create_employee(self, *, name: str, location: Optional[str], status: Optional[str],
                         employee_code: str, card_uid: Optional[str]) -> Dict[str, Any]:
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """
@@ -88,7 +96,7 @@ class EnrollmentRepo:
          RETURNING id, name, employee_code, location, status, card_uid,
                    (fingerprint_template IS NOT NULL) AS has_fingerprint
         """
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 cur.execute(sql, vals)
                 row = cur.fetchone()
@@ -101,7 +109,7 @@ class EnrollmentRepo:
         # :contentReference[oaicite:4]{index=4}
 
     def get_employee(self, employee_id: int) -> Dict[str, Any]:
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     """
@@ -120,7 +128,7 @@ class EnrollmentRepo:
         }
 
     def delete_employee(self, employee_id: int) -> int:
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 # First delete related attendance logs to avoid foreign key constraint violation
                 cur.execute("DELETE FROM attendance_logs WHERE employee_id = %s", (employee_id,))
@@ -142,7 +150,7 @@ class EnrollmentRepo:
         print(f"[Repo] Bulk delete called with IDs: {ids}")
         
         try:
-            with pg_conn() as conn:
+            with pg_conn(self.uow) as conn:
                 with conn.cursor() as cur:
                     # First delete related attendance logs for all employees to avoid foreign key constraint violations
                     placeholders_logs = ','.join(['%s'] * len(ids))
@@ -169,14 +177,14 @@ class EnrollmentRepo:
             raise
 
     def save_card_uid(self, employee_id: int, uid: str) -> None:
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 cur.execute("UPDATE employees SET card_uid = %s WHERE id = %s", (uid, employee_id))
                 conn.commit()
         # :contentReference[oaicite:7]{index=7}
 
     def save_fingerprint(self, employee_id: int, tpl_bytes: bytes) -> None:
-        with pg_conn() as conn:
+        with pg_conn(self.uow) as conn:
             with conn.cursor() as cur:
                 cur.execute(
                     "UPDATE employees SET fingerprint_template = %s WHERE id = %s",
@@ -5,6 +5,7 @@ import base64
 from typing import Dict, Any, Optional
 
 from common.utils import next_employee_code
+from core.uow import UnitOfWork
 from .repo import EnrollmentRepo
 
 # Optional hardware imports - gracefully handle missing hardware modules
@@ -28,8 +29,8 @@ except ImportError:
 
 
 class EnrollmentService:
-    def __init__(self, repo: Optional[EnrollmentRepo] = None):
-        self.repo = repo or EnrollmentRepo()
+    def __init__(self, repo: Optional[EnrollmentRepo] = None, uow: Optional[UnitOfWork] = None):
+        self.repo = repo or EnrollmentRepo(uow)
     def list_employees(self):
         return self.repo.list_employees()
     def create_employee(self, *, name: str, location: str | None, status: str | None, card_uid: str | None):
@@ -1,18 +1,24 @@
 from __future__ import annotations
 from typing import List
 from datetime import date, datetime
+import logging
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from common.deps import get_current_user
+from common.deps import get_current_user, UnitOfWorkDep
+from core import executors, jobs, scheduler
+from core.config import settings
+from core.uow import UnitOfWork
 from common.dto import InventorySyncResult
 from .schemas import AdjustmentLogIn, AdjustmentOut, AdjustmentHistoryResponse
-from .service import AdjustmentsService
+from .service import AdjustmentsService, SyncInProgress
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-def _svc() -> AdjustmentsService:
-    return AdjustmentsService()
+def _svc(uow: UnitOfWork | None = None) -> AdjustmentsService:
+    return AdjustmentsService(uow=uow)
 
 @router.get("/health")
 def inventory_adjustments_health():
@@ -93,6 +99,7 @@ def get_public_status():
                 "connection": "GET /connection-status (auth required)",
                 "log": "POST /log (auth required)", 
                 "sync": "POST /sync (auth required)",
+                "sync_job": "POST /sync/jobs (auth required, runs in the background)",
                 "pending": "GET /pending (auth required)"
             },
             "timestamp": datetime.now().isoformat()
@@ -105,11 +112,11 @@ def get_public_status():
         }
 
 @router.get("/connection-status")
+@executors.offload("external")
 def check_zoho_connection(user=Depends(get_current_user)):
     """Check connectivity to Zoho Inventory API"""
     try:
-        result = _svc().check_zoho_connection()
-        return result
+        return _svc().latest_zoho_connection_status()
     except Exception as e:
         return {
             "status": "error",
@@ -119,10 +126,10 @@ def check_zoho_connection(user=Depends(get_current_user)):
         }
 
 @router.post("/log", response_model=AdjustmentOut)
-def log_inventory_adjustment(body: AdjustmentLogIn, user=Depends(get_current_user)):
+def log_inventory_adjustment(body: AdjustmentLogIn, user=Depends(get_current_user), uow=UnitOfWorkDep):
     """Log an inventory adjustment to PostgreSQL for later sync to Zoho"""
     try:
-        result = _svc().log_adjustment(
+        result = _svc(uow).log_adjustment(
             barcode=body.barcode,
             quantity=body.quantity,
             reason=body.reason,
@@ -136,14 +143,40 @@ def log_inventory_adjustment(body: AdjustmentLogIn, user=Depends(get_current_use
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/sync", response_model=InventorySyncResult)
+@executors.offload("external")
 def sync_inventory_adjustments(user=Depends(get_current_user)):
     """Sync pending adjustments from PostgreSQL to Zoho Inventory"""
     try:
         result = _svc().sync_adjustments_to_zoho()
         return InventorySyncResult(**result)
+    except SyncInProgress:
+        raise  # 409
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@jobs.handler("inventory.adjustments.sync")
+def _sync_job(ctx: jobs.JobContext):
+    return _svc().sync_adjustments_to_zoho(progress=ctx.progress)
+
+@scheduler.task("inventory.adjustments.sync", settings.SCHEDULE_ADJUSTMENTS_SYNC, jitter=60)
+def _scheduled_sync():
+    # new rows only: failed ones are retried from the UI, not every 15 minutes forever
+    try:
+        result = _svc().sync_adjustments_to_zoho(retry_errors=False)
+    except SyncInProgress:
+        logger.info("Scheduled Zoho sync skipped: another sync is running")
+        return
+    logger.info(f"Scheduled Zoho sync: {result.get('message')}")
+
+@scheduler.task("zoho.connection_check", settings.SCHEDULE_ZOHO_CONNECTION_CHECK, jitter=10)
+def _scheduled_connection_check():
+    _svc().refresh_zoho_connection_status()
+
+@router.post("/sync/jobs", status_code=202)
+def submit_sync_job(user=Depends(get_current_user)):
+    """Queue a sync of pending adjustments to Zoho; poll GET /api/v1/jobs/{id} for progress"""
+    return jobs.accepted(jobs.submit("inventory.adjustments.sync", user=user))
+
 @router.get("/pending")
 def get_pending_adjustments(user=Depends(get_current_user)):
     """Get all pending adjustments that haven't been synced to Zoho yet"""
@@ -5,25 +5,25 @@ import psycopg2
 import logging
 
 from common.deps import pg_conn
-from core.db import get_inventory_log_connection
+from core import dbregistry
+from core.uow import UnitOfWork
 
 logger = logging.getLogger(__name__)
 
 
 class AdjustmentsRepo:
-    def __init__(self):
-        pass
+    def __init__(self, uow: Optional[UnitOfWork] = None):
+        self.uow = uow
 
     def get_connection(self):
-        """Get connection for inventory adjustments - try inventory DB first, fallback to main DB"""
-        try:
-            # Try dedicated inventory database first
-            return get_inventory_log_connection()
-        except (ValueError, Exception) as e:
-            logger.warning(f"Inventory database not available ({e}), using main database")
-            # Fallback to main database
-            from core.db import get_psycopg_connection
-            return get_psycopg_connection()
+        """Get connection for inventory adjustments - inventory DB, or the main DB while it's unavailable (core.dbregistry)"""
+        if self.uow:
+            # logs and metadata live in the same database, so they share the request's connection
+            return self.uow.connection("inventory", self._open_connection)
+        return self._open_connection()
+
+    def _open_connection(self):
+        return dbregistry.connection("inventory")
 
     def create_adjustment_log(self, adjustment_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create a new adjustment log record"""
@@ -66,15 +66,15 @@ class AdjustmentsRepo:
         finally:
             conn.close()
 
-    def get_pending_adjustments(self) -> List[Dict[str, Any]]:
-        """Get all pending adjustment logs (not yet synced to Zoho)"""
+    def get_pending_adjustments(self, include_errors: bool = True) -> List[Dict[str, Any]]:
+        """Get all pending adjustment logs (not yet synced to Zoho); `include_errors=False`: never-attempted only"""
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
-            cursor.execute("""
+            cursor.execute(f"""
                 SELECT id, barcode, quantity, reason, field, status, response_message, created_at
                 FROM inventory_logs
-                WHERE status IS NULL OR status != 'Success'
+                WHERE {"status IS NULL OR status != 'Success'" if include_errors else "status IS NULL"}
                 ORDER BY created_at ASC
             """)
             
@@ -115,6 +115,8 @@ class AdjustmentsRepo:
         except psycopg2.Error as e:
             logger.error(f"Database error in update_adjustment_status: {e}")
             raise
+        finally:
+            conn.close()
 
 
 
@@ -240,14 +242,7 @@ class AdjustmentsRepo:
 
     def get_metadata_connection(self):
         """Get connection for inventory metadata - same as management module"""
-        try:
-            # Try dedicated inventory database first
-            return get_inventory_log_connection()
-        except (ValueError, Exception) as e:
-            logger.warning(f"Inventory database not available ({e}), using main database")
-            # Fallback to main database
-            from core.db import get_psycopg_connection
-            return get_psycopg_connection()
+        return self.get_connection()
 
     def update_metadata_quantity(self, item_id: str, field: str, delta: int) -> None:
         """Update inventory metadata quantity immediately for real-time tracking"""
@@ -338,68 +333,3 @@ class AdjustmentsRepo:
             return 0
         finally:
             conn.close()
-
-    def init_tables(self) -> None:
-        """Initialize inventory tables in PostgreSQL"""
-        conn = self.get_connection()
-        try:
-            cursor = conn.cursor()
-            
-            # Create inventory_logs table
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS inventory_logs (
-                    id SERIAL PRIMARY KEY,
-                    barcode VARCHAR(255) NOT NULL,
-                    quantity INTEGER NOT NULL,
-                    reason VARCHAR(255) NOT NULL,
-                    field VARCHAR(50) NOT NULL,
-                    status VARCHAR(50),
-                    response_message TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create inventory_metadata table (matching actual production table schema)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS inventory_metadata (
-                    item_id VARCHAR(50) PRIMARY KEY,
-                    location VARCHAR(100),
-                    date VARCHAR(20),
-                    uk_6m_data VARCHAR(100),
-                    shelf_lt1 VARCHAR(100),
-                    shelf_lt1_qty INTEGER DEFAULT 0,
-                    shelf_gt1 VARCHAR(100),
-                    shelf_gt1_qty INTEGER DEFAULT 0,
-                    top_floor_expiry VARCHAR(20),
-                    top_floor_total INTEGER DEFAULT 0,
-                    status VARCHAR(50) DEFAULT 'Active',
-                    uk_fr_preorder VARCHAR(100),
-                    fr_6m_data VARCHAR(100),
-                    created_at TIMESTAMP DEFAULT NOW()
-                )
-            """)
-            
-            # Create indexes
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_inventory_logs_barcode 
-                ON inventory_logs (barcode)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_inventory_logs_created_at 
-                ON inventory_logs (created_at)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_inventory_logs_status 
-                ON inventory_logs (status)
-            """)
-            
-            conn.commit()
-            logger.info("Inventory tables initialized successfully")
-            
-        except psycopg2.Error as e:
-            logger.error(f"Database error in init_tables: {e}")
-            raise
-        finally:
-            conn.close()
@@ -1,28 +1,61 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, List, Optional
 from datetime import datetime
+import json
 import logging
-import requests
 import time
+from contextlib import contextmanager
+from typing import Iterator
 
 from .repo import AdjustmentsRepo
-from modules._integrations.zoho.client import get_cached_inventory_token
+from core.uow import UnitOfWork
+from modules._integrations.zoho.client import get_cached_inventory_token, inventory_url
+from core import deadline, outbound, shared_state
 from core.config import settings
+from core.db import open_dedicated_connection
+from core.errors import AppError
 
 logger = logging.getLogger(__name__)
 
+# Last scheduled Zoho connection check, shared by all workers (see core.scheduler)
+_CONNECTION_STATUS_KEY = "zoho_connection_status"
+_CONNECTION_STATUS_TTL = 300
+
+# pg_try_advisory_lock key serialising Zoho syncs across routes, jobs and the scheduler ("ADJSYNC")
+_SYNC_LOCK_KEY = 0x41444A53594E43
+
+
+class SyncInProgress(AppError):
+    def __init__(self):
+        super().__init__("A Zoho sync is already running; try again when it finishes", status_code=409)
+
+
+@contextmanager
+def _sync_lock() -> Iterator[None]:
+    """
+    Hold the sync lock for the block, or raise SyncInProgress. Two overlapping
+    syncs would read the same pending rows and post each adjustment twice.
+    Session-level on a dedicated main-DB connection (every worker shares it,
+    whichever database the inventory tables are in); closing it releases the lock.
+    """
+    conn = open_dedicated_connection("attendance")
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cur:
+            cur.execute("SELECT pg_try_advisory_lock(%s)", (_SYNC_LOCK_KEY,))
+            if not cur.fetchone()[0]:
+                raise SyncInProgress()
+        yield
+    finally:
+        conn.close()
+
 
 class AdjustmentsService:
-    def __init__(self, repo: Optional[AdjustmentsRepo] = None):
-        self.repo = repo or AdjustmentsRepo()
+    def __init__(self, repo: Optional[AdjustmentsRepo] = None, uow: Optional[UnitOfWork] = None):
+        self.repo = repo or AdjustmentsRepo(uow)
+        self.uow = uow
         self.zoho_org_id = settings.ZC_ORG_ID
-        
-        # Initialize database tables if not exists
-        try:
-            self.repo.init_tables()
-        except Exception as e:
-            logger.warning(f"Could not initialize inventory tables: {e}")
-        
+
     def _make_zoho_request(self, method: str, url: str, headers: dict, params: dict = None, json_data: dict = None, max_retries: int = 3) -> tuple[bool, dict, str]:
         """
         Make a Zoho API request with proper error handling and retries.
@@ -30,12 +63,13 @@ class AdjustmentsService:
         Returns:
             tuple: (success: bool, response_data: dict, error_message: str)
         """
+        import requests  # deferred: keeps requests off the startup import path
         for attempt in range(max_retries):
             try:
                 if method.upper() == 'GET':
-                    response = requests.get(url, headers=headers, params=params, timeout=30)
+                    response = outbound.request("zoho", "GET", url, headers=headers, params=params, timeout=30)
                 elif method.upper() == 'POST':
-                    response = requests.post(url, headers=headers, params=params, json=json_data, timeout=30)
+                    response = outbound.request("zoho", "POST", url, headers=headers, params=params, json=json_data, timeout=30)
                 else:
                     return False, {}, f"Unsupported HTTP method: {method}"
                 
@@ -53,14 +87,14 @@ class AdjustmentsService:
                 if attempt == max_retries - 1:
                     return False, {}, f"Request timed out after {max_retries} attempts"
                 logger.warning(f"{error_msg}, retrying...")
-                time.sleep(2 ** attempt)  # Exponential backoff
+                deadline.sleep(2 ** attempt)  # Exponential backoff, within the request deadline
                 
             except requests.exceptions.ConnectionError:
                 error_msg = f"Connection error to Zoho API (attempt {attempt + 1}/{max_retries})"
                 if attempt == max_retries - 1:
                     return False, {}, f"Connection failed after {max_retries} attempts"
                 logger.warning(f"{error_msg}, retrying...")
-                time.sleep(2 ** attempt)
+                deadline.sleep(2 ** attempt)
                 
             except requests.exceptions.HTTPError as e:
                 # Don't retry on 4xx client errors, but do retry on 5xx server errors
@@ -70,14 +104,14 @@ class AdjustmentsService:
                     return False, {}, f"HTTP {response.status_code} after {max_retries} attempts: {str(e)}"
                 
                 logger.warning(f"HTTP {response.status_code} (attempt {attempt + 1}/{max_retries}), retrying...")
-                time.sleep(2 ** attempt)
+                deadline.sleep(2 ** attempt)
                 
             except requests.exceptions.RequestException as e:
                 error_msg = f"Request exception: {str(e)} (attempt {attempt + 1}/{max_retries})"
                 if attempt == max_retries - 1:
                     return False, {}, f"Request failed after {max_retries} attempts: {str(e)}"
                 logger.warning(f"{error_msg}, retrying...")
-                time.sleep(2 ** attempt)
+                deadline.sleep(2 ** attempt)
                 
         return False, {}, "Maximum retry attempts reached"
     
@@ -104,7 +138,7 @@ class AdjustmentsService:
             }
 
             # Test with a simple API call to get organization info
-            test_url = "https://www.zohoapis.eu/inventory/v1/organizations"
+            test_url = inventory_url("organizations")
             start_time = time.time()
             
             success, data, error_msg = self._make_zoho_request('GET', test_url, headers)
@@ -135,6 +169,23 @@ class AdjustmentsService:
                 "timestamp": datetime.now().isoformat()
             }
     
+    def refresh_zoho_connection_status(self) -> Dict[str, Any]:
+        """Run the connection check and publish the result to every worker (scheduled task)."""
+        result = self.check_zoho_connection()
+        shared_state.store(_CONNECTION_STATUS_KEY, json.dumps(result), _CONNECTION_STATUS_TTL)
+        return result
+
+    def latest_zoho_connection_status(self) -> Dict[str, Any]:
+        """The scheduler's last connection check if it's recent, else a live check."""
+        try:
+            cached = shared_state.load(_CONNECTION_STATUS_KEY)
+        except Exception as e:
+            logger.warning(f"Could not read shared Zoho connection status: {e}")
+            cached = None
+        if cached:
+            return {**json.loads(cached), "cached": True}
+        return self.check_zoho_connection()
+
     def get_pending_adjustments(self) -> List[Dict[str, Any]]:
         """Get all pending adjustments that haven't been synced to Zoho yet"""
         return self.repo.get_pending_adjustments()
@@ -235,7 +286,12 @@ class AdjustmentsService:
             try:
                 logger.info(f"🚀 IMMEDIATE UPDATE: Starting metadata update for real-time tracking")
                 logger.info(f"   item_id={sanitized_barcode}, field={field}, delta={quantity}")
-                self.repo.update_metadata_quantity(sanitized_barcode, field, quantity)
+                if self.uow:
+                    # savepoint: a failed metadata update must not roll back the log insert
+                    with self.uow.savepoint("inventory", self.repo._open_connection):
+                        self.repo.update_metadata_quantity(sanitized_barcode, field, quantity)
+                else:
+                    self.repo.update_metadata_quantity(sanitized_barcode, field, quantity)
                 logger.info(f"✅ IMMEDIATE UPDATE SUCCESS: inventory_metadata updated immediately")
                 logger.info(f"   {sanitized_barcode} {field} += {quantity}")
             except Exception as e:
@@ -261,8 +317,17 @@ class AdjustmentsService:
             logger.error(f"Error logging adjustment: {e}")
             raise
 
-    def sync_adjustments_to_zoho(self) -> Dict[str, Any]:
-        """Sync pending adjustments from PostgreSQL to Zoho Inventory"""
+    def sync_adjustments_to_zoho(self, progress: Optional[Callable[[int, int], None]] = None, retry_errors: bool = True) -> Dict[str, Any]:
+        """
+        Sync pending adjustments from PostgreSQL to Zoho Inventory.
+        `progress(done, total)` is called before each adjustment (see core.jobs).
+        `retry_errors=False` leaves rows that already failed alone (the scheduled run).
+        Only one sync runs at a time; raises SyncInProgress otherwise.
+        """
+        with _sync_lock():
+            return self._sync_adjustments(progress, retry_errors)
+
+    def _sync_adjustments(self, progress: Optional[Callable[[int, int], None]], retry_errors: bool) -> Dict[str, Any]:
         try:
             # Get Zoho token
             inventory_token = get_cached_inventory_token()
@@ -275,12 +340,14 @@ class AdjustmentsService:
             }
 
             # Get pending adjustments
-            pending_adjustments = self.repo.get_pending_adjustments()
+            pending_adjustments = self.repo.get_pending_adjustments(include_errors=retry_errors)
             
             success_count = 0
             error_count = 0
 
-            for adjustment in pending_adjustments:
+            for done, adjustment in enumerate(pending_adjustments):
+                if progress:
+                    progress(done, len(pending_adjustments))
                 record_id = adjustment['id']
                 item_id = adjustment['barcode']  # Using barcode as item_id
                 quantity = adjustment['quantity']
@@ -289,7 +356,7 @@ class AdjustmentsService:
 
                 try:
                     # 1. Get current available stock from Zoho
-                    item_url = f"https://www.zohoapis.eu/inventory/v1/items/{item_id}"
+                    item_url = inventory_url(f"items/{item_id}")
                     params = {"organization_id": self.zoho_org_id}
                     
                     success, item_json, error_msg = self._make_zoho_request('GET', item_url, headers, params)
@@ -327,7 +394,7 @@ class AdjustmentsService:
                     }
 
                     # 4. Post adjustment to Zoho
-                    inv_url = f"https://www.zohoapis.eu/inventory/v1/inventoryadjustments"
+                    inv_url = inventory_url("inventoryadjustments")
                     params = {"organization_id": self.zoho_org_id}
                     
                     success, inv_data, error_msg = self._make_zoho_request('POST', inv_url, headers, params, payload)
@@ -338,7 +405,8 @@ class AdjustmentsService:
 
                     if inv_data.get("code") == 0:
                         message = f"Synced to Zoho: adjusted by {adjust_qty} units. Final Zoho stock: {target_qty}"
-                        self.repo.update_adjustment_status(record_id, "Success", message)
+                        with deadline.shielded():  # Zoho has it now; record that even if out of time
+                            self.repo.update_adjustment_status(record_id, "Success", message)
                         success_count += 1
                         
                         logger.info(f"✅ Zoho sync completed for {item_id}: {field} {quantity} (metadata was updated during logging)")
@@ -352,6 +420,11 @@ class AdjustmentsService:
                         self.repo.update_adjustment_status(record_id, "Error", message)
                         error_count += 1
 
+                except (deadline.DeadlineExceeded, outbound.DependencyUnavailable) as e:
+                    # Out of request time, or Zoho is down: this one and the rest stay Pending for the next sync
+                    logger.warning(f"Adjustment sync stopped ({e.message}); {len(pending_adjustments) - done} left pending")
+                    break
+
                 except Exception as e:
                     # Unexpected error (should be rare now with improved network handling)
                     self.repo.update_adjustment_status(record_id, "Error", f"Unexpected error: {str(e)}")
@@ -4,7 +4,9 @@ import logging
 
 from fastapi import APIRouter, Depends, Query, HTTPException
 
-from common.deps import get_current_user
+from common.deps import get_current_user, etag_for
+from core import executors
+from core.outbound import DependencyUnavailable
 from common.dto import InventoryItemOut, InventoryMetadataRecord, LiveSyncResult
 from .schemas import InventoryMetadataCreateIn, InventoryMetadataUpdateIn, LiveSyncIn
 from .service import InventoryManagementService
@@ -19,25 +21,28 @@ def _svc() -> InventoryManagementService:
 def inventory_management_health():
     return {"status": "Inventory management module ready"}
 @router.get("/items", response_model=List[InventoryItemOut])
+@executors.offload("external")
 def get_inventory_items(user=Depends(get_current_user)):
     """Get inventory items from Zoho Inventory API"""
     try:
-        items = _svc().get_zoho_inventory_items()
-        return [InventoryItemOut(**item) for item in items]
+        # validated once, as a batch, by response_model
+        return _svc().get_zoho_inventory_items()
+    except DependencyUnavailable:
+        raise  # 503 + Retry-After while Zoho is down
     except Exception as e:
         logger.error(f"Error fetching inventory items: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 @router.get("/metadata", response_model=List[InventoryMetadataRecord])
-def load_inventory_metadata(user=Depends(get_current_user)):
+def load_inventory_metadata(user=Depends(get_current_user), _etag=etag_for("inventory_metadata", database="inventory")):
     """Load inventory metadata from PostgreSQL"""
     try:
-        metadata = _svc().load_inventory_metadata()
-        return [InventoryMetadataRecord(**item) for item in metadata]
+        return _svc().load_inventory_metadata()
     except Exception as e:
         logger.error(f"Error loading metadata: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/metadata")
+@executors.offload("external")  # saves, then syncs the total to Zoho
 def save_inventory_metadata(body: InventoryMetadataCreateIn, user=Depends(get_current_user)):
     """Save inventory metadata to PostgreSQL and sync to Zoho"""
     try:
@@ -67,6 +72,7 @@ def update_inventory_metadata(
         logger.error(f"Error updating metadata: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 @router.post("/live-sync", response_model=LiveSyncResult)
+@executors.offload("external")
 def live_inventory_sync(body: LiveSyncIn, user=Depends(get_current_user)):
     """Perform live inventory sync - adjust Zoho stock directly"""
     try:
@@ -78,6 +84,8 @@ def live_inventory_sync(body: LiveSyncIn, user=Depends(get_current_user)):
         return LiveSyncResult(**result)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except DependencyUnavailable:
+        raise
     except Exception as e:
         logger.error(f"Error in live sync: {e}")
         raise HTTPException(status_code=500, detail=str(e))
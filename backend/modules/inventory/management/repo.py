@@ -5,7 +5,7 @@ import psycopg2
 import logging
 
 from common.deps import pg_conn
-from core.db import get_inventory_log_connection
+from core import dbregistry
 
 logger = logging.getLogger(__name__)
 
@@ -15,15 +15,8 @@ class InventoryManagementRepo:
         pass
 
     def get_metadata_connection(self):
-        """Get connection for inventory metadata - try inventory DB first, fallback to main DB"""
-        try:
-            # Try dedicated inventory database first
-            return get_inventory_log_connection()
-        except (ValueError, Exception) as e:
-            logger.warning(f"Inventory database not available ({e}), using main database")
-            # Fallback to main database
-            from core.db import get_psycopg_connection
-            return get_psycopg_connection()
+        """Get connection for inventory metadata - inventory DB, or the main DB while it's unavailable (core.dbregistry)"""
+        return dbregistry.connection("inventory")
 
     def load_inventory_metadata(self) -> List[Dict[str, Any]]:
         """Load all inventory metadata from PostgreSQL"""
@@ -106,45 +99,3 @@ class InventoryManagementRepo:
             raise
         finally:
             conn.close()
-
-    def init_tables(self) -> None:
-        """Initialize inventory metadata tables"""
-        conn = self.get_metadata_connection()
-        try:
-            cursor = conn.cursor()
-            
-            # Create inventory_metadata table (if not already exists from adjustments)
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS inventory_metadata (
-                    item_id VARCHAR(255) PRIMARY KEY,
-                    location VARCHAR(255),
-                    date DATE,
-                    uk_6m_data TEXT,
-                    shelf_lt1 VARCHAR(255),
-                    shelf_lt1_qty INTEGER DEFAULT 0,
-                    shelf_gt1 VARCHAR(255),
-                    shelf_gt1_qty INTEGER DEFAULT 0,
-                    top_floor_expiry DATE,
-                    top_floor_total INTEGER DEFAULT 0,
-                    status VARCHAR(50) DEFAULT 'Active',
-                    uk_fr_preorder TEXT,
-                    fr_6m_data TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create indexes
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_inventory_metadata_updated_at 
-                ON inventory_metadata (updated_at)
-            """)
-            
-            conn.commit()
-            logger.info("Inventory management tables initialized successfully")
-            
-        except psycopg2.Error as e:
-            logger.error(f"Database error in init_tables: {e}")
-            raise
-        finally:
-            conn.close()
@@ -2,10 +2,12 @@ from __future__ import annotations
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 import logging
-import requests
 
 from .repo import InventoryManagementRepo
-from modules._integrations.zoho.client import get_cached_inventory_token
+from modules._integrations.zoho.client import get_cached_inventory_token, inventory_url
+from core import deadline, outbound
+from core.errors import AppError
+from core.singleflight import single_flight
 from core.config import settings
 
 logger = logging.getLogger(__name__)
@@ -16,8 +18,15 @@ class InventoryManagementService:
         self.repo = repo or InventoryManagementRepo()
         self.zoho_org_id = settings.ZC_ORG_ID
 
+    @single_flight("zoho_inventory_items")
     def get_zoho_inventory_items(self) -> List[Dict[str, Any]]:
-        """Get inventory items from Zoho Inventory API"""
+        """Get inventory items from Zoho Inventory API (concurrent callers share one crawl)"""
+        # the crawl is shared, so it runs without the leader's deadline: one
+        # caller timing out or disconnecting mustn't fail it for the followers
+        with deadline.shielded():
+            return self._fetch_zoho_inventory_items()
+
+    def _fetch_zoho_inventory_items(self) -> List[Dict[str, Any]]:
         try:
             inventory_token = get_cached_inventory_token()
             if not inventory_token:
@@ -33,14 +42,14 @@ class InventoryManagementService:
             per_page = 200
 
             while True:
-                url = f"https://www.zohoapis.eu/inventory/v1/items"
+                url = inventory_url("items")
                 params = {
                     "organization_id": self.zoho_org_id,
                     "page": page,
                     "per_page": per_page
                 }
                 
-                response = requests.get(url, headers=headers, params=params)
+                response = outbound.request("zoho", "GET", url, headers=headers, params=params)
                 data = response.json()
 
                 if data.get("code") != 0:
@@ -70,6 +79,8 @@ class InventoryManagementService:
 
             return all_items
 
+        except AppError:
+            raise  # 503 while Zoho is down, 504 past the deadline - not an empty list
         except Exception as e:
             logger.error(f"Error fetching Zoho inventory items: {e}")
             return []
@@ -85,6 +96,8 @@ class InventoryManagementService:
         """Load inventory metadata from PostgreSQL"""
         try:
             return self.repo.load_inventory_metadata()
+        except AppError:
+            raise
         except Exception as e:
             logger.error(f"Error loading inventory metadata: {e}")
             return []
@@ -124,6 +137,8 @@ class InventoryManagementService:
                 "total_stock": total_stock
             }
 
+        except AppError:
+            raise
         except Exception as e:
             logger.error(f"Error saving inventory metadata: {e}")
             raise
@@ -147,10 +162,10 @@ class InventoryManagementService:
                 ]
             }
 
-            url = f"https://www.zohoapis.eu/inventory/v1/items/{item_id}"
+            url = inventory_url(f"items/{item_id}")
             params = {"organization_id": self.zoho_org_id}
             
-            response = requests.put(url, headers=headers, json=sync_payload, params=params)
+            response = outbound.request("zoho", "PUT", url, headers=headers, json=sync_payload, params=params)
             
             if response.status_code == 200:
                 logger.info(f"Successfully synced shelf total to Zoho for item {item_id}")
@@ -173,10 +188,10 @@ class InventoryManagementService:
             }
 
             # Step 1: Get current stock_on_hand from Zoho
-            item_url = f"https://www.zohoapis.eu/inventory/v1/items/{item_id}"
+            item_url = inventory_url(f"items/{item_id}")
             params = {"organization_id": self.zoho_org_id}
             
-            item_resp = requests.get(item_url, headers=headers, params=params)
+            item_resp = outbound.request("zoho", "GET", item_url, headers=headers, params=params)
             item_data = item_resp.json()
             
             if item_resp.status_code != 200 or item_data.get("code") != 0:
@@ -189,7 +204,7 @@ class InventoryManagementService:
                 return {"detail": "No adjustment needed", "stock_on_hand": current_qty}
 
             # Step 2: Perform inventory adjustment
-            adj_url = f"https://www.zohoapis.eu/inventory/v1/inventoryadjustments"
+            adj_url = inventory_url("inventoryadjustments")
             payload = {
                 "date": datetime.now().strftime("%Y-%m-%d"),
                 "reason": reason,
@@ -199,7 +214,7 @@ class InventoryManagementService:
                 }]
             }
 
-            response = requests.post(adj_url, headers=headers, json=payload, params=params)
+            response = outbound.request("zoho", "POST", adj_url, headers=headers, json=payload, params=params)
             result = response.json()
             
             if response.status_code != 201 or result.get("code") != 0:
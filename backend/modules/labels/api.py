@@ -6,6 +6,7 @@ from fastapi import APIRouter, Depends, Query, HTTPException
 from fastapi.responses import Response
 
 from common.deps import get_current_user
+from core import jobs
 from .schemas import LabelRequest, LabelDataResponse, LabelGenerateResponse, RecentRunsResponse
 from .service import LabelsService
 
@@ -33,30 +34,48 @@ def get_label_data(
     )
     return LabelDataResponse(**result)
 
-@router.post("/generate", response_model=LabelGenerateResponse)
-def generate_labels(
-    body: LabelRequest,
-    user=Depends(get_current_user)
-):
-    """Generate labels for the specified date range and criteria"""
-    result = _svc().generate_labels(
-        start_date=body.start_date.isoformat(),
-        end_date=body.end_date.isoformat(),
-        search=body.search or ""
-    )
-    
+def _generate_and_record(start_date: str, end_date: str, search: str) -> dict:
+    result = _svc().generate_labels(start_date=start_date, end_date=end_date, search=search)
+
     if result["status"] == "success":
         # Save to history
         _svc().save_run_history({
-            "start_date": body.start_date.isoformat(),
-            "end_date": body.end_date.isoformat(),
-            "search_term": body.search or "",
+            "start_date": start_date,
+            "end_date": end_date,
+            "search_term": search,
             "labels_count": result.get("count", 0),
             "status": "completed"
         })
-    
+
+    return result
+
+@router.post("/generate", response_model=LabelGenerateResponse)
+def generate_labels(
+    body: LabelRequest,
+    user=Depends(get_current_user)
+):
+    """Generate labels for the specified date range and criteria"""
+    result = _generate_and_record(body.start_date.isoformat(), body.end_date.isoformat(), body.search or "")
     return LabelGenerateResponse(**result)
 
+@jobs.handler("labels.generate")
+def _generate_job(ctx: jobs.JobContext, start_date: str, end_date: str, search: str = ""):
+    ctx.progress(0, message="Generating labels")
+    return _generate_and_record(start_date, end_date, search)
+
+@router.post("/generate/jobs", status_code=202)
+def generate_labels_job(
+    body: LabelRequest,
+    user=Depends(get_current_user)
+):
+    """Generate labels in the background; the file content is in the finished job's result"""
+    params = {
+        "start_date": body.start_date.isoformat(),
+        "end_date": body.end_date.isoformat(),
+        "search": body.search or "",
+    }
+    return jobs.accepted(jobs.submit("labels.generate", params, user=user))
+
 @router.get("/download")
 def download_labels(
     start_date: date = Query(..., description="Start date"),
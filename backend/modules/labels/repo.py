@@ -1,21 +1,26 @@
 from __future__ import annotations
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-import sqlite3
 import logging
 
-from core.db import get_db_connection
+import psycopg2
+
+from core.db import get_products_connection
 
 logger = logging.getLogger(__name__)
 
 
 class LabelsRepo:
     def __init__(self):
-        self.db_path = None  # Will use get_db_connection()
+        pass
+
+    def get_connection(self):
+        """Get PostgreSQL connection to Products database (sales orders and label runs)"""
+        return get_products_connection()
 
     def get_sales_data(self, start_date: str, end_date: str, search: str = "") -> List[Dict[str, Any]]:
         """Get sales data for label generation"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         try:
             cursor = conn.cursor()
             
@@ -31,12 +36,12 @@ class LabelsRepo:
                     order_date,
                     shipping_method
                 FROM sales_orders 
-                WHERE order_date BETWEEN ? AND ?
+                WHERE order_date BETWEEN %s AND %s
             """
             params = [start_date, end_date]
             
             if search:
-                query += " AND (order_number LIKE ? OR customer_name LIKE ? OR product_sku LIKE ?)"
+                query += " AND (order_number LIKE %s OR customer_name LIKE %s OR product_sku LIKE %s)"
                 search_param = f"%{search}%"
                 params.extend([search_param, search_param, search_param])
                 
@@ -48,7 +53,7 @@ class LabelsRepo:
             
             return [dict(zip(columns, row)) for row in rows]
             
-        except sqlite3.Error as e:
+        except psycopg2.Error as e:
             logger.error(f"Database error in get_sales_data: {e}")
             return []
         finally:
@@ -56,7 +61,7 @@ class LabelsRepo:
 
     def get_recent_runs(self, limit: int = 10) -> List[Dict[str, Any]]:
         """Get recent label generation runs"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute("""
@@ -70,7 +75,7 @@ class LabelsRepo:
                     status
                 FROM label_runs 
                 ORDER BY run_date DESC 
-                LIMIT ?
+                LIMIT %s
             """, (limit,))
             
             columns = [desc[0] for desc in cursor.description]
@@ -78,7 +83,7 @@ class LabelsRepo:
             
             return [dict(zip(columns, row)) for row in rows]
             
-        except sqlite3.Error as e:
+        except psycopg2.Error as e:
             logger.error(f"Database error in get_recent_runs: {e}")
             return []
         finally:
@@ -86,13 +91,13 @@ class LabelsRepo:
 
     def save_run_history(self, run_data: Dict[str, Any]) -> None:
         """Save label generation run to history"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         try:
             cursor = conn.cursor()
             cursor.execute("""
                 INSERT INTO label_runs 
                 (run_date, start_date, end_date, search_term, labels_count, status)
-                VALUES (?, ?, ?, ?, ?, ?)
+                VALUES (%s, %s, %s, %s, %s, %s)
             """, (
                 datetime.now().isoformat(),
                 run_data.get('start_date'),
@@ -103,7 +108,7 @@ class LabelsRepo:
             ))
             conn.commit()
             
-        except sqlite3.Error as e:
+        except psycopg2.Error as e:
             logger.error(f"Database error in save_run_history: {e}")
             raise
         finally:
@@ -111,14 +116,14 @@ class LabelsRepo:
 
     def init_tables(self) -> None:
         """Initialize label-related database tables"""
-        conn = get_db_connection()
+        conn = self.get_connection()
         try:
             cursor = conn.cursor()
             
             # Create sales_orders table if it doesn't exist
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS sales_orders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id SERIAL PRIMARY KEY,
                     order_number TEXT NOT NULL,
                     customer_name TEXT NOT NULL,
                     customer_address TEXT,
@@ -134,7 +139,7 @@ class LabelsRepo:
             # Create label_runs table
             cursor.execute("""
                 CREATE TABLE IF NOT EXISTS label_runs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    id SERIAL PRIMARY KEY,
                     run_date TEXT NOT NULL,
                     start_date TEXT NOT NULL,
                     end_date TEXT NOT NULL,
@@ -147,7 +152,7 @@ class LabelsRepo:
             
             conn.commit()
             
-        except sqlite3.Error as e:
+        except psycopg2.Error as e:
             logger.error(f"Database error in init_tables: {e}")
             raise
         finally:
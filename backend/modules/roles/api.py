@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
-from common.deps import get_current_user
+from common.deps import get_current_user, etag_for
 from .schemas import RoleCreate, RoleUpdate, RoleOut
 from .service import RolesService
 
@@ -8,7 +8,7 @@ router = APIRouter()
 svc = RolesService()
 
 @router.get("", response_model=List[RoleOut])
-def list_roles(user=Depends(get_current_user)):
+def list_roles(user=Depends(get_current_user), _etag=etag_for("roles")):
     """Get all available roles"""
     try:
         return svc.list_all()
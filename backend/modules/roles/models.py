@@ -2,7 +2,7 @@
 Database models for roles table
 """
 
-# Table schema:
+# Table schema (created by core.migrations, attendance v1):
 # CREATE TABLE IF NOT EXISTS roles (
 #     id SERIAL PRIMARY KEY,
 #     role_name VARCHAR(100) UNIQUE NOT NULL,
@@ -2,31 +2,6 @@ from typing import List, Tuple, Optional
 from common.deps import pg_conn
 
 class RolesRepo:
-    def init_table(self):
-        """Create roles table if it doesn't exist and add default roles"""
-        with pg_conn() as conn, conn.cursor() as cur:
-            # Create table
-            cur.execute("""
-                CREATE TABLE IF NOT EXISTS roles (
-                    id SERIAL PRIMARY KEY,
-                    role_name VARCHAR(100) UNIQUE NOT NULL,
-                    allowed_tabs TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Insert default roles
-            cur.execute("""
-                INSERT INTO roles (role_name, allowed_tabs) VALUES
-                ('admin', 'enrollment,inventory,attendance,labels,sales-imports,usermanagement'),
-                ('manager', 'enrollment,inventory,attendance,labels,sales-imports'),
-                ('user', 'enrollment,attendance')
-                ON CONFLICT (role_name) DO NOTHING
-            """)
-            
-            conn.commit()
-
     def list_all(self) -> List[Tuple[int, str, str, str, str]]:
         """Get all roles with their details"""
         with pg_conn() as conn, conn.cursor() as cur:
@@ -1,4 +1,5 @@
 from typing import List, Optional
+from core.security import invalidate_all_users
 from .repo import RolesRepo
 
 def _csv(arr: Optional[List[str]]) -> str:
@@ -11,10 +12,6 @@ class RolesService:
     def __init__(self, repo: Optional[RolesRepo] = None):
         self.repo = repo or RolesRepo()
 
-    def init_roles_table(self):
-        """Initialize roles table with defaults"""
-        self.repo.init_table()
-
     def list_all(self) -> List[dict]:
         """Get all roles"""
         rows = self.repo.list_all()
@@ -54,6 +51,7 @@ class RolesService:
             new_role_name=new_role_name,
             allowed_tabs_csv=_csv(allowed_tabs) if allowed_tabs is not None else None
         )
+        invalidate_all_users()
 
     def delete(self, role_name: str):
         """Delete a role"""
@@ -1,9 +1,12 @@
 from __future__ import annotations
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, UploadFile, File, Query, HTTPException
+from starlette.concurrency import run_in_threadpool
 
 from common.deps import get_current_user
+from core import jobs
+from core.pagination import TotalMode
 from .schemas import ImportResponse, ValidationResponse, SalesOrdersResponse, ImportHistoryResponse, DeleteResponse, UKSalesDataResponse
 from .service import SalesImportsService
 
@@ -38,6 +41,31 @@ async def upload_csv(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error processing file: {str(e)}")
 
+@jobs.handler("sales_imports.upload", public=False)
+def _import_job(ctx: jobs.JobContext, filename: str, file_content: str):
+    return _svc().import_csv_file(file_content, filename, progress=ctx.progress)
+
+@router.post("/upload/jobs", status_code=202)
+async def upload_csv_job(
+    file: UploadFile = File(...),
+    user=Depends(get_current_user)
+):
+    """Upload a CSV and import it in the background; poll GET /api/v1/jobs/{id} for progress"""
+
+    if not file.filename.lower().endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Only CSV files are allowed")
+
+    try:
+        file_content = (await file.read()).decode('utf-8')
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid file encoding. Please use UTF-8 encoded CSV files.")
+
+    job = await run_in_threadpool(
+        jobs.submit, "sales_imports.upload", {"filename": file.filename},
+        user=user, inputs={"file_content": file_content},
+    )
+    return jobs.accepted(job)
+
 @router.post("/validate", response_model=ValidationResponse)
 async def validate_csv(
     file: UploadFile = File(...),
@@ -105,12 +133,17 @@ ORD-003,2024-10-17,SKU-789,Device Elite,2,149.99,completed"""
     )
 
 @router.get("/uk-sales", response_model=UKSalesDataResponse)
-def get_uk_sales_data(
-    limit: int = Query(100, description="Number of records per page"),
-    offset: int = Query(0, description="Offset for pagination"),
+async def get_uk_sales_data(
+    limit: int = Query(100, ge=1, le=500, description="Number of records per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor / prev_cursor from the previous page"),
+    total: TotalMode = Query("estimate", description="exact (COUNT(*)), estimate (planner statistics) or none"),
+    offset: int = Query(0, ge=0, deprecated=True, description="Legacy offset paging; use cursor"),
     search: str = Query("", description="Search term"),
     user=Depends(get_current_user)
 ):
-    """Get UK sales data with pagination and search"""
-    result = _svc().get_uk_sales_data(limit, offset, search)
-    return UKSalesDataResponse(**result)
\ No newline at end of file
+    """Get UK sales data, newest first, with keyset (cursor) pagination and search"""
+    if offset and not cursor:
+        result = await _svc().get_uk_sales_data_async(limit, offset, search)
+    else:
+        result = await _svc().get_uk_sales_page_async(limit, cursor, search, total)
+    return UKSalesDataResponse(**result)
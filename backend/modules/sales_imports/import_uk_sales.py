@@ -38,7 +38,8 @@ def import_csv_to_uk_sales(csv_file_path):
         
         # Initialize table if needed
         try:
-            repo.init_tables()
+            from core.migrations import migrate
+            migrate("products")
             print("✅ Database table ready")
         except Exception as e:
             print(f"Note: {e}")
@@ -1,149 +1,164 @@
 from __future__ import annotations
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 import psycopg2
 import psycopg2.extras
 import logging
 
 from core.db import get_products_connection
+from core.replicas import read_connection
+from core.db_async import fetch_all, fetch_one
+from core.pagination import (
+    CursorPage, Keyset, RELTUPLES_SQL, TotalMode, explain_sql, planner_rows, reltuples, to_cursor_page,
+)
 
 logger = logging.getLogger(__name__)
 
+_UK_SALES_SELECT = "SELECT id, order_number, created_at, sku, name, qty, price, status FROM uk_sales_data"
+# newest first; backed by idx_uk_sales_created_at_id (products migration 2)
+UK_SALES_KEYSET = Keyset(("created_at", "id"), descending=True)
+
+
+def _uk_sales_filter(search: str) -> Tuple[List[str], List[Any]]:
+    if not search:
+        return [], []
+    search_param = f"%{search}%"
+    return (
+        ["order_number ILIKE %s OR sku ILIKE %s OR name ILIKE %s OR status ILIKE %s"],
+        [search_param] * 4,
+    )
+
+
+def _uk_sales_page_sql(size: int, cursor: Optional[str], search: str) -> Tuple[str, List[Any], bool]:
+    where, params = _uk_sales_filter(search)
+    return UK_SALES_KEYSET.page_sql(_UK_SALES_SELECT, where, params, cursor, size)
+
+
+def _uk_sales_total_sql(mode: TotalMode, search: str) -> Optional[Tuple[str, List[Any]]]:
+    """Query for the total in the requested mode (None for "none"); read it with _uk_sales_total()."""
+    if mode == "none":
+        return None
+    where, params = _uk_sales_filter(search)
+    clause = f" WHERE {where[0]}" if where else ""
+    if mode == "exact":
+        return f"SELECT COUNT(*) as count FROM uk_sales_data{clause}", params
+    if not where:
+        return RELTUPLES_SQL, ["uk_sales_data"]
+    return explain_sql(f"SELECT 1 FROM uk_sales_data{clause}"), params
+
+
+def _uk_sales_total(mode: TotalMode, search: str, row) -> Optional[int]:
+    if row is None or mode == "none":
+        return None
+    value = next(iter(row.values())) if isinstance(row, dict) else row[0]
+    if mode == "exact":
+        return int(value)
+    return reltuples(value) if not search else planner_rows(value)
+
+
+def _uk_sales_sql(limit: int, offset: int, search: str) -> Tuple[str, str, List[Any], List[Any]]:
+    """LIMIT/OFFSET variant (count query, page query, count params, page params) for the legacy offset parameter."""
+    base_query = """
+        SELECT id, order_number, created_at, sku, name, qty, price, status
+        FROM uk_sales_data
+    """
+    count_query = "SELECT COUNT(*) as count FROM uk_sales_data"
+    
+    params = []
+    if search:
+        search_condition = """
+            WHERE order_number ILIKE %s 
+            OR sku ILIKE %s 
+            OR name ILIKE %s
+            OR status ILIKE %s
+        """
+        base_query += search_condition
+        count_query += search_condition
+        search_param = f"%{search}%"
+        params = [search_param, search_param, search_param, search_param]
+    
+    base_query += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
+    return count_query, base_query, list(params), params + [limit, offset]
+
+
+def _uk_sales_rows(rows) -> List[Dict[str, Any]]:
+    sales_data = []
+    for row in rows:
+        item = dict(row)
+        if isinstance(item.get('created_at'), datetime):
+            item['created_at'] = item['created_at'].isoformat()
+        if item.get('price'):
+            item['price'] = float(item['price'])
+        sales_data.append(item)
+    return sales_data
+
+
+def _uk_sales_page(rows, size: int, cursor: Optional[str], backwards: bool,
+                   mode: TotalMode, total: Optional[int]) -> CursorPage:
+    page = to_cursor_page(
+        rows=rows, keyset=UK_SALES_KEYSET, size=size, cursor=cursor, backwards=backwards,
+        total=total, total_is_estimate=mode == "estimate" and total is not None,
+    )
+    page.items = _uk_sales_rows(page.items)  # cursors were built from the raw datetimes
+    return page
+
 
 class SalesImportsRepo:
     def __init__(self):
-        self._table_checked = False
+        pass
 
     def get_connection(self):
         """Get PostgreSQL connection to Products database"""
         return get_products_connection()
 
-    def _ensure_table_exists(self) -> None:
-        """Ensure the table exists before querying (only checks once per instance)"""
-        if self._table_checked:
-            return
-            
-        try:
-            self.init_tables()
-            self._table_checked = True
-        except Exception as e:
-            logger.warning(f"Could not ensure table exists: {e}")
-            # Still mark as checked to avoid repeated attempts
-            self._table_checked = True
+    def get_read_connection(self):
+        """Connection for read-only queries (the products read replica when configured)"""
+        return read_connection("products")
 
-    def init_tables(self) -> None:
-        """Initialize uk_sales_data table in PostgreSQL"""
-        conn = self.get_connection()
+    def get_uk_sales_data(self, limit: int = 100, offset: int = 0, search: str = "") -> Tuple[List[Dict[str, Any]], int]:
+        """Get UK sales data with pagination and search"""
+        count_query, page_query, count_params, page_params = _uk_sales_sql(limit, offset, search)
+        conn = self.get_read_connection()
         try:
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                CREATE TABLE IF NOT EXISTS uk_sales_data (
-                    id SERIAL PRIMARY KEY,
-                    order_number VARCHAR(255) NOT NULL,
-                    created_at TIMESTAMP NOT NULL,
-                    sku VARCHAR(255) NOT NULL,
-                    name TEXT NOT NULL,
-                    qty INTEGER NOT NULL DEFAULT 1,
-                    price NUMERIC(10, 2) NOT NULL DEFAULT 0.0,
-                    status VARCHAR(100),
-                    imported_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_uk_sales_order_number 
-                ON uk_sales_data(order_number)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_uk_sales_sku 
-                ON uk_sales_data(sku)
-            """)
-            
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_uk_sales_created_at 
-                ON uk_sales_data(created_at)
-            """)
+            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             
-            cursor.execute("""
-                CREATE INDEX IF NOT EXISTS idx_uk_sales_status 
-                ON uk_sales_data(status)
-            """)
+            cursor.execute(count_query, count_params)
+            count_result = cursor.fetchone()
+            total = count_result['count'] if count_result else 0
             
-            conn.commit()
-            logger.info("UK sales data table initialized successfully")
+            cursor.execute(page_query, page_params)
+            return _uk_sales_rows(cursor.fetchall()), total
             
         except psycopg2.Error as e:
-            conn.rollback()
-            logger.error(f"Database error in init_tables: {e}")
+            logger.error(f"Database error in get_uk_sales_data: {e}")
             raise
         finally:
             cursor.close()
             conn.close()
 
-    def get_uk_sales_data(self, limit: int = 100, offset: int = 0, search: str = "") -> Tuple[List[Dict[str, Any]], int]:
-        """Get UK sales data with pagination and search"""
-        self._ensure_table_exists()
-        
-        conn = self.get_connection()
+    def get_uk_sales_page(self, size: int = 100, cursor: Optional[str] = None, search: str = "",
+                          total: TotalMode = "estimate") -> CursorPage:
+        """One keyset page of UK sales data (newest first); cost doesn't grow with page depth"""
+        page_query, page_params, backwards = _uk_sales_page_sql(size, cursor, search)
+        total_sql = _uk_sales_total_sql(total, search)
+        conn = self.get_read_connection()
         try:
-            cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            
-            base_query = """
-                SELECT id, order_number, created_at, sku, name, qty, price, status
-                FROM uk_sales_data
-            """
-            count_query = "SELECT COUNT(*) as count FROM uk_sales_data"
-            
-            params = []
-            if search:
-                search_condition = """
-                    WHERE order_number ILIKE %s 
-                    OR sku ILIKE %s 
-                    OR name ILIKE %s
-                    OR status ILIKE %s
-                """
-                base_query += search_condition
-                count_query += search_condition.replace(" as count", "")
-                search_param = f"%{search}%"
-                params = [search_param, search_param, search_param, search_param]
-            
-            count_cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-            count_cursor.execute(count_query, params)
-            count_result = count_cursor.fetchone()
-            total = count_result['count'] if count_result else 0
-            count_cursor.close()
-            
-            base_query += " ORDER BY created_at DESC, id DESC LIMIT %s OFFSET %s"
-            params.extend([limit, offset])
-            
-            cursor.execute(base_query, params)
-            rows = cursor.fetchall()
-            
-            sales_data = []
-            for row in rows:
-                item = dict(row)
-                if isinstance(item.get('created_at'), datetime):
-                    item['created_at'] = item['created_at'].isoformat()
-                if item.get('price'):
-                    item['price'] = float(item['price'])
-                sales_data.append(item)
-            
-            return sales_data, total
-            
+            cur = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
+            cur.execute(page_query, page_params)
+            rows = cur.fetchall()
+            count = None
+            if total_sql:
+                cur.execute(*total_sql)
+                count = _uk_sales_total(total, search, cur.fetchone())
         except psycopg2.Error as e:
-            logger.error(f"Database error in get_uk_sales_data: {e}")
+            logger.error(f"Database error in get_uk_sales_page: {e}")
             raise
         finally:
-            cursor.close()
             conn.close()
+        return _uk_sales_page(rows, size, cursor, backwards, total, count)
 
     def save_uk_sales_data(self, data: Dict[str, Any]) -> int:
         """Save UK sales data to the database"""
-        self._ensure_table_exists()
-        
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
@@ -175,8 +190,6 @@ class SalesImportsRepo:
 
     def bulk_insert_uk_sales_data(self, data_list: List[Dict[str, Any]]) -> int:
         """Bulk insert UK sales data for better performance"""
-        self._ensure_table_exists()
-        
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
@@ -218,8 +231,6 @@ class SalesImportsRepo:
 
     def delete_uk_sales_data(self, record_id: int) -> bool:
         """Delete a UK sales data record"""
-        self._ensure_table_exists()
-        
         conn = self.get_connection()
         try:
             cursor = conn.cursor()
@@ -238,9 +249,7 @@ class SalesImportsRepo:
 
     def get_uk_sales_summary(self) -> Dict[str, Any]:
         """Get summary statistics for UK sales data"""
-        self._ensure_table_exists()
-        
-        conn = self.get_connection()
+        conn = self.get_read_connection()
         try:
             cursor = conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
             
@@ -285,3 +294,32 @@ class SalesImportsRepo:
         # This would query an import_history table if it existed
         # For now, return empty list
         return []
+
+
+class AsyncSalesImportsRepo:
+    """Async twins of the SalesImportsRepo uk-sales reads for the async /uk-sales route."""
+    database = "products"
+
+    async def get_uk_sales_data(self, limit: int = 100, offset: int = 0, search: str = "") -> Tuple[List[Dict[str, Any]], int]:
+        count_query, page_query, count_params, page_params = _uk_sales_sql(limit, offset, search)
+        try:
+            count_result = await fetch_one(self.database, count_query, count_params, as_dict=True)
+            rows = await fetch_all(self.database, page_query, page_params, as_dict=True)
+        except Exception as e:
+            logger.error(f"Database error in get_uk_sales_data: {e}")
+            raise
+        return _uk_sales_rows(rows), (count_result['count'] if count_result else 0)
+
+    async def get_uk_sales_page(self, size: int = 100, cursor: Optional[str] = None, search: str = "",
+                                total: TotalMode = "estimate") -> CursorPage:
+        page_query, page_params, backwards = _uk_sales_page_sql(size, cursor, search)
+        total_sql = _uk_sales_total_sql(total, search)
+        try:
+            rows = await fetch_all(self.database, page_query, page_params, as_dict=True)
+            count = None
+            if total_sql:
+                count = _uk_sales_total(total, search, await fetch_one(self.database, *total_sql, as_dict=True))
+        except Exception as e:
+            logger.error(f"Database error in get_uk_sales_page: {e}")
+            raise
+        return _uk_sales_page(rows, size, cursor, backwards, total, count)
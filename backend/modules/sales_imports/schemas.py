@@ -76,4 +76,8 @@ class UKSalesDataResponse(BaseModel):
     status: str = "success"
     data: List[UKSalesDataOut]
     count: int
-    total: int
\ No newline at end of file
+    total: Optional[int] = None           # None when total=none (or no estimate available)
+    total_is_estimate: bool = False
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+    message: Optional[str] = None
\ No newline at end of file
@@ -1,20 +1,24 @@
 from __future__ import annotations
-from typing import Dict, Any, List, Optional, BinaryIO
+from typing import Callable, Dict, Any, List, Optional, BinaryIO
 import csv
 import io
 import logging
 from datetime import datetime
 
-from .repo import SalesImportsRepo
+from core.pagination import CursorPage, InvalidCursor, TotalMode
+from .repo import SalesImportsRepo, AsyncSalesImportsRepo
 
 logger = logging.getLogger(__name__)
 
 
 class SalesImportsService:
-    def __init__(self, repo: Optional[SalesImportsRepo] = None):
+    def __init__(self, repo: Optional[SalesImportsRepo] = None, async_repo: Optional[AsyncSalesImportsRepo] = None):
         self.repo = repo or SalesImportsRepo()
+        self.async_repo = async_repo or AsyncSalesImportsRepo()
 
-    def import_csv_file(self, file_content: str, filename: str) -> Dict[str, Any]:
+    def import_csv_file(
+        self, file_content: str, filename: str, progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
         """
         Import sales data from CSV file based on column position.
         Expected column order (matching UK Sales Data display):
@@ -25,6 +29,8 @@ class SalesImportsService:
         5. qty (quantity)
         6. price (optional, defaults to 0.0)
         7. status (optional, defaults to 'pending')
+
+        `progress(done, total)` is called as rows are processed (see core.jobs).
         """
         try:
             # Parse CSV content - use regular reader to get raw rows
@@ -63,6 +69,8 @@ class SalesImportsService:
             errors = []
             
             for i, row in enumerate(data_rows, 1):
+                if progress:
+                    progress(i - 1, len(data_rows))
                 try:
                     # Skip empty rows
                     if not row or all(cell.strip() == '' for cell in row):
@@ -287,18 +295,66 @@ class SalesImportsService:
         """Get UK sales data with pagination"""
         try:
             data, total = self.repo.get_uk_sales_data(limit, offset, search)
-            return {
-                "status": "success",
-                "data": data,
-                "count": len(data),
-                "total": total
-            }
+            return self._uk_sales_result(data, total)
         except Exception as e:
-            logger.error(f"Error getting UK sales data: {e}")
-            return {
-                "status": "error",
-                "message": str(e),
-                "data": [],
-                "count": 0,
-                "total": 0
-            }
\ No newline at end of file
+            return self._uk_sales_error(e)
+
+    async def get_uk_sales_data_async(self, limit: int = 100, offset: int = 0, search: str = "") -> Dict[str, Any]:
+        """Same as get_uk_sales_data, over the async repo (for async routes)"""
+        try:
+            data, total = await self.async_repo.get_uk_sales_data(limit, offset, search)
+            return self._uk_sales_result(data, total)
+        except Exception as e:
+            return self._uk_sales_error(e)
+
+    def get_uk_sales_page(self, limit: int = 100, cursor: Optional[str] = None, search: str = "",
+                          total: TotalMode = "estimate") -> Dict[str, Any]:
+        """Get one keyset page of UK sales data (next_cursor / prev_cursor to move)"""
+        try:
+            return self._uk_sales_page_result(self.repo.get_uk_sales_page(limit, cursor, search, total))
+        except InvalidCursor:
+            raise
+        except Exception as e:
+            return self._uk_sales_error(e)
+
+    async def get_uk_sales_page_async(self, limit: int = 100, cursor: Optional[str] = None, search: str = "",
+                                      total: TotalMode = "estimate") -> Dict[str, Any]:
+        """Same as get_uk_sales_page, over the async repo (for async routes)"""
+        try:
+            return self._uk_sales_page_result(await self.async_repo.get_uk_sales_page(limit, cursor, search, total))
+        except InvalidCursor:
+            raise
+        except Exception as e:
+            return self._uk_sales_error(e)
+
+    @staticmethod
+    def _uk_sales_result(data: List[Dict[str, Any]], total: int) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "data": data,
+            "count": len(data),
+            "total": total
+        }
+
+    @staticmethod
+    def _uk_sales_page_result(page: CursorPage) -> Dict[str, Any]:
+        return {
+            "status": "success",
+            "data": page.items,
+            "count": len(page.items),
+            "total": page.total,
+            "total_is_estimate": page.total_is_estimate,
+            "next_cursor": page.next_cursor,
+            "prev_cursor": page.prev_cursor,
+        }
+
+    @staticmethod
+    def _uk_sales_error(e: Exception) -> Dict[str, Any]:
+        logger.error(f"Error getting UK sales data: {e}")
+        return {
+            "status": "error",
+            "message": str(e),
+            "data": [],
+            "count": 0,
+            "total": 0
+        }
\ No newline at end of file
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List
-from common.deps import get_current_user
+from common.deps import get_current_user, etag_for
+from core import executors
 from .schemas import UserCreate, UserUpdate, UserOut
 from .service import UsersService
 
@@ -12,14 +13,14 @@ def list_users(user=Depends(get_current_user)):
     return svc.list_usernames()
 
 @router.get("/detailed", response_model=List[UserOut])
-def list_users_detailed(user=Depends(get_current_user)):
+def list_users_detailed(user=Depends(get_current_user), _etag=etag_for("login_users")):
     try:
-        users = svc.list_all()
-        return [UserOut(**u) for u in users]
+        return svc.list_all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch users: {str(e)}")
 
 @router.post("", status_code=201)
+@executors.offload("cpu")  # bcrypt
 def create_user(body: UserCreate, user=Depends(get_current_user)):
     try:
         svc.create(body.username, body.password, body.role, body.allowed_tabs)
@@ -28,6 +29,7 @@ def create_user(body: UserCreate, user=Depends(get_current_user)):
         raise HTTPException(status_code=400, detail=str(e))
 
 @router.patch("")
+@executors.offload("cpu")
 def update_user(body: UserUpdate, user=Depends(get_current_user)):
     try:
         svc.update(
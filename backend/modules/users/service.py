@@ -1,5 +1,5 @@
 from typing import List, Optional
-from core.security import hash_password
+from core.security import hash_password, invalidate_user
 from .repo import UsersRepo
 
 def _csv(arr: Optional[List[str]]) -> str:
@@ -33,12 +33,14 @@ class UsersService:
         new_hash = hash_password(new_password) if new_password else None
         self.repo.update(username, new_username=new_username, new_hash=new_hash, role=role,
                          allowed_tabs_csv=_csv(allowed_tabs) if allowed_tabs is not None else None)
+        invalidate_user(username, new_username)
         # Save role as preset if both role and tabs are provided
         if role and allowed_tabs is not None:
             self._save_role_preset(role, allowed_tabs)
 
     def delete(self, username: str):
         self.repo.delete(username)
+        invalidate_user(username)
 
     def list_usernames(self) -> List[str]:
         return self.repo.list_usernames()
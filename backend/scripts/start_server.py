@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 """
 Startup script for RM365 Toolbox Backend
+
+    python scripts/start_server.py                  # one uvicorn process on 127.0.0.1:8000
+    python scripts/start_server.py --prod           # gunicorn + uvicorn workers (gunicorn.conf.py)
+    python scripts/start_server.py --prod --workers 3 --port 8080
+
+Production mode sizes the worker count from WEB_CONCURRENCY or the container's
+CPU/memory limits (see core.workers), preloads the app and recycles workers
+after WEB_MAX_REQUESTS requests. Without gunicorn (e.g. on Windows) it falls
+back to uvicorn's own multi-process mode, which has no preloading.
 """
+import argparse
 import os
 import sys
 from pathlib import Path
 
 # Get the directory where this script is located
 script_dir = Path(__file__).parent.absolute()
-backend_dir = script_dir
+backend_dir = script_dir.parent
 
 print(f"Script directory: {script_dir}")
 print(f"Backend directory: {backend_dir}")
@@ -25,28 +35,84 @@ if not app_py.exists():
     print(f"ERROR: app.py not found at {app_py}")
     sys.exit(1)
 
-print("Starting backend server...")
+parser = argparse.ArgumentParser(description="Start the RM365 backend")
+parser.add_argument("--prod", action="store_true", help="multi-worker production mode")
+parser.add_argument("--host", default=None, help="bind address (default 127.0.0.1, or 0.0.0.0 with --prod)")
+parser.add_argument("--port", type=int, default=None, help="port (default 8000, or $PORT with --prod)")
+parser.add_argument("--workers", type=int, default=None, help="override WEB_CONCURRENCY")
+args = parser.parse_args()
+
+
+def run_production():
+    host = args.host or "0.0.0.0"
+    port = args.port or int(os.getenv("PORT", "8080"))
+    env = {**os.environ, "HOST": host, "PORT": str(port)}
+    if args.workers:
+        env["WEB_CONCURRENCY"] = str(args.workers)
+
+    try:
+        import gunicorn  # noqa: F401
+    except ImportError:
+        gunicorn = None
+
+    if gunicorn is not None:
+        print(f"🚀 Starting gunicorn on http://{host}:{port}")
+        cmd = [sys.executable, "-m", "gunicorn", "-c", str(backend_dir / "gunicorn.conf.py"), "app:app"]
+        os.execve(sys.executable, cmd, env)  # replaces this process; gunicorn handles signals
+
+    import uvicorn
+    os.environ.update(env)
+    from core import workers
+    from core.config import settings
+
+    count = args.workers or workers.worker_count()
+    print(f"⚠️ gunicorn not installed; {count} uvicorn workers without preloading")
+    print(f"🚀 Starting server on http://{host}:{port}")
+    uvicorn.run(
+        "app:app",
+        host=host,
+        port=port,
+        workers=count,
+        limit_max_requests=settings.WEB_MAX_REQUESTS or None,
+        timeout_graceful_shutdown=settings.WEB_GRACEFUL_TIMEOUT,
+        proxy_headers=True,
+        forwarded_allow_ips="*",
+        log_level="info",
+    )
+
+
+def run_development():
+    host = args.host or "127.0.0.1"
+    port = args.port or 8000
 
-try:
     # Import and run the app
     import app
     import uvicorn
-    
+
     print("✅ App module imported successfully")
-    print("🚀 Starting server on http://127.0.0.1:8000")
-    
+    print(f"🚀 Starting server on http://{host}:{port}")
+
     # Start the server
     uvicorn.run(
         "app:app",  # Import string instead of app instance for reload
-        host="127.0.0.1",
-        port=8000,
+        host=host,
+        port=port,
         reload=False,  # Disable reload to avoid the warning
         log_level="info"
     )
-    
+
+
+print("Starting backend server...")
+
+try:
+    if args.prod:
+        run_production()
+    else:
+        run_development()
+
 except ImportError as e:
     print(f"❌ Import error: {e}")
     sys.exit(1)
 except Exception as e:
     print(f"❌ Error starting server: {e}")
-    sys.exit(1)
\ No newline at end of file
+    sys.exit(1)
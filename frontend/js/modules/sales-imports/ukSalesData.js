@@ -5,6 +5,11 @@ let currentPage = 1;
 let pageSize = 50;
 let searchTerm = '';
 let totalRecords = 0;
+let totalIsEstimate = false;
+// keyset pagination: cursor of the page on screen and the ones either side
+let pageCursor = null;
+let nextCursor = null;
+let prevCursor = null;
 
 export async function init() {
   console.log('[UK Sales Data] Initializing...');
@@ -14,14 +19,15 @@ export async function init() {
 
 async function loadUKSalesData() {
   try {
-    const offset = (currentPage - 1) * pageSize;
-    
-    const result = await getUKSalesData(pageSize, offset, searchTerm);
+    const result = await getUKSalesData(pageSize, pageCursor, searchTerm);
     
     if (result.status === 'success') {
       displaySalesData(result.data);
       updateStats(result);
-      totalRecords = result.total;
+      totalRecords = result.total ?? 0;
+      totalIsEstimate = !!result.total_is_estimate;
+      nextCursor = result.next_cursor || null;
+      prevCursor = result.prev_cursor || null;
       updatePaginationControls();
     } else {
       showError(result.message || 'Failed to load sales data');
@@ -70,7 +76,7 @@ function updateStats(result) {
   const totalValueEl = document.getElementById('totalValue');
   
   if (totalRecordsEl) {
-    totalRecordsEl.textContent = result.total.toLocaleString();
+    totalRecordsEl.textContent = (result.total_is_estimate ? '~' : '') + (result.total ?? 0).toLocaleString();
   }
   
   // Calculate totals from current page data
@@ -98,15 +104,15 @@ function updatePaginationControls() {
   const pageInfo = document.getElementById('pageInfo');
   
   if (prevBtn) {
-    prevBtn.disabled = currentPage === 1;
+    prevBtn.disabled = !prevCursor;
   }
   
   if (nextBtn) {
-    nextBtn.disabled = currentPage >= totalPages || totalRecords === 0;
+    nextBtn.disabled = !nextCursor;
   }
   
   if (pageInfo) {
-    pageInfo.textContent = `Page ${currentPage} of ${totalPages || 1}`;
+    pageInfo.textContent = `Page ${currentPage} of ${totalIsEstimate ? '~' : ''}${Math.max(totalPages, currentPage)}`;
   }
 }
 
@@ -161,6 +167,7 @@ function setupEventListeners() {
   if (refreshBtn) {
     refreshBtn.addEventListener('click', () => {
       currentPage = 1;
+      pageCursor = null;
       loadUKSalesData();
     });
   }
@@ -168,7 +175,8 @@ function setupEventListeners() {
   const prevBtn = document.getElementById('prevBtn');
   if (prevBtn) {
     prevBtn.addEventListener('click', () => {
-      if (currentPage > 1) {
+      if (prevCursor) {
+        pageCursor = prevCursor;
         currentPage--;
         loadUKSalesData();
       }
@@ -178,8 +186,8 @@ function setupEventListeners() {
   const nextBtn = document.getElementById('nextBtn');
   if (nextBtn) {
     nextBtn.addEventListener('click', () => {
-      const totalPages = Math.ceil(totalRecords / pageSize);
-      if (currentPage < totalPages) {
+      if (nextCursor) {
+        pageCursor = nextCursor;
         currentPage++;
         loadUKSalesData();
       }
@@ -195,6 +203,7 @@ function setupEventListeners() {
       searchTimeout = setTimeout(() => {
         searchTerm = e.target.value;
         currentPage = 1;
+        pageCursor = null;
         loadUKSalesData();
       }, 300);
     });
@@ -6,12 +6,13 @@ import { config } from '../../config.js';
 const API = '/api/v1/sales-imports';
 
 // UK Sales Data operations
-export async function getUKSalesData(limit = 50, offset = 0, search = '') {
+// Keyset pagination: pass the next_cursor / prev_cursor of the last response (null for page 1)
+export async function getUKSalesData(limit = 50, cursor = null, search = '') {
   const params = new URLSearchParams({
     limit: limit.toString(),
-    offset: offset.toString(),
     search: search
   });
+  if (cursor) params.set('cursor', cursor);
   return await get(`${API}/uk-sales?${params.toString()}`);
 }
 